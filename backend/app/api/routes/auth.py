@@ -1,4 +1,4 @@
-from fastapi import APIRouter, HTTPException, Depends, status
+from fastapi import APIRouter, HTTPException, Depends, Query, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from pydantic import BaseModel
 import subprocess
@@ -55,6 +55,7 @@ except Exception:
 
 router = APIRouter(prefix="/auth", tags=["auth"])
 security = HTTPBearer()
+optional_security = HTTPBearer(auto_error=False)
 
 # Configurações JWT
 SECRET_KEY = os.getenv("JWT_SECRET_KEY", "your-secret-key-change-in-production")
@@ -303,6 +304,35 @@ def verify_token(credentials: HTTPAuthorizationCredentials = Depends(security)):
             headers={"WWW-Authenticate": "Bearer"},
         )
 
+def decode_token(token: Optional[str]) -> Optional[str]:
+    """
+    Decodifica um token JWT e retorna o usuário (sub), ou None se inválido
+    """
+    if not token:
+        return None
+    try:
+        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        return payload.get("sub")
+    except _PyJWTError:
+        return None
+
+def verify_token_or_query(
+    token: Optional[str] = Query(None),
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(optional_security),
+):
+    """
+    Verifica o token JWT do header Authorization ou do parâmetro ?token=
+    (EventSource/WebSocket no navegador não permitem headers customizados)
+    """
+    username = decode_token(credentials.credentials if credentials else token)
+    if username is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Token inválido",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    return username
+
 @router.post("/login", response_model=AuthResponse)
 async def login(request: LoginRequest):
     """
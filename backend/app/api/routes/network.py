@@ -6,6 +6,7 @@ import re
 import json
 from datetime import datetime
 from app.api.routes.auth import verify_token
+from app.core import procfs
 
 router = APIRouter()
 
@@ -208,11 +209,14 @@ class NetworkAdmin:
         connections = []
         
         try:
+            # Nome do processo lido de /proc/<pid>/comm, uma vez por PID
+            names: Dict[int, str] = {}
             for conn in psutil.net_connections(kind='inet'):
                 if conn.status == psutil.CONN_ESTABLISHED:
                     try:
-                        process = psutil.Process(conn.pid) if conn.pid else None
-                        process_name = process.name() if process else "Unknown"
+                        if conn.pid and conn.pid not in names:
+                            names[conn.pid] = procfs.read_comm(conn.pid) or psutil.Process(conn.pid).name()
+                        process_name = names.get(conn.pid, "Unknown") if conn.pid else "Unknown"
                         
                         local_addr = f"{conn.laddr.ip}:{conn.laddr.port}" if conn.laddr else "Unknown"
                         remote_addr = f"{conn.raddr.ip}:{conn.raddr.port}" if conn.raddr else "Unknown"
@@ -1,8 +1,19 @@
 from fastapi import APIRouter, HTTPException, Depends, Query
+from fastapi.responses import StreamingResponse
 from typing import List, Dict, Any, Optional
 import subprocess
 import json
-from app.api.routes.auth import verify_token
+import asyncio
+import base64
+import bisect
+import itertools
+from app.api.routes.auth import verify_token, verify_token_or_query
+from app.core.dpkg import dpkg_status
+from app.core.apt import apt_policy, apt_extended_states
+from app.core.apt_updates import apt_updates
+from app.core.apt_search import package_search
+from app.core.apt_jobs import apt_jobs, apt_command
+from app.core.sse import sse_response, job_stream
 
 router = APIRouter()
 
@@ -185,184 +196,264 @@ CATEGORIES = {
 }
 
 def check_package_installed(package_name: str) -> tuple[bool, str]:
-    """Verificar se um pacote está instalado."""
+    """Verificar se um pacote está instalado (índice do /var/lib/dpkg/status)."""
     try:
-        result = subprocess.run(
-            f"dpkg -l | grep -E '^ii.*{package_name}'",
-            shell=True,
-            capture_output=True,
-            text=True,
-            timeout=5
-        )
-        
-        if result.returncode == 0 and result.stdout.strip():
-            # Extrair versão da saída do dpkg
-            lines = result.stdout.strip().split('\n')
-            if lines:
-                parts = lines[0].split()
-                if len(parts) >= 3:
-                    version = parts[2]
-                    return True, version
-            return True, "installed"
-        
-        return False, ""
+        return dpkg_status.is_installed(package_name)
     except Exception:
         return False, ""
 
 def get_available_version(package_name: str) -> str:
     """Obter versão disponível de um pacote."""
     try:
-        result = subprocess.run(
-            f"apt-cache policy {package_name} | grep Candidate",
-            shell=True,
-            capture_output=True,
-            text=True,
-            timeout=5
-        )
-        
-        if result.returncode == 0 and result.stdout:
-            parts = result.stdout.split()
-            if len(parts) >= 2:
-                return parts[1]
+        return apt_policy.get(package_name)["candidate"] or "latest"
     except Exception:
-        pass
-    return "latest"
+        return "latest"
+
+
+# Campos disponíveis em /installed (nome na resposta -> chave no índice do dpkg)
+INSTALLED_FIELDS = {
+    "name": "name",
+    "version": "version",
+    "architecture": "arch",
+    "description": "description",
+    "status": None,
+    "section": "section",
+    "priority": "priority",
+    "installed_size": "installed_size",
+    "source": "source",
+    "maintainer": "maintainer",
+    "auto": None,
+}
+INSTALLED_DEFAULT_FIELDS = ("name", "version", "architecture", "description", "status")
+
+
+def _encode_cursor(entry: Dict[str, Any]) -> str:
+    return base64.urlsafe_b64encode(f"{entry['name']}:{entry['arch']}".encode()).decode().rstrip("=")
+
+
+def _decode_cursor(cursor: str) -> tuple:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+    except (ValueError, UnicodeDecodeError):
+        raise HTTPException(status_code=400, detail="Cursor inválido")
+    name, sep, arch = raw.rpartition(":")
+    if not sep:
+        raise HTTPException(status_code=400, detail="Cursor inválido")
+    return name, arch
+
+
+def _installed_row(entry: Dict[str, Any], fields: List[str]) -> Dict[str, Any]:
+    row = {}
+    for field in fields:
+        if field == "status":
+            row[field] = "installed"
+        elif field == "auto":
+            row[field] = apt_extended_states.is_auto(entry["name"], entry["arch"])
+        else:
+            row[field] = entry.get(INSTALLED_FIELDS[field])
+    return row
 
 
 @router.get("/installed")
-async def get_installed_packages(current_user: str = Depends(verify_token)):
-    """Obter lista de pacotes instalados."""
+async def get_installed_packages(
+    cursor: Optional[str] = Query(None, description="Cursor retornado em next_cursor"),
+    limit: Optional[int] = Query(None, ge=1, le=5000, description="Máximo de pacotes (padrão: todos)"),
+    fields: Optional[str] = Query(None, description="Campos separados por vírgula (ex.: name,version)"),
+    prefix: Optional[str] = Query(None, description="Prefixo do nome"),
+    section: Optional[str] = Query(None),
+    arch: Optional[str] = Query(None),
+    auto: Optional[bool] = Query(None, description="true: só automáticos; false: só manuais"),
+    format: str = Query("json", pattern="^(json|ndjson)$"),
+    current_user: str = Depends(verify_token)
+):
+    """Obter lista de pacotes instalados (paginação por cursor, filtros e NDJSON)."""
     try:
-        result = subprocess.run(
-            "dpkg -l",
-            shell=True,
-            capture_output=True,
-            text=True
-        )
-        
-        if result.returncode != 0:
-            raise HTTPException(status_code=500, detail="Erro ao obter pacotes instalados")
+        selected = [f.strip() for f in fields.split(",") if f.strip()] if fields else list(INSTALLED_DEFAULT_FIELDS)
+        unknown = [f for f in selected if f not in INSTALLED_FIELDS]
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"Campos inválidos: {', '.join(unknown)}")
+        
+        entries = dpkg_status.entries()
+        after = _decode_cursor(cursor) if cursor else None
+        # entradas ordenadas por (nome, arquitetura): o prefixo é um intervalo contínuo
+        start = bisect.bisect_left(entries, prefix, key=lambda e: e["name"]) if prefix else 0
+        
+        def matches(entry: Dict[str, Any]) -> bool:
+            if section and entry.get("section") != section:
+                return False
+            if arch and entry["arch"] != arch:
+                return False
+            if auto is not None and apt_extended_states.is_auto(entry["name"], entry["arch"]) != auto:
+                return False
+            return True
+        
+        def select(stop_at_limit: bool):
+            """Gera as entradas da página e, por último, a tupla (next_cursor, total)."""
+            total = taken = 0
+            last: Optional[Dict[str, Any]] = None
+            next_cursor = None
+            for entry in itertools.islice(entries, start, None):
+                if prefix and not entry["name"].startswith(prefix):
+                    break
+                if not matches(entry):
+                    continue
+                total += 1
+                if next_cursor is not None or (after is not None and (entry["name"], entry["arch"]) <= after):
+                    continue
+                if limit is not None and taken == limit:
+                    next_cursor = _encode_cursor(last)
+                    if stop_at_limit:
+                        break
+                    continue
+                taken += 1
+                last = entry
+                yield entry
+            yield (next_cursor, total)
+        
+        if format == "ndjson":
+            # Uma linha JSON por pacote, gerada enquanto percorre o índice; se houver
+            # mais páginas, a última linha é {"next_cursor": "..."}
+            def rows():
+                for item in select(stop_at_limit=True):
+                    if isinstance(item, tuple):
+                        if item[0]:
+                            yield json.dumps({"next_cursor": item[0]}) + "\n"
+                        break
+                    yield json.dumps(_installed_row(item, selected), ensure_ascii=False) + "\n"
+            return StreamingResponse(rows(), media_type="application/x-ndjson")
         
         packages = []
-        lines = result.stdout.split('\n')
-        
-        for line in lines:
-            # Parse da saída do dpkg -l
-            if line.startswith('ii '):  # Pacotes instalados
-                parts = line.split()
-                if len(parts) >= 4:
-                    package_name = parts[1]
-                    version = parts[2]
-                    architecture = parts[3]
-                    description = " ".join(parts[4:]) if len(parts) > 4 else ""
-                    
-                    packages.append({
-                        "name": package_name,
-                        "version": version,
-                        "architecture": architecture,
-                        "description": description,
-                        "status": "installed"
-                    })
-        
-        return {"packages": packages, "total_count": len(packages)}
+        for item in select(stop_at_limit=False):
+            if isinstance(item, tuple):
+                next_cursor, total = item
+                break
+            packages.append(_installed_row(item, selected))
+        return {"packages": packages, "total_count": total, "next_cursor": next_cursor}
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Erro ao obter pacotes instalados: {str(e)}")
 
 
 @router.get("/updates")
-async def get_available_updates(current_user: str = Depends(verify_token)):
-    """Obter lista de atualizações disponíveis."""
+async def get_available_updates(
+    refresh: bool = Query(False, description="Dispara apt-get update em background"),
+    current_user: str = Depends(verify_token)
+):
+    """Obter lista de atualizações disponíveis (cache; não espera o apt update)."""
     try:
-        # Atualizar lista de pacotes
-        update_result = subprocess.run(
-            "apt update",
-            shell=True,
-            capture_output=True,
-            text=True
-        )
-        
-        # Listar atualizações disponíveis
-        result = subprocess.run(
-            "apt list --upgradable",
-            shell=True,
-            capture_output=True,
-            text=True
-        )
-        
-        if result.returncode != 0:
-            raise HTTPException(status_code=500, detail="Erro ao obter atualizações")
-        
-        updates = []
-        lines = result.stdout.split('\n')[1:]  # Pular cabeçalho
-        
-        for line in lines:
-            if '/' in line and '[upgradable' in line:
-                # Parse da linha de atualização
-                match = re.match(r'^([^/]+)/[^\s]+\s+([^\s]+)\s+[^\[]+\[upgradable from:\s*([^\]]+)\]', line)
-                if match:
-                    package_name = match.group(1)
-                    new_version = match.group(2)
-                    current_version = match.group(3)
-                    
-                    updates.append({
-                        "name": package_name,
-                        "current_version": current_version,
-                        "new_version": new_version
-                    })
-        
-        return {"updates": updates, "total_count": len(updates)}
+        if refresh:
+            apt_updates.refresh()
+        return apt_updates.snapshot()
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Erro ao obter atualizações: {str(e)}")
 
 
+@router.post("/updates/refresh")
+async def refresh_available_updates(current_user: str = Depends(verify_token)):
+    """Iniciar apt-get update em background (reaproveita um refresh em andamento)."""
+    try:
+        already_running = apt_updates.refreshing
+        apt_updates.refresh()
+        return {
+            "message": "Atualização da lista já em andamento" if already_running else "Atualização da lista iniciada",
+            "refreshing": True,
+            "last_refreshed": apt_updates.last_refreshed
+        }
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Erro ao atualizar lista: {str(e)}")
+
+
+@router.get("/search")
+async def search_packages_paged(
+    q: str = Query(..., min_length=1),
+    page: int = Query(1, ge=1),
+    per_page: int = Query(20, ge=1, le=200),
+    current_user: str = Depends(verify_token)
+):
+    """Pesquisa paginada por página (formato usado pelo frontend)."""
+    try:
+        result = await asyncio.to_thread(package_search.search, q, (page - 1) * per_page, per_page)
+        return {"packages": result["packages"], "total": result["total"], "page": page, "per_page": per_page}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Erro ao pesquisar pacotes: {str(e)}")
+
+
 @router.get("/search/{query}")
-async def search_packages(query: str, current_user: str = Depends(verify_token)):
-    """Pesquisar pacotes disponíveis."""
+async def search_packages(
+    query: str,
+    offset: int = Query(0, ge=0),
+    limit: int = Query(50, ge=1, le=200),
+    current_user: str = Depends(verify_token)
+):
+    """Pesquisar pacotes disponíveis (índice local das listas do APT)."""
     try:
-        result = subprocess.run(
-            f"apt search {query}",
-            shell=True,
-            capture_output=True,
-            text=True
-        )
-        
-        packages = []
-        lines = result.stdout.split('\n')
-        
-        i = 0
-        while i < len(lines):
-            line = lines[i].strip()
-            if '/' in line and not line.startswith('WARNING'):
-                # Parse da linha do pacote
-                parts = line.split(' - ', 1)
-                if len(parts) == 2:
-                    package_info = parts[0]
-                    description = parts[1]
-                    
-                    # Extrair nome e versão
-                    pkg_parts = package_info.split('/')
-                    if len(pkg_parts) >= 2:
-                        package_name = pkg_parts[0]
-                        version_arch = pkg_parts[1].split(' ')[0]
-                        
-                        # Verificar se há descrição adicional na próxima linha
-                        full_description = description
-                        if i + 1 < len(lines) and lines[i + 1].startswith('  '):
-                            full_description += " " + lines[i + 1].strip()
-                            i += 1
-                        
-                        packages.append({
-                            "name": package_name,
-                            "version": version_arch,
-                            "description": full_description
-                        })
-            i += 1
-        
-        return {"packages": packages[:50], "query": query}  # Limitar a 50 resultados
+        result = await asyncio.to_thread(package_search.search, query, offset, limit)
+        return {**result, "query": query}
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Erro ao pesquisar pacotes: {str(e)}")
 
 
+async def _run_apt_job(action: str, packages: List[str], wait: bool, done_message: str,
+                       error_prefix: str, purge: bool = False) -> Dict[str, Any]:
+    """Enfileira um job do apt-get; com wait=True aguarda (sem bloquear o event loop)."""
+    try:
+        argv = apt_command(action, packages, purge=purge)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    job = apt_jobs.submit(action, [argv], packages=packages)
+    if not wait:
+        return {
+            "message": "Operação enfileirada",
+            "job_id": job["id"],
+            "queue_position": job["queue_position"]
+        }
+    job = await apt_jobs.wait(job["id"])
+    if job["status"] != "completed":
+        raise HTTPException(
+            status_code=400, 
+            detail=f"{error_prefix}: {job['error']}"
+        )
+    return {"message": done_message, "job_id": job["id"], "output": apt_jobs.output(job["id"])}
+
+
+@router.get("/jobs")
+async def list_apt_jobs(current_user: str = Depends(verify_token)):
+    """Jobs do apt (fila, em execução e finalizados recentes)."""
+    return {"jobs": apt_jobs.list(), "current": apt_jobs.current}
+
+
+@router.get("/jobs/{job_id}")
+async def get_apt_job(job_id: str, current_user: str = Depends(verify_token)):
+    job = apt_jobs.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job não encontrado")
+    return job
+
+
+@router.get("/jobs/{job_id}/stream")
+async def stream_apt_job(
+    job_id: str,
+    fps: float = Query(4, gt=0, le=20),
+    current_user: str = Depends(verify_token_or_query)
+):
+    """Progresso (APT::Status-Fd) e saída do apt-get via SSE."""
+    channel = apt_jobs.channel(job_id)
+    if channel is None:
+        raise HTTPException(status_code=404, detail="Job não encontrado")
+    return sse_response(job_stream(lambda: apt_jobs.get(job_id), channel, fps))
+
+
+@router.post("/jobs/{job_id}/cancel")
+async def cancel_apt_job(job_id: str, current_user: str = Depends(verify_token)):
+    """Cancelar um job ainda na fila (um apt-get em execução não é interrompido)."""
+    if apt_jobs.get(job_id) is None:
+        raise HTTPException(status_code=404, detail="Job não encontrado")
+    if not apt_jobs.cancel(job_id):
+        raise HTTPException(status_code=409, detail="Job já iniciado ou finalizado")
+    return {"message": "Job cancelado"}
+
+
 @router.get("/{package_name}")
 async def get_package_info(package_name: str, current_user: str = Depends(verify_token)):
     """Obter informações detalhadas de um pacote."""
@@ -389,18 +480,7 @@ async def get_package_info(package_name: str, current_user: str = Depends(verify
                     package_info["details"][key.strip()] = value.strip()
         
         # Verificar se está instalado
-        status_result = subprocess.run(
-            f"dpkg -l {package_name}",
-            shell=True,
-            capture_output=True,
-            text=True
-        )
-        
-        if status_result.returncode == 0:
-            for line in status_result.stdout.split('\n'):
-                if line.startswith('ii ') and package_name in line:
-                    package_info["installed"] = True
-                    break
+        package_info["installed"], _ = check_package_installed(package_name)
         
         return package_info
     except Exception as e:
@@ -408,30 +488,23 @@ async def get_package_info(package_name: str, current_user: str = Depends(verify
 
 
 @router.post("/install")
-async def install_package(package_data: Dict[str, Any], current_user: str = Depends(verify_token)):
-    """Instalar um pacote."""
+async def install_package(
+    package_data: Dict[str, Any],
+    wait: bool = Query(False, description="Aguarda o fim da instalação"),
+    current_user: str = Depends(verify_token)
+):
+    """Instalar pacotes (job em background; acompanhe por /jobs/{id}/stream)."""
     try:
-        package_name = package_data.get("package_name")
-        if not package_name:
+        packages = package_data.get("packages") or [package_data.get("package_name")]
+        packages = [p for p in packages if p]
+        if not packages:
             raise HTTPException(status_code=400, detail="Nome do pacote é obrigatório")
         
-        result = subprocess.run(
-            f"apt install -y {package_name}",
-            shell=True,
-            capture_output=True,
-            text=True
+        return await _run_apt_job(
+            "install", packages, wait,
+            done_message=f"Pacote {' '.join(packages)} instalado com sucesso",
+            error_prefix="Erro ao instalar pacote"
         )
-        
-        if result.returncode != 0:
-            raise HTTPException(
-                status_code=400, 
-                detail=f"Erro ao instalar pacote: {result.stderr}"
-            )
-        
-        return {
-            "message": f"Pacote {package_name} instalado com sucesso",
-            "output": result.stdout
-        }
     except HTTPException:
         raise
     except Exception as e:
@@ -439,24 +512,21 @@ async def install_package(package_data: Dict[str, Any], current_user: str = Depe
 
 
 @router.delete("/{package_name}")
-async def remove_package(package_name: str, purge: bool = False, current_user: str = Depends(verify_token)):
-    """Remover um pacote."""
+async def remove_package(
+    package_name: str,
+    purge: bool = False,
+    wait: bool = Query(False, description="Aguarda o fim da remoção"),
+    current_user: str = Depends(verify_token)
+):
+    """Remover um pacote (job em background)."""
     try:
-        cmd = f"apt {'purge' if purge else 'remove'} -y {package_name}"
-        
-        result = subprocess.run(cmd, shell=True, capture_output=True, text=True)
-        
-        if result.returncode != 0:
-            raise HTTPException(
-                status_code=400, 
-                detail=f"Erro ao remover pacote: {result.stderr}"
-            )
-        
         action = "purgado" if purge else "removido"
-        return {
-            "message": f"Pacote {package_name} {action} com sucesso",
-            "output": result.stdout
-        }
+        return await _run_apt_job(
+            "remove", [package_name], wait,
+            done_message=f"Pacote {package_name} {action} com sucesso",
+            error_prefix="Erro ao remover pacote",
+            purge=purge
+        )
     except HTTPException:
         raise
     except Exception as e:
@@ -465,24 +535,20 @@ async def remove_package(package_name: str, purge: bool = False, current_user: s
 
 @router.post("/update")
 async def update_package_list(current_user: str = Depends(verify_token)):
-    """Atualizar lista de pacotes."""
+    """Atualizar lista de pacotes (aguarda o refresh em andamento, se houver)."""
     try:
-        result = subprocess.run(
-            "apt update",
-            shell=True,
-            capture_output=True,
-            text=True
-        )
+        # shield: se o cliente desconectar, o refresh compartilhado continua
+        result = await asyncio.shield(apt_updates.refresh())
         
-        if result.returncode != 0:
+        if not result["success"]:
             raise HTTPException(
                 status_code=400, 
-                detail=f"Erro ao atualizar lista de pacotes: {result.stderr}"
+                detail=f"Erro ao atualizar lista de pacotes: {result['error']}"
             )
         
         return {
             "message": "Lista de pacotes atualizada com sucesso",
-            "output": result.stdout
+            "output": result["output"]
         }
     except HTTPException:
         raise
@@ -491,31 +557,20 @@ async def update_package_list(current_user: str = Depends(verify_token)):
 
 
 @router.post("/upgrade")
-async def upgrade_packages(package_data: Dict[str, Any] = None, current_user: str = Depends(verify_token)):
-    """Atualizar pacotes do sistema."""
+async def upgrade_packages(
+    package_data: Dict[str, Any] = None,
+    wait: bool = Query(False, description="Aguarda o fim da atualização"),
+    current_user: str = Depends(verify_token)
+):
+    """Atualizar pacotes do sistema (todos, ou os de 'packages'; job em background)."""
     try:
         specific_packages = package_data.get("packages", []) if package_data else []
         
-        if specific_packages:
-            # Atualizar pacotes específicos
-            packages_str = " ".join(specific_packages)
-            cmd = f"apt install -y {packages_str}"
-        else:
-            # Atualizar todos os pacotes
-            cmd = "apt upgrade -y"
-        
-        result = subprocess.run(cmd, shell=True, capture_output=True, text=True)
-        
-        if result.returncode != 0:
-            raise HTTPException(
-                status_code=400, 
-                detail=f"Erro ao atualizar pacotes: {result.stderr}"
-            )
-        
-        return {
-            "message": "Pacotes atualizados com sucesso",
-            "output": result.stdout
-        }
+        return await _run_apt_job(
+            "upgrade", specific_packages, wait,
+            done_message="Pacotes atualizados com sucesso",
+            error_prefix="Erro ao atualizar pacotes"
+        )
     except HTTPException:
         raise
     except Exception as e:
@@ -523,26 +578,17 @@ async def upgrade_packages(package_data: Dict[str, Any] = None, current_user: st
 
 
 @router.post("/autoremove")
-async def autoremove_packages(current_user: str = Depends(verify_token)):
-    """Remover pacotes órfãos."""
+async def autoremove_packages(
+    wait: bool = Query(False, description="Aguarda o fim da remoção"),
+    current_user: str = Depends(verify_token)
+):
+    """Remover pacotes órfãos (job em background)."""
     try:
-        result = subprocess.run(
-            "apt autoremove -y",
-            shell=True,
-            capture_output=True,
-            text=True
+        return await _run_apt_job(
+            "autoremove", [], wait,
+            done_message="Pacotes órfãos removidos com sucesso",
+            error_prefix="Erro ao remover pacotes órfãos"
         )
-        
-        if result.returncode != 0:
-            raise HTTPException(
-                status_code=400, 
-                detail=f"Erro ao remover pacotes órfãos: {result.stderr}"
-            )
-        
-        return {
-            "message": "Pacotes órfãos removidos com sucesso",
-            "output": result.stdout
-        }
     except HTTPException:
         raise
     except Exception as e:
@@ -1,11 +1,19 @@
 from fastapi import APIRouter, HTTPException, Query, Depends
 from typing import List, Dict, Any, Optional
 import subprocess
+import asyncio
 import json
 import os
 import re
 from pathlib import Path
 from app.api.routes.auth import verify_token
+from app.core.dpkg import dpkg_status
+from app.core.apt import apt_policy
+from app.core.apt_jobs import apt_jobs, apt_command
+from app.core.apt_updates import lists_stale
+from app.core.config import settings
+from app.core.runtimes import runtime_inventory
+from app.core.state_store import JsonStateStore
 
 router = APIRouter()
 
@@ -14,146 +22,13 @@ PACKAGES_STATE_FILE = Path("/tmp/packages_state.json")
 
 def get_installed_versions(package_id: str) -> List[str]:
     """Obter versões instaladas de um pacote de desenvolvimento."""
-    installed_versions = []
-    
-    try:
-        if package_id == "dotnet":
-            # Verificar versões instaladas do .NET
-            result = subprocess.run(
-                "dotnet --list-runtimes",
-                shell=True,
-                capture_output=True,
-                text=True,
-                timeout=10
-            )
-            
-            if result.returncode == 0:
-                # Extrair versões dos runtimes
-                for line in result.stdout.split('\n'):
-                    if 'Microsoft.NETCore.App' in line:
-                        match = re.search(r'(\d+\.\d+)\.\d+', line)
-                        if match:
-                            version = match.group(1)
-                            if version not in installed_versions:
-                                installed_versions.append(version)
-        
-        elif package_id == "nodejs":
-            # Verificar versões instaladas do Node.js via NVM
-            result = subprocess.run(
-                "bash -c 'source ~/.nvm/nvm.sh && nvm list'",
-                shell=True,
-                capture_output=True,
-                text=True,
-                timeout=10
-            )
-            
-            if result.returncode == 0:
-                for line in result.stdout.split('\n'):
-                    line = line.strip()
-                    # Procurar apenas por linhas que começam com 'v' ou '->' seguido de 'v'
-                    # Ignorar linhas de 'lts/*' que duplicam as versões
-                    if line.startswith('v') or (line.startswith('->') and 'v' in line):
-                        match = re.search(r'v(\d+)', line)
-                        if match:
-                            major_version = match.group(1)
-                            if major_version not in installed_versions and major_version.isdigit():
-                                installed_versions.append(major_version)
-        
-        elif package_id == "php":
-            # Verificar versões instaladas do PHP
-            result = subprocess.run(
-                "dpkg -l | grep '^ii.*php[0-9]'",
-                shell=True,
-                capture_output=True,
-                text=True,
-                timeout=10
-            )
-            
-            if result.returncode == 0:
-                for line in result.stdout.split('\n'):
-                    # Procurar por padrões como "php8.1"
-                    match = re.search(r'php(\d+\.\d+)', line)
-                    if match:
-                        version = match.group(1)
-                        if version not in installed_versions:
-                            installed_versions.append(version)
-    
-    except Exception as e:
-        print(f"Erro ao obter versões instaladas para {package_id}: {e}")
-    
-    return sorted(installed_versions)
+    return list(runtime_inventory.get(package_id)["installed"])
 
 def get_default_version(package_id: str) -> Optional[str]:
     """Obter a versão padrão de um pacote de desenvolvimento."""
-    try:
-        if package_id == "dotnet":
-            result = subprocess.run(
-                "dotnet --version",
-                shell=True,
-                capture_output=True,
-                text=True,
-                timeout=10
-            )
-            
-            if result.returncode == 0:
-                version = result.stdout.strip()
-                # Extrair versão principal (ex: "8.0.100" -> "8.0")
-                match = re.search(r'(\d+\.\d+)', version)
-                if match:
-                    return match.group(1)
-        
-        elif package_id == "nodejs":
-            result = subprocess.run(
-                "bash -c 'source ~/.nvm/nvm.sh && nvm current'",
-                shell=True,
-                capture_output=True,
-                text=True,
-                timeout=10
-            )
-            
-            if result.returncode == 0:
-                version = result.stdout.strip()
-                # Remover o "v" do início se presente e extrair versão principal
-                if version.startswith('v'):
-                    version = version[1:]
-                # Extrair apenas a versão principal (ex: "20.19.4" -> "20")
-                match = re.search(r'^(\d+)', version)
-                if match:
-                    return match.group(1)
-                return version
-        
-        elif package_id == "php":
-            result = subprocess.run(
-                "php --version",
-                shell=True,
-                capture_output=True,
-                text=True,
-                timeout=10
-            )
-            
-            if result.returncode == 0:
-                # Extrair versão principal (ex: "PHP 8.1.2" -> "8.1")
-                match = re.search(r'PHP (\d+\.\d+)', result.stdout)
-                if match:
-                    return match.group(1)
-    
-    except Exception as e:
-        print(f"Erro ao obter versão padrão para {package_id}: {e}")
-    
-    return None
+    return runtime_inventory.get(package_id)["default"]
 
-# Arquivo para simular estado de pacotes instalados
-PACKAGES_STATE_FILE = Path("/tmp/packages_state.json")
-
-def load_packages_state() -> Dict[str, Dict[str, Any]]:
-    """Carregar estado dos pacotes de um arquivo JSON."""
-    if PACKAGES_STATE_FILE.exists():
-        try:
-            with open(PACKAGES_STATE_FILE, 'r') as f:
-                return json.load(f)
-        except:
-            pass
-    
+def _default_packages_state() -> Dict[str, Dict[str, Any]]:
     # Estado inicial - alguns pacotes já "instalados"
     return {
         "git": {"installed": True, "version": "2.34.1"},
@@ -164,18 +39,20 @@ def load_packages_state() -> Dict[str, Dict[str, Any]]:
         "php": {"installed": True, "version": "8.1.2"}
     }
 
+# Estado em memória; gravações agrupadas e atômicas em PACKAGES_STATE_FILE
+packages_state = JsonStateStore(PACKAGES_STATE_FILE, defaults=_default_packages_state)
+
+def load_packages_state() -> Dict[str, Dict[str, Any]]:
+    """Carregar estado dos pacotes (cópia do estado em memória)."""
+    return packages_state.snapshot()
+
 def save_packages_state(state: Dict[str, Dict[str, Any]]):
-    """Salvar estado dos pacotes em um arquivo JSON."""
-    try:
-        with open(PACKAGES_STATE_FILE, 'w') as f:
-            json.dump(state, f)
-    except Exception as e:
-        print(f"Erro ao salvar estado dos pacotes: {e}")
+    """Salvar estado dos pacotes (gravação em background, atômica)."""
+    packages_state.replace(state)
 
 def get_package_state(package_id: str) -> Dict[str, Any]:
     """Obter estado de um pacote específico."""
-    state = load_packages_state()
-    return state.get(package_id, {"installed": False, "version": None})
+    return packages_state.get(package_id, {"installed": False, "version": None})
 
 # Lista de pacotes essenciais com suas informações
 ESSENTIAL_PACKAGES = {
@@ -380,54 +257,22 @@ CATEGORIES = {
 }
 
 def check_package_installed(package_name: str) -> tuple[bool, str]:
-    """Verificar se um pacote está instalado."""
+    """Verificar se um pacote está instalado (índice do /var/lib/dpkg/status)."""
     try:
         # Usar o nome real do pacote
         real_package = ESSENTIAL_PACKAGES.get(package_name, {}).get("realPackage", package_name)
-        
-        result = subprocess.run(
-            f"dpkg -l | grep -E '^ii.*{real_package}'",
-            shell=True,
-            capture_output=True,
-            text=True,
-            timeout=5
-        )
-        
-        if result.returncode == 0 and result.stdout.strip():
-            # Extrair versão da saída do dpkg
-            lines = result.stdout.strip().split('\n')
-            if lines:
-                parts = lines[0].split()
-                if len(parts) >= 3:
-                    version = parts[2]
-                    return True, version
-            return True, "installed"
-        
-        return False, ""
+        return dpkg_status.is_installed(real_package)
     except Exception:
         return False, ""
 
 def get_available_version(package_name: str) -> str:
-    """Obter versão disponível de um pacote."""
+    """Obter versão disponível (candidata) de um pacote."""
     try:
         # Usar o nome real do pacote
         real_package = ESSENTIAL_PACKAGES.get(package_name, {}).get("realPackage", package_name)
-        
-        result = subprocess.run(
-            f"apt-cache policy {real_package} | grep Candidate",
-            shell=True,
-            capture_output=True,
-            text=True,
-            timeout=5
-        )
-        
-        if result.returncode == 0 and result.stdout:
-            parts = result.stdout.split()
-            if len(parts) >= 2:
-                return parts[1]
+        return apt_policy.get(real_package)["candidate"] or "latest"
     except Exception:
-        pass
-    return "latest"
+        return "latest"
 
 def has_updates_available(package_name: str) -> bool:
     """Verificar se há atualizações disponíveis para um pacote."""
@@ -440,55 +285,7 @@ def has_updates_available(package_name: str) -> bool:
         
         # Usar o nome real do pacote
         real_package = pkg_info.get("realPackage", package_name)
-        
-        # Primeiro, verificar se o pacote está na lista de upgradable
-        result = subprocess.run(
-            "apt list --upgradable 2>/dev/null",
-            shell=True,
-            capture_output=True,
-            text=True,
-            timeout=10
-        )
-        
-        if result.returncode == 0 and result.stdout:
-            # Verificar se o pacote real está na lista de upgradable
-            upgradable_lines = result.stdout.split('\n')
-            for line in upgradable_lines:
-                if line.startswith(f"{real_package}/"):
-                    return True
-        
-        # Verificação adicional: comparar versão instalada com candidate usando apt-cache policy
-        policy_result = subprocess.run(
-            f"apt-cache policy {real_package}",
-            shell=True,
-            capture_output=True,
-            text=True,
-            timeout=5
-        )
-        
-        if policy_result.returncode == 0 and policy_result.stdout:
-            lines = policy_result.stdout.split('\n')
-            installed_version = None
-            candidate_version = None
-            
-            for line in lines:
-                line = line.strip()
-                if line.startswith('Installed:'):
-                    installed_version = line.split(':', 1)[1].strip()
-                elif line.startswith('Candidate:'):
-                    candidate_version = line.split(':', 1)[1].strip()
-            
-            # Debug: log das versões encontradas
-            print(f"DEBUG - {package_name}: Installed={installed_version}, Candidate={candidate_version}")
-            
-            # Se as versões são diferentes e candidate não é '(none)', há atualizações
-            if (installed_version and candidate_version and 
-                installed_version != candidate_version and 
-                candidate_version != '(none)' and
-                installed_version != '(none)'):
-                return True
-        
-        return False
+        return apt_policy.get(real_package)["upgradable"]
     except Exception as e:
         print(f"Erro ao verificar atualizações para {package_name}: {e}")
         return False
@@ -510,6 +307,11 @@ async def get_packages(
             CATEGORIES[cat_id]["count"] = sum(1 for pkg in ESSENTIAL_PACKAGES.values() if pkg["category"] == cat_id)
         
         packages = []
+        # Candidatos/atualizações de todo o catálogo em uma única chamada ao apt-cache
+        policies = await asyncio.to_thread(
+            apt_policy.resolve,
+            [pkg.get("realPackage", pid) for pid, pkg in ESSENTIAL_PACKAGES.items()]
+        )
         
         for pkg_id, pkg_info in ESSENTIAL_PACKAGES.items():
             # Aplicar filtros
@@ -521,50 +323,13 @@ async def get_packages(
             
             # Verificar estado real do pacote no container
             real_package = pkg_info.get("realPackage", pkg_id)
-            try:
-                result = subprocess.run(
-                    f"dpkg -l | grep -E '^ii.*{real_package}'",
-                    shell=True,
-                    capture_output=True,
-                    text=True,
-                    timeout=5
-                )
-                
-                if result.returncode == 0 and result.stdout.strip():
-                    # Extrair versão real
-                    lines = result.stdout.strip().split('\n')
-                    if lines:
-                        parts = lines[0].split()
-                        version = parts[2] if len(parts) >= 3 else "installed"
-                    else:
-                        version = "installed"
-                    installed = True
-                else:
-                    installed = False
-                    version = None
-                    
-            except Exception:
-                # Em caso de erro, assumir não instalado
-                installed = False
-                version = None
+            installed, version = check_package_installed(pkg_id)
+            version = version if installed else None
             
             # Verificar versão disponível e atualizações
-            try:
-                available_result = subprocess.run(
-                    f"apt-cache policy {real_package} | grep Candidate | awk '{{print $2}}'",
-                    shell=True,
-                    capture_output=True,
-                    text=True,
-                    timeout=5
-                )
-                available_version = available_result.stdout.strip() if available_result.returncode == 0 else "latest"
-                
-                # Verificar se há atualizações disponíveis
-                has_updates = has_updates_available(pkg_id) if installed else False
-                
-            except:
-                available_version = "latest"
-                has_updates = False
+            policy = policies[real_package]
+            available_version = policy["candidate"] or "latest"
+            has_updates = installed and policy["upgradable"] and not pkg_info.get("multiVersion", False)
             
             package = {
                 **pkg_info,
@@ -644,9 +409,52 @@ async def get_package_details(package_id: str, current_user: str = Depends(verif
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Erro ao obter detalhes do pacote: {str(e)}")
 
+async def _apt_job_result(action: str, steps: List[Any], package_id: str, wait: bool,
+                          done_message: str, error_label: str) -> Dict[str, Any]:
+    """Enfileira o job do apt; com wait=True devolve o resultado final (sem bloquear o event loop)."""
+    job = apt_jobs.submit(action, steps, packages=[package_id], label=f"{action} {package_id}")
+    if not wait:
+        return {"success": True, "message": f"Operação em {package_id} enfileirada", "jobId": job["id"]}
+    job = await apt_jobs.wait(job["id"])
+    if job["status"] == "completed":
+        print(done_message)
+        return {"success": True, "message": done_message, "jobId": job["id"], "logs": job["output"]}
+    print(f"Erro ao {error_label} {package_id}: {job['error']}")
+    return {
+        "success": False,
+        "message": f"Erro ao {error_label} {package_id}: {job['error']}",
+        "jobId": job["id"],
+        "logs": job["output"]
+    }
+
+def _prepare_install_steps(package_ids: List[str]) -> List[Any]:
+    """Passos antes da instalação: apt-get update só se as listas estiverem velhas e repositórios extras."""
+    steps: List[Any] = []
+    # Falhas aqui só geram aviso (ex.: um repositório fora do ar)
+    if "dotnet" in package_ids or lists_stale(settings.apt_lists_max_age):
+        steps.append({"argv": ["apt-get", "update"], "check": False})
+    
+    # Para .NET, adicionar repositório Microsoft primeiro
+    if "dotnet" in package_ids:
+        deb = "/tmp/packages-microsoft-prod.deb"
+        steps += [
+            {"argv": ["apt-get", "install", "-y", "wget", "apt-transport-https"], "check": False},
+            {"argv": ["wget", "https://packages.microsoft.com/config/debian/11/packages-microsoft-prod.deb", "-O", deb], "check": False},
+            {"argv": ["dpkg", "-i", deb], "check": False},
+            {"argv": ["apt-get", "update"], "check": False},
+        ]
+    return steps
+
+# "E: Unable to locate package x" / "E: Package 'x' has no installation candidate"
+_UNAVAILABLE_RE = re.compile(r"^E: (?:Unable to locate package (\S+)|Package '([^']+)' has no installation candidate)", re.M)
+
 @router.post("/install")
-async def install_package(request: dict, current_user: str = Depends(verify_token)):
-    """Instalar um pacote no container (instalação real)."""
+async def install_package(
+    request: dict,
+    wait: bool = Query(True, description="Aguarda o fim do job (false: retorna jobId na hora)"),
+    current_user: str = Depends(verify_token)
+):
+    """Instalar um pacote no container (instalação real, via fila de jobs do apt)."""
     try:
         package_id = request.get("packageId")
         if not package_id or package_id not in ESSENTIAL_PACKAGES:
@@ -656,102 +464,119 @@ async def install_package(request: dict, current_user: str = Depends(verify_toke
         real_package = pkg_info.get("realPackage", package_id)
         
         # Verificar se já está instalado
-        try:
-            result = subprocess.run(
-                f"dpkg -l | grep -E '^ii.*{real_package}'",
-                shell=True,
-                capture_output=True,
-                text=True,
-                timeout=5
-            )
-            if result.returncode == 0 and result.stdout.strip():
-                return {"success": True, "message": f"Pacote {package_id} já está instalado"}
-        except:
-            pass
+        if check_package_installed(package_id)[0]:
+            return {"success": True, "message": f"Pacote {package_id} já está instalado"}
         
         print(f"Instalando pacote: {package_id} (pacote real: {real_package})")
         
-        # Instalação real no container
-        try:
-            # Atualizar repositórios primeiro
-            update_result = subprocess.run(
-                "apt-get update",
-                shell=True,
-                capture_output=True,
-                text=True,
-                timeout=60
-            )
-            
-            if update_result.returncode != 0:
-                print(f"Aviso: apt-get update falhou: {update_result.stderr}")
-            
-            # Para .NET, adicionar repositório Microsoft primeiro
-            if package_id == "dotnet":
-                # Instalar dependências necessárias
-                subprocess.run(
-                    "apt-get install -y wget apt-transport-https",
-                    shell=True,
-                    capture_output=True,
-                    text=True,
-                    timeout=60
-                )
-                
-                # Adicionar chave e repositório Microsoft
-                subprocess.run(
-                    "wget https://packages.microsoft.com/config/debian/11/packages-microsoft-prod.deb -O packages-microsoft-prod.deb",
-                    shell=True,
-                    capture_output=True,
-                    text=True,
-                    timeout=60
-                )
-                
-                subprocess.run(
-                    "dpkg -i packages-microsoft-prod.deb",
-                    shell=True,
-                    capture_output=True,
-                    text=True,
-                    timeout=30
-                )
-                
-                subprocess.run(
-                    "apt-get update",
-                    shell=True,
-                    capture_output=True,
-                    text=True,
-                    timeout=60
-                )
-            
-            # Instalar o pacote
-            install_result = subprocess.run(
-                f"DEBIAN_FRONTEND=noninteractive apt-get install -y {real_package}",
-                shell=True,
-                capture_output=True,
-                text=True,
-                timeout=300  # 5 minutos
-            )
-            
-            if install_result.returncode == 0:
-                print(f"Pacote {package_id} instalado com sucesso!")
-                return {"success": True, "message": f"Pacote {package_id} instalado com sucesso!"}
-            else:
-                error_msg = install_result.stderr or "Erro desconhecido na instalação"
-                print(f"Erro na instalação de {package_id}: {error_msg}")
-                return {"success": False, "message": f"Erro ao instalar {package_id}: {error_msg}"}
-                
-        except subprocess.TimeoutExpired:
-            raise HTTPException(status_code=500, detail="Timeout na instalação do pacote")
-        except Exception as e:
-            print(f"Exceção durante instalação: {str(e)}")
-            raise HTTPException(status_code=500, detail=f"Erro ao instalar pacote: {str(e)}")
+        # Repositórios (se as listas estiverem velhas) e depois o pacote
+        steps = _prepare_install_steps([package_id])
+        steps.append(apt_command("install", [real_package]))
+        
+        return await _apt_job_result(
+            "install", steps, package_id, wait,
+            done_message=f"Pacote {package_id} instalado com sucesso!",
+            error_label="instalar"
+        )
             
     except HTTPException:
         raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Erro ao instalar pacote: {str(e)}")
 
+@router.post("/install-bulk")
+async def install_packages_bulk(
+    request: dict,
+    wait: bool = Query(True, description="Aguarda o fim do job (false: retorna jobId na hora)"),
+    current_user: str = Depends(verify_token)
+):
+    """Instalar vários pacotes do catálogo em uma única transação do apt.
+    
+    Um único job: apt-get update (só se as listas estiverem velhas), download
+    de todos os .deb (--download-only) e um apt-get install com todos os
+    pacotes. Retorna o resultado de cada pacote.
+    """
+    try:
+        package_ids = request.get("packageIds")
+        if not isinstance(package_ids, list) or not package_ids:
+            raise HTTPException(status_code=400, detail="Nenhum pacote informado")
+        
+        results: Dict[str, Dict[str, Any]] = {}
+        pending: Dict[str, str] = {}
+        for package_id in dict.fromkeys(package_ids):
+            if package_id not in ESSENTIAL_PACKAGES:
+                results[package_id] = {"packageId": package_id, "package": None, "status": "invalid", "message": "Pacote inválido"}
+                continue
+            real_package = ESSENTIAL_PACKAGES[package_id].get("realPackage", package_id)
+            installed, version = check_package_installed(package_id)
+            if installed:
+                results[package_id] = {"packageId": package_id, "package": real_package, "status": "already_installed", "version": version}
+            else:
+                pending[package_id] = real_package
+                results[package_id] = {"packageId": package_id, "package": real_package, "status": "pending"}
+        
+        if not pending:
+            return {
+                "success": all(r["status"] != "invalid" for r in results.values()),
+                "message": "Nenhum pacote a instalar",
+                "results": list(results.values())
+            }
+        
+        real_packages = list(dict.fromkeys(pending.values()))
+        print(f"Instalando pacotes: {', '.join(pending)} (pacotes reais: {', '.join(real_packages)})")
+        
+        steps = _prepare_install_steps(list(pending))
+        steps.append(apt_command("install", real_packages, download_only=True))
+        steps.append(apt_command("install", real_packages))
+        job = apt_jobs.submit("install", steps, packages=real_packages, label=f"install {' '.join(pending)}")
+        if not wait:
+            return {
+                "success": True,
+                "message": f"Instalação de {len(pending)} pacote(s) enfileirada",
+                "jobId": job["id"],
+                "results": list(results.values())
+            }
+        
+        job = await apt_jobs.wait(job["id"])
+        unavailable = {a or b for a, b in _UNAVAILABLE_RE.findall(apt_jobs.output(job["id"]))}
+        for package_id, real_package in pending.items():
+            installed, version = check_package_installed(package_id)
+            if installed:
+                results[package_id].update(status="installed", version=version)
+            elif real_package in unavailable:
+                results[package_id].update(status="unavailable", message=f"Pacote {real_package} não encontrado nos repositórios")
+            else:
+                results[package_id].update(status="failed", message=job["error"] or "Pacote não foi instalado")
+        
+        ok = all(r["status"] in ("installed", "already_installed") for r in results.values())
+        installed_count = sum(1 for r in results.values() if r["status"] == "installed")
+        message = (
+            f"{installed_count} pacote(s) instalado(s) com sucesso!" if ok
+            else f"Erro ao instalar pacotes: {job['error'] or 'alguns pacotes não foram instalados'}"
+        )
+        print(message)
+        return {
+            "success": ok,
+            "message": message,
+            "jobId": job["id"],
+            "results": list(results.values()),
+            "logs": job["output"]
+        }
+    
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Erro ao instalar pacotes: {str(e)}")
+
 @router.delete("/{package_id}")
-async def uninstall_package(package_id: str, current_user: str = Depends(verify_token)):
-    """Remover um pacote do container (remoção real)."""
+async def uninstall_package(
+    package_id: str,
+    wait: bool = Query(True, description="Aguarda o fim do job (false: retorna jobId na hora)"),
+    current_user: str = Depends(verify_token)
+):
+    """Remover um pacote do container (remoção real, via fila de jobs do apt)."""
     try:
         if package_id not in ESSENTIAL_PACKAGES:
             raise HTTPException(status_code=404, detail="Pacote não encontrado")
@@ -761,29 +586,11 @@ async def uninstall_package(package_id: str, current_user: str = Depends(verify_
         
         print(f"Removendo pacote: {package_id} (pacote real: {real_package})")
         
-        # Remoção real no container
-        try:
-            remove_result = subprocess.run(
-                f"DEBIAN_FRONTEND=noninteractive apt-get remove -y {real_package}",
-                shell=True,
-                capture_output=True,
-                text=True,
-                timeout=120  # 2 minutos
-            )
-            
-            if remove_result.returncode == 0:
-                print(f"Pacote {package_id} removido com sucesso!")
-                return {"success": True, "message": f"Pacote {package_id} removido com sucesso!"}
-            else:
-                error_msg = remove_result.stderr or "Erro desconhecido na remoção"
-                print(f"Erro na remoção de {package_id}: {error_msg}")
-                return {"success": False, "message": f"Erro ao remover {package_id}: {error_msg}"}
-                
-        except subprocess.TimeoutExpired:
-            raise HTTPException(status_code=500, detail="Timeout na remoção do pacote")
-        except Exception as e:
-            print(f"Exceção durante remoção: {str(e)}")
-            raise HTTPException(status_code=500, detail=f"Erro ao remover pacote: {str(e)}")
+        return await _apt_job_result(
+            "remove", [apt_command("remove", [real_package])], package_id, wait,
+            done_message=f"Pacote {package_id} removido com sucesso!",
+            error_label="remover"
+        )
             
     except HTTPException:
         raise
@@ -791,8 +598,12 @@ async def uninstall_package(package_id: str, current_user: str = Depends(verify_
         raise HTTPException(status_code=500, detail=f"Erro ao remover pacote: {str(e)}")
 
 @router.post("/{package_id}/update")
-async def update_package(package_id: str, current_user: str = Depends(verify_token)):
-    """Atualizar um pacote no container (atualização real)."""
+async def update_package(
+    package_id: str,
+    wait: bool = Query(True, description="Aguarda o fim do job (false: retorna jobId na hora)"),
+    current_user: str = Depends(verify_token)
+):
+    """Atualizar um pacote no container (atualização real, via fila de jobs do apt)."""
     try:
         if package_id not in ESSENTIAL_PACKAGES:
             raise HTTPException(status_code=404, detail="Pacote não encontrado")
@@ -801,18 +612,8 @@ async def update_package(package_id: str, current_user: str = Depends(verify_tok
         real_package = pkg_info.get("realPackage", package_id)
         
         # Verificar se está instalado
-        try:
-            result = subprocess.run(
-                f"dpkg -l | grep -E '^ii.*{real_package}'",
-                shell=True,
-                capture_output=True,
-                text=True,
-                timeout=5
-            )
-            if result.returncode != 0 or not result.stdout.strip():
-                raise HTTPException(status_code=400, detail="Pacote não está instalado")
-        except subprocess.TimeoutExpired:
-            raise HTTPException(status_code=400, detail="Erro ao verificar status do pacote")
+        if not check_package_installed(package_id)[0]:
+            raise HTTPException(status_code=400, detail="Pacote não está instalado")
         
         # Verificar se há atualizações disponíveis antes de tentar atualizar
         if not has_updates_available(package_id):
@@ -820,43 +621,17 @@ async def update_package(package_id: str, current_user: str = Depends(verify_tok
         
         print(f"Atualizando pacote: {package_id} (pacote real: {real_package})")
         
-        # Atualização real no container
-        try:
-            # Atualizar repositórios primeiro
-            update_result = subprocess.run(
-                "apt-get update",
-                shell=True,
-                capture_output=True,
-                text=True,
-                timeout=60
-            )
-            
-            # Verificar novamente se há atualizações após update do repositório
-            if not has_updates_available(package_id):
-                return {"success": True, "message": f"Pacote {package_id} já está na versão mais recente"}
-            
-            # Atualizar o pacote específico
-            upgrade_result = subprocess.run(
-                f"DEBIAN_FRONTEND=noninteractive apt-get install --only-upgrade -y {real_package}",
-                shell=True,
-                capture_output=True,
-                text=True,
-                timeout=300  # 5 minutos
-            )
-            
-            if upgrade_result.returncode == 0:
-                print(f"Pacote {package_id} atualizado com sucesso!")
-                return {"success": True, "message": f"Pacote {package_id} atualizado com sucesso!"}
-            else:
-                error_msg = upgrade_result.stderr or "Erro desconhecido na atualização"
-                print(f"Erro na atualização de {package_id}: {error_msg}")
-                return {"success": False, "message": f"Erro ao atualizar {package_id}: {error_msg}"}
-                
-        except subprocess.TimeoutExpired:
-            raise HTTPException(status_code=500, detail="Timeout na atualização do pacote")
-        except Exception as e:
-            print(f"Exceção durante atualização: {str(e)}")
-            raise HTTPException(status_code=500, detail=f"Erro ao atualizar pacote: {str(e)}")
+        # Atualizar repositórios e depois só o pacote (--only-upgrade não instala se não houver versão nova)
+        steps: List[Any] = [
+            {"argv": ["apt-get", "update"], "check": False},
+            apt_command("upgrade", [real_package]),
+        ]
+        
+        return await _apt_job_result(
+            "upgrade", steps, package_id, wait,
+            done_message=f"Pacote {package_id} atualizado com sucesso!",
+            error_label="atualizar"
+        )
             
     except HTTPException:
         raise
@@ -875,8 +650,10 @@ async def get_package_versions(package_id: str, current_user: str = Depends(veri
         if not pkg_info.get("multiVersion", False):
             raise HTTPException(status_code=400, detail="Este pacote não suporta gerenciamento de múltiplas versões")
         
-        installed_versions = get_installed_versions(package_id)
-        default_version = get_default_version(package_id)
+        # Leitura do sistema de arquivos (CLI só como fallback): fora do event loop
+        runtime = await asyncio.to_thread(runtime_inventory.get, package_id)
+        installed_versions = list(runtime["installed"])
+        default_version = runtime["default"]
         available_versions = pkg_info.get("availableVersions", [])
         version_manager = pkg_info.get("versionManager", "manual")
         
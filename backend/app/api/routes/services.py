@@ -1,9 +1,12 @@
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Query
 from typing import List, Dict, Any
+import asyncio
 import subprocess
 import re
 import json
-from app.api.routes.auth import verify_token
+from app.api.routes.auth import verify_token, verify_token_or_query
+from app.core import logtail, procfs
+from app.core.sse import sse_response, sse_stream
 
 router = APIRouter()
 
@@ -51,46 +54,31 @@ async def get_services(current_user: str = Depends(verify_token)):
         except (subprocess.TimeoutExpired, subprocess.CalledProcessError):
             pass
         
-        # Em seguida, tentar usar ps para ver processos em execução
+        # Em seguida, varrer /proc (uma leitura por PID, sem fork de 'ps aux')
         try:
-            result = subprocess.run(
-                "ps aux --no-headers",
-                shell=True,
-                capture_output=True,
-                text=True,
-                timeout=5
-            )
-            
-            if result.returncode == 0:
-                lines = result.stdout.strip().split('\n')
-                service_names = set()
-                
-                for line in lines:
-                    parts = line.split()
-                    if len(parts) >= 11:
-                        command = parts[10]
-                        # Extrair nome do processo
-                        if '/' in command:
-                            process_name = command.split('/')[-1]
-                        else:
-                            process_name = command
-                        
-                        # Filtrar processos comuns de sistema
-                        if process_name in ['python', 'uvicorn', 'nginx', 'systemd', 'bash', 'sh']:
-                            if process_name not in service_names:
-                                service_names.add(process_name)
-                                services.append({
-                                    "name": f"{process_name}.service",
-                                    "load_state": "loaded",
-                                    "active_state": "active",
-                                    "sub_state": "running",
-                                    "description": f"Running {process_name} process",
-                                    "status": "online",
-                                    "enabled": True,
-                                    "pid": int(parts[1]) if parts[1].isdigit() else None,
-                                    "memory_usage": parts[5] if len(parts) > 5 else "0",
-                                    "uptime": "unknown"
-                                })
+            service_names = set()
+            snapshot = procfs.scan(with_uid=False) if procfs.available() else None
+            if snapshot is not None:
+                for i in range(len(snapshot)):
+                    process_name = snapshot.comm[i]
+
+                    # Filtrar processos comuns de sistema
+                    if process_name in ['python', 'uvicorn', 'nginx', 'systemd', 'bash', 'sh']:
+                        if process_name not in service_names:
+                            service_names.add(process_name)
+                            services.append({
+                                "name": f"{process_name}.service",
+                                "load_state": "loaded",
+                                "active_state": "active",
+                                "sub_state": "running",
+                                "description": f"Running {process_name} process",
+                                "status": "online",
+                                "enabled": True,
+                                "pid": snapshot.pid[i],
+                                # RSS em KB, como a coluna do 'ps aux'
+                                "memory_usage": str(snapshot.rss[i] // 1024),
+                                "uptime": "unknown"
+                            })
         except Exception as e:
             print(f"Error getting processes: {e}")
         
@@ -484,29 +472,31 @@ async def disable_service(service_name: str, current_user: str = Depends(verify_
 
 
 @router.get("/{service_name}/logs")
-async def get_service_logs(service_name: str, lines: int = 100, current_user: str = Depends(verify_token)):
-    """Obter logs de um serviço."""
+async def get_service_logs(
+    service_name: str,
+    lines: int = Query(100, ge=0, le=10000),
+    follow: bool = Query(False),
+    current_user: str = Depends(verify_token_or_query)
+):
+    """Obter logs de um serviço; com follow=true acompanha o journal via SSE."""
+    if follow:
+        return sse_response(sse_stream(logtail.follow_journal(service_name, lines), event="log"))
     try:
-        result = subprocess.run(
-            f"journalctl -u {service_name} -n {lines} --no-pager",
-            shell=True,
-            capture_output=True,
-            text=True
-        )
+        logs = await asyncio.to_thread(logtail.journal_tail, service_name, lines)
         
-        if result.returncode != 0:
+        if logs is None:
             raise HTTPException(
                 status_code=404, 
                 detail=f"Serviço {service_name} não encontrado ou sem logs"
             )
         
-        logs = result.stdout.strip().split('\n') if result.stdout.strip() else []
-        
         return {
             "service": service_name,
             "lines": lines,
             "logs": logs
         }
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Erro ao obter logs: {str(e)}")
 
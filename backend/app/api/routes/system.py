@@ -1,47 +1,29 @@
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Query, WebSocket, WebSocketDisconnect
 from typing import Dict, Any, List, Optional, Tuple
 import psutil
-import platform
 import subprocess
-import json
 from datetime import datetime
 import re
 import os
 import shutil
-import glob
-from app.api.routes.auth import verify_token
+from app.api.routes.auth import verify_token, verify_token_or_query, decode_token
+from app.core.telemetry import sampler
+from app.core.metrics_history import history
+from app.core.hardware import inventory
+from app.core.nvidia import gpu_collector, which_nvidia_smi as _which_nvidia_smi, nvidia_env
+from app.core.metrics_stream import broadcaster
+from app.core.sse import sse_response, sse_event, sse_stream, job_stream, KEEPALIVE
+from app.core.processes import process_table
+from app.core import logtail
+from app.core.disks import disk_usage
+from app.core.bench_store import bench_store
+from app.core import bench_cpu, bench_disk, bench_memory, bench_network
+from app.core.bench_scheduler import bench_scheduler, JobContext, FINISHED
 import time
-import tempfile
-import hashlib
-import multiprocessing as mp
-import threading
-import uuid
-import threading
-import uuid
+import asyncio
 from pathlib import Path
 
 router = APIRouter()
-def _which_nvidia_smi() -> Optional[str]:
-    """Locate the nvidia-smi binary even if not in PATH (systemd envs)."""
-    # Try PATH first
-    exe = shutil.which("nvidia-smi")
-    if exe:
-        return exe
-    # Common absolute locations
-    candidates = [
-        "/usr/bin/nvidia-smi",
-        "/usr/local/bin/nvidia-smi",
-        "/bin/nvidia-smi",
-        "/usr/local/nvidia/bin/nvidia-smi",
-    ]
-    for c in candidates:
-        if os.path.isfile(c) and os.access(c, os.X_OK):
-            return c
-    # Some distros place it under versioned nvidia dirs
-    for path in glob.glob("/usr/lib/nvidia-*/bin/nvidia-smi"):
-        if os.path.isfile(path) and os.access(path, os.X_OK):
-            return path
-    return None
 
 
 def _run_nvidia_smi(args: List[str], timeout: int = 10) -> Optional[subprocess.CompletedProcess]:
@@ -49,11 +31,8 @@ def _run_nvidia_smi(args: List[str], timeout: int = 10) -> Optional[subprocess.C
     exe = _which_nvidia_smi()
     if not exe:
         return None
-    env = os.environ.copy()
-    extra_paths = [os.path.dirname(exe), "/usr/bin", "/usr/local/bin", "/bin", "/usr/local/nvidia/bin"]
-    env["PATH"] = os.pathsep.join([p for p in extra_paths + [env.get("PATH", "")] if p])
     try:
-        return subprocess.run([exe] + args, capture_output=True, text=True, timeout=timeout, env=env)
+        return subprocess.run([exe] + args, capture_output=True, text=True, timeout=timeout, env=nvidia_env(exe))
     except (subprocess.TimeoutExpired, FileNotFoundError):
         return None
 
@@ -76,9 +55,14 @@ def _nvidia_driver_cuda() -> Dict[str, Optional[str]]:
 
 def get_gpu_info() -> List[Dict[str, Any]]:
     """Obter informações da GPU se disponível (NVIDIA e genérico)."""
+    # Coletor contínuo (nvidia-smi -lms) quando tem dados recentes
+    streamed = gpu_collector.latest()
+    if streamed:
+        return streamed
+
     gpus: List[Dict[str, Any]] = []
 
-    # NVIDIA via nvidia-smi
+    # Fallback: NVIDIA via nvidia-smi (execução única)
     result = _run_nvidia_smi([
         "--query-gpu=name,pci.bus_id,memory.total,memory.used,memory.free,temperature.gpu,utilization.gpu",
         "--format=csv,noheader,nounits",
@@ -132,119 +116,18 @@ def get_gpu_info() -> List[Dict[str, Any]]:
                     }
                 )
 
-    # Se não encontrou GPUs NVIDIA, tentar detectar outras GPUs via lspci
+    # Se não encontrou GPUs NVIDIA, usar a lista PCI do inventário (lspci roda só na coleta)
     if not gpus:
-        try:
-            result = subprocess.run(["lspci", "-nn"], capture_output=True, text=True, timeout=10)
-            if result.returncode == 0:
-                for line in result.stdout.splitlines():
-                    if any(word in line.lower() for word in ["vga", "display", "3d"]):
-                        gpu_match = re.search(r":\s*(.+?)\s*\[", line)
-                        if gpu_match:
-                            gpu_name = gpu_match.group(1).strip()
-                            lower = gpu_name.lower()
-                            gpu_type = "Integrated"
-                            if any(v in lower for v in ["nvidia", "geforce", "quadro"]):
-                                gpu_type = "NVIDIA"
-                            elif any(v in lower for v in ["amd", "radeon", "ati"]):
-                                gpu_type = "AMD"
-                            elif any(v in lower for v in ["intel", "uhd", "iris"]):
-                                gpu_type = "Intel"
-                            gpus.append(
-                                {
-                                    "type": gpu_type,
-                                    "name": gpu_name,
-                                    "memory_total": None,
-                                    "memory_used": None,
-                                    "memory_free": None,
-                                    "temperature": None,
-                                    "utilization": None,
-                                }
-                            )
-        except (subprocess.TimeoutExpired, FileNotFoundError):
-            pass
+        gpus = [dict(g) for g in inventory.get().get("pci_gpus", [])]
 
     return gpus
 
 
-def _lscpu_json() -> Optional[Dict[str, Any]]:
-    """Tenta obter 'lscpu -J' (JSON)."""
-    try:
-        result = subprocess.run(["lscpu", "-J"], capture_output=True, text=True, timeout=5)
-        if result.returncode == 0:
-            data = json.loads(result.stdout)
-            # Newer lscpu returns {"lscpu": [{"field":"...","data":"..."}, ...]}
-            return data
-    except (subprocess.TimeoutExpired, FileNotFoundError, json.JSONDecodeError):
-        return None
-    return None
-
+def get_temperatures(gpus: Optional[List[Dict[str, Any]]] = None) -> Dict[str, Any]:
+    """Coleta temperaturas de CPU/GPU/NVMe quando possível.
 
-def _cpuinfo_proc() -> Dict[str, Any]:
-    """Fallback via /proc/cpuinfo para sockets e modelos."""
-    sockets: Dict[str, str] = {}
-    try:
-        with open("/proc/cpuinfo", "r", encoding="utf-8", errors="ignore") as f:
-            phys_id = None
-            model_name = None
-            for line in f:
-                if line.startswith("physical id"):
-                    phys_id = line.split(":", 1)[1].strip()
-                elif line.startswith("model name") or line.startswith("Model name"):
-                    model_name = line.split(":", 1)[1].strip()
-                if phys_id is not None and model_name is not None:
-                    sockets[phys_id] = model_name
-                    phys_id = None
-                    model_name = None
-    except Exception:
-        pass
-    return {"sockets": sockets}
-
-
-def get_cpu_details() -> Dict[str, Any]:
-    """Detalhes de CPU: sockets, modelos, threads, etc."""
-    details: Dict[str, Any] = {
-        "cores_physical": psutil.cpu_count(logical=False),
-        "cores_logical": psutil.cpu_count(logical=True),
-    }
-    data = _lscpu_json()
-    def _get(field: str) -> Optional[str]:
-        if not data or "lscpu" not in data:
-            return None
-        for item in data["lscpu"]:
-            if item.get("field", "").strip().rstrip(":") == field:
-                return item.get("data")
-        return None
-    model_name = _get("Model name") or _get("Model Name")
-    sockets_str = _get("Socket(s)")
-    cores_per_socket = _get("Core(s) per socket")
-    threads_per_core = _get("Thread(s) per core")
-    if model_name:
-        details["model_name"] = model_name
-    if sockets_str:
-        try:
-            details["sockets"] = int(sockets_str)
-        except Exception:
-            details["sockets"] = None
-    if cores_per_socket:
-        try:
-            details["cores_per_socket"] = int(cores_per_socket)
-        except Exception:
-            pass
-    if threads_per_core:
-        try:
-            details["threads_per_core"] = int(threads_per_core)
-        except Exception:
-            pass
-    # Per-socket models via /proc/cpuinfo if available
-    sockets = _cpuinfo_proc().get("sockets", {})
-    if sockets:
-        details["models_per_socket"] = sockets
-    return details
-
-
-def get_temperatures() -> Dict[str, Any]:
-    """Coleta temperaturas de CPU/GPU/NVMe quando possível."""
+    'gpus' permite reaproveitar uma lista já obtida de get_gpu_info().
+    """
     temps: Dict[str, Any] = {"cpu": None, "cpu_package": None, "cpu_core_max": None, "nvme": [], "gpus": []}
     try:
         st = psutil.sensors_temperatures(fahrenheit=False)
@@ -266,7 +149,8 @@ def get_temperatures() -> Dict[str, Any]:
         pass
     # GPU temps from get_gpu_info()
     try:
-        gpus = get_gpu_info()
+        if gpus is None:
+            gpus = get_gpu_info()
         temps["gpus"] = [{"name": g.get("name"), "temperature": g.get("temperature")} for g in gpus]
     except Exception:
         pass
@@ -277,69 +161,71 @@ def get_temperatures() -> Dict[str, Any]:
 async def get_system_info(current_user: str = Depends(verify_token)):
     """Obter informações gerais do sistema."""
     try:
-        # Informações do sistema
-        uname = platform.uname()
-        boot_time = datetime.fromtimestamp(psutil.boot_time())
+        # Fatos estáticos (uname, CPU, boot) vêm do inventário em cache
+        hw = inventory.get()
+        uname = hw["uname"]
+        boot_ts = hw["boot_time"]
+        boot_time = datetime.fromtimestamp(boot_ts)
 
-        # CPU
-        cpu_percent = psutil.cpu_percent(interval=1)
-        cpu_details = get_cpu_details()
+        # CPU, memória e load vêm do snapshot do sampler (sem bloquear o event loop)
+        snap = sampler.latest()
+        cpu_percent = snap["cpu"]["percent_total"]
+        cpu_details = hw["cpu"]
 
         # Memória
-        memory = psutil.virtual_memory()
+        memory = snap["memory"]
 
         # Disco
         disk = psutil.disk_usage("/")
 
-        # Load average (se disponível)
-        try:
-            load_avg = psutil.getloadavg()
-        except Exception:
-            load_avg = [0.0, 0.0, 0.0]
+        # Load average
+        load_avg = snap["load_avg"]
 
         # Uptime
-        uptime_seconds = datetime.now().timestamp() - psutil.boot_time()
+        uptime_seconds = datetime.now().timestamp() - boot_ts
         days = int(uptime_seconds // 86400)
         hours = int((uptime_seconds % 86400) // 3600)
         minutes = int((uptime_seconds % 3600) // 60)
         uptime_formatted = f"{days}d {hours}h {minutes}m"
 
+        # Frequência atual (sysfs, sem subprocess) combinada com os limites em cache
+        try:
+            freq = psutil.cpu_freq()
+        except Exception:
+            freq = None
+        frequency = None
+        if freq:
+            limits = hw.get("cpu_freq_limits") or {}
+            frequency = {"current": freq.current, "min": limits.get("min", freq.min), "max": limits.get("max", freq.max)}
+
         # GPU e temperaturas
         gpu_info = get_gpu_info()
-        temperatures = get_temperatures()
+        temperatures = get_temperatures(gpu_info)
 
         return {
-            "hostname": uname.node,
-            "os_version": f"{uname.system} {uname.release}",
-            "kernel_version": uname.version,
-            "architecture": uname.machine,
+            "hostname": uname["node"],
+            "os_version": f"{uname['system']} {uname['release']}",
+            "kernel_version": uname["version"],
+            "architecture": uname["machine"],
             "uptime": uptime_formatted,
             "boot_time": boot_time.isoformat(),
             "cpu_usage": round(cpu_percent, 1),
-            "memory_usage": round(memory.percent, 1),
+            "memory_usage": round(memory["percent"], 1),
             "disk_usage": round((disk.used / disk.total) * 100, 1),
             "load_average": load_avg,
             # Informações detalhadas para compatibilidade
-            "system": uname.system,
-            "node": uname.node,
-            "release": uname.release,
-            "version": uname.version,
-            "machine": uname.machine,
-            "processor": uname.processor,
+            "system": uname["system"],
+            "node": uname["node"],
+            "release": uname["release"],
+            "version": uname["version"],
+            "machine": uname["machine"],
+            "processor": uname["processor"],
             "cpu": {
-                "cores_physical": psutil.cpu_count(logical=False),
-                "cores_logical": psutil.cpu_count(logical=True),
-                "frequency": psutil.cpu_freq()._asdict() if psutil.cpu_freq() else None,
+                "frequency": frequency,
                 "usage_percent": cpu_percent,
                 **cpu_details,
             },
-            "memory": {
-                "total": memory.total,
-                "available": memory.available,
-                "used": memory.used,
-                "free": memory.free,
-                "percent": memory.percent,
-            },
+            "memory": memory,
             "disk": {
                 "total": disk.total,
                 "used": disk.used,
@@ -348,28 +234,61 @@ async def get_system_info(current_user: str = Depends(verify_token)):
             },
             "gpu": gpu_info,
             "temperatures": temperatures,
+            "sampled_at": snap["sampled_at"],
         }
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Erro ao obter informações do sistema: {str(e)}")
 
 
+@router.get("/hardware", response_model=Dict[str, Any])
+async def get_hardware_inventory(current_user: str = Depends(verify_token)):
+    """Obter o inventário estático de hardware em cache."""
+    try:
+        return inventory.get()
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Erro ao obter inventário de hardware: {str(e)}")
+
+
+@router.post("/hardware/refresh", response_model=Dict[str, Any])
+async def refresh_hardware_inventory(current_user: str = Depends(verify_token)):
+    """Recoletar o inventário de hardware (lscpu, /proc/cpuinfo, lspci)."""
+    try:
+        return await asyncio.to_thread(inventory.refresh)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Erro ao atualizar inventário de hardware: {str(e)}")
+
+
+@router.get("/gpu", response_model=Dict[str, Any])
+async def get_gpu_metrics(current_user: str = Depends(verify_token)):
+    """Obter métricas de GPU do coletor contínuo (último registro e histórico curto)."""
+    try:
+        gpus = gpu_collector.latest()
+        if gpus is None:
+            # Coletor indisponível ou sem dados recentes: consulta única fora do event loop
+            gpus = await asyncio.to_thread(get_gpu_info)
+        return {"collector": gpu_collector.status(), "gpus": gpus, "history": gpu_collector.history()}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Erro ao obter métricas de GPU: {str(e)}")
+
+
 @router.get("/processes")
-async def get_processes(current_user: str = Depends(verify_token)):
-    """Obter lista de processos em execução."""
+async def get_processes(
+    sort: str = Query("cpu", pattern="^(cpu|memory|rss|pid|name)$"),
+    limit: int = Query(50, ge=1, le=1000),
+    user: Optional[str] = Query(None),
+    name_contains: Optional[str] = Query(None, alias="name~"),
+    min_cpu: Optional[float] = Query(None, ge=0),
+    current_user: str = Depends(verify_token)
+):
+    """Obter os N processos principais (padrão: top 50 por CPU).
+
+    O %CPU é o delta real desde a amostra anterior (objetos psutil.Process são
+    mantidos em cache entre chamadas). Filtros: user, name~ (substring), min_cpu.
+    """
     try:
-        processes = []
-        for proc in psutil.process_iter(['pid', 'name', 'username', 'cpu_percent', 'memory_percent', 'status']):
-            try:
-                process_info = proc.info
-                process_info['cpu_percent'] = proc.cpu_percent()
-                process_info['memory_percent'] = proc.memory_percent()
-                processes.append(process_info)
-            except (psutil.NoSuchProcess, psutil.AccessDenied):
-                continue
-        
-        # Ordenar por uso de CPU
-        processes.sort(key=lambda x: x.get('cpu_percent', 0), reverse=True)
-        return {"processes": processes[:50]}  # Top 50 processos
+        return await asyncio.to_thread(
+            process_table.top, sort, limit, user, name_contains, min_cpu
+        )
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Erro ao obter processos: {str(e)}")
 
@@ -378,48 +297,133 @@ async def get_processes(current_user: str = Depends(verify_token)):
 async def get_system_load(current_user: str = Depends(verify_token)):
     """Obter cargas do sistema (CPU, memória, disco)."""
     try:
-        # CPU
-        cpu_percent = psutil.cpu_percent(interval=1, percpu=True)
-        cpu_average = sum(cpu_percent) / len(cpu_percent)
-        
-        # Memória
-        memory = psutil.virtual_memory()
-        
-        # Disco I/O
-        disk_io = psutil.disk_io_counters()
-        
-        # Network I/O
-        net_io = psutil.net_io_counters()
-        
+        # Snapshot mantido pelo sampler em background (sem sleep por requisição)
+        snap = sampler.latest()
+        cpu = snap["cpu"]
+        memory = snap["memory"]
+
         return {
-            "timestamp": datetime.now().isoformat(),
+            "timestamp": snap["sampled_at"],
+            "sampled_at": snap["sampled_at"],
             "cpu": {
-                "percent_per_core": cpu_percent,
-                "percent_average": cpu_average,
-                "load_avg": psutil.getloadavg() if hasattr(psutil, 'getloadavg') else None
+                "percent_per_core": cpu["percent_per_core"],
+                "percent_average": cpu["percent_total"],
+                "load_avg": snap["load_avg"]
             },
             "memory": {
-                "percent": memory.percent,
-                "used_gb": memory.used / (1024**3),
-                "total_gb": memory.total / (1024**3)
+                "percent": memory["percent"],
+                "used_gb": memory["used"] / (1024**3),
+                "total_gb": memory["total"] / (1024**3)
             },
-            "disk_io": {
-                "read_bytes": disk_io.read_bytes,
-                "write_bytes": disk_io.write_bytes,
-                "read_count": disk_io.read_count,
-                "write_count": disk_io.write_count
-            } if disk_io else None,
-            "network_io": {
-                "bytes_sent": net_io.bytes_sent,
-                "bytes_recv": net_io.bytes_recv,
-                "packets_sent": net_io.packets_sent,
-                "packets_recv": net_io.packets_recv
-            } if net_io else None
+            "disk_io": snap["disk_io"],
+            "network_io": snap["net_io"]
         }
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Erro ao obter cargas do sistema: {str(e)}")
 
 
+@router.get("/history")
+async def get_metrics_history(
+    metric: str = Query("cpu"),
+    from_ts: Optional[float] = Query(None, alias="from"),
+    to_ts: Optional[float] = Query(None, alias="to"),
+    points: int = Query(300, ge=1, le=5000),
+    current_user: str = Depends(verify_token)
+):
+    """Obter histórico de uma métrica reduzido a N pontos (min/max/média por bucket).
+
+    - from/to: timestamps Unix (segundos); valores negativos em 'from' são relativos a agora
+      (ex.: from=-3600 para a última hora). Padrão: última hora.
+    """
+    try:
+        now = time.time()
+        if from_ts is None:
+            from_ts = now - 3600
+        elif from_ts < 0:
+            from_ts = now + from_ts
+        try:
+            data = history.query(metric, start=from_ts, end=to_ts, points=points)
+        except KeyError:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Métrica inválida: {metric}. Disponíveis: {', '.join(history.metrics)}"
+            )
+        data["resolution"] = sampler.interval
+        return data
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Erro ao obter histórico: {str(e)}")
+
+
+@router.websocket("/stream")
+async def stream_metrics_ws(
+    websocket: WebSocket,
+    token: Optional[str] = None,
+    metrics: Optional[str] = None,
+    interval: Optional[float] = None,
+):
+    """Stream de métricas ao vivo via WebSocket.
+
+    Query: token (JWT), metrics (cpu,memory,load,disk,net,gpu), interval (segundos).
+    O cliente pode enviar {"subscribe": [...], "interval": N} para alterar a assinatura.
+    O primeiro frame é "full"; os seguintes são "delta" (apenas campos alterados).
+    """
+    if decode_token(token) is None:
+        await websocket.close(code=1008)
+        return
+    await websocket.accept()
+    sub = broadcaster.subscribe(metrics, interval)
+
+    async def _reader():
+        while True:
+            msg = await websocket.receive_json()
+            if isinstance(msg, dict):
+                sub.update(msg.get("subscribe"), msg.get("interval"), broadcaster.min_interval)
+
+    reader = asyncio.create_task(_reader())
+    try:
+        while True:
+            frame = await sub.queue.get()
+            if frame is None:
+                # Cliente lento descartado pelo broadcaster
+                await websocket.close(code=1013)
+                break
+            await websocket.send_text(frame)
+    except (WebSocketDisconnect, RuntimeError):
+        pass
+    finally:
+        reader.cancel()
+        broadcaster.unsubscribe(sub)
+
+
+@router.get("/stream/sse")
+async def stream_metrics_sse(
+    metrics: Optional[str] = Query(None),
+    interval: Optional[float] = Query(None),
+    current_user: str = Depends(verify_token_or_query)
+):
+    """Fallback SSE do stream de métricas (mesmos frames do WebSocket)."""
+    sub = broadcaster.subscribe(metrics, interval)
+
+    async def _events():
+        try:
+            while True:
+                try:
+                    frame = await asyncio.wait_for(sub.queue.get(), timeout=15)
+                except asyncio.TimeoutError:
+                    yield KEEPALIVE
+                    continue
+                if frame is None:
+                    yield sse_event({"reason": "slow_consumer"}, event="close")
+                    break
+                yield sse_event(frame)
+        finally:
+            broadcaster.unsubscribe(sub)
+
+    return sse_response(_events())
+
+
 @router.get("/uptime")
 async def get_uptime(current_user: str = Depends(verify_token)):
     """Obter tempo de atividade do sistema."""
@@ -442,56 +446,49 @@ async def get_uptime(current_user: str = Depends(verify_token)):
 
 
 @router.get("/logs/{service}")
-async def get_system_logs(service: str = "syslog", lines: int = 100, current_user: str = Depends(verify_token)):
-    """Obter logs do sistema."""
+async def get_system_logs(
+    service: str = "syslog",
+    lines: int = Query(100, ge=0, le=10000),
+    follow: bool = Query(False),
+    current_user: str = Depends(verify_token_or_query)
+):
+    """Obter logs do sistema; com follow=true acompanha via SSE (eventos 'log')."""
+    path = logtail.LOG_FILES.get(service)
+    if follow:
+        if path and not os.path.isfile(path):
+            raise HTTPException(status_code=404, detail=f"Log {path} não encontrado")
+        source = logtail.follow_file(path, lines) if path else logtail.follow_journal(service, lines)
+        return sse_response(sse_stream(source, event="log"))
     try:
-        if service == "syslog":
-            cmd = f"tail -n {lines} /var/log/syslog"
-        elif service == "auth":
-            cmd = f"tail -n {lines} /var/log/auth.log"
-        elif service == "kern":
-            cmd = f"tail -n {lines} /var/log/kern.log"
-        else:
-            cmd = f"journalctl -u {service} -n {lines} --no-pager"
-        
-        result = subprocess.run(cmd, shell=True, capture_output=True, text=True)
-        
-        if result.returncode == 0:
-            return {
-                "service": service,
-                "lines": lines,
-                "logs": result.stdout.strip().split('\n')
-            }
+        if path:
+            try:
+                logs = await asyncio.to_thread(logtail.tail_lines, path, lines)
+            except (FileNotFoundError, PermissionError):
+                logs = None
         else:
+            logs = await asyncio.to_thread(logtail.journal_tail, service, lines)
+        if logs is None:
             raise HTTPException(status_code=404, detail=f"Serviço {service} não encontrado ou sem permissão")
+        return {
+            "service": service,
+            "lines": lines,
+            "logs": logs
+        }
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Erro ao obter logs: {str(e)}")
 
 
 @router.get("/disks")
 async def get_disk_info(current_user: str = Depends(verify_token)):
-    """Obter informações de discos do sistema."""
+    """Obter informações de discos do sistema.
+
+    Coleta paralela com prazo: mounts que não responderem a tempo (ex.: NFS
+    travado) voltam com stale=True e o último valor conhecido.
+    """
     try:
-        disks = []
-        partitions = psutil.disk_partitions()
-        
-        for partition in partitions:
-            try:
-                usage = psutil.disk_usage(partition.mountpoint)
-                disks.append({
-                    "device": partition.device,
-                    "mountpoint": partition.mountpoint,
-                    "fstype": partition.fstype,
-                    "total": usage.total,
-                    "used": usage.used,
-                    "free": usage.free,
-                    "percent": round((usage.used / usage.total) * 100, 1)
-                })
-            except PermissionError:
-                # Alguns pontos de montagem podem não ter permissão
-                continue
-        
-        return {"disks": disks}
+        return await disk_usage.usage()
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Erro ao obter informações de discos: {str(e)}")
 
@@ -500,99 +497,36 @@ async def get_disk_info(current_user: str = Depends(verify_token)):
 # Benchmarks simples
 # =======================
 
-def _cpu_benchmark(duration: int = 10, workers: Optional[int] = None) -> Dict[str, Any]:
-    """CPU benchmark: múltiplos processos fazem SHA-256 em loop por 'duration' segundos."""
+def _cpu_benchmark(duration: int = 10, workers: Optional[int] = None, workloads: Optional[List[str]] = None) -> Dict[str, Any]:
+    """CPU benchmark: suíte de cargas (hash, compressão, JSON, bigint, matmul) de 1 a N workers."""
     if workers is None or workers <= 0:
         workers = max(1, psutil.cpu_count(logical=True) or 1)
+    return bench_cpu.run_suite(duration=max(1, duration), max_workers=workers, workloads=workloads)
 
-    def worker(end_time: float, counter: Any):
-        data = b"x" * 4096
-        local_count = 0
-        h = hashlib.sha256
-        while time.time() < end_time:
-            _ = h(data).digest()
-            local_count += 1
-        with counter.get_lock():
-            counter.value += local_count
-
-    end_time = time.time() + max(1, duration)
-    counter = mp.Value('i', 0)
-    procs: List[mp.Process] = []
-    for _ in range(workers):
-        p = mp.Process(target=worker, args=(end_time, counter))
-        p.start()
-        procs.append(p)
-    for p in procs:
-        p.join()
-    total_ops = int(counter.value)
-    ops_per_sec = total_ops / max(1.0, duration)
-    return {"type": "cpu", "workers": workers, "duration": duration, "sha256_ops": total_ops, "ops_per_sec": round(ops_per_sec, 2)}
-
-
-def _disk_benchmark(size_mb: int = 256, tmp_dir: Optional[str] = None) -> Dict[str, Any]:
-    """Disk benchmark: escreve e lê um arquivo temporário de 'size_mb' MB medindo throughput."""
-    size_mb = max(16, min(size_mb, 4096))  # 16MB..4GB
-    tmp_dir = tmp_dir or "/tmp"
-    os.makedirs(tmp_dir, exist_ok=True)
-    path = os.path.join(tmp_dir, "serveradmin_benchmark.bin")
-    buf = b"\0" * (1024 * 1024)  # 1MB buffer (não usa urandom para não ser bound em CPU)
-
-    # Write
-    start = time.time()
-    with open(path, "wb") as f:
-        for _ in range(size_mb):
-            f.write(buf)
-        f.flush()
-        os.fsync(f.fileno())
-    write_sec = time.time() - start
-    write_mb_s = size_mb / write_sec if write_sec > 0 else 0.0
-
-    # Read
-    start = time.time()
-    read_bytes = 0
-    with open(path, "rb") as f:
-        while True:
-            chunk = f.read(1024 * 1024)
-            if not chunk:
-                break
-            read_bytes += len(chunk)
-    read_sec = time.time() - start
-    read_mb = read_bytes / (1024 * 1024)
-    read_mb_s = read_mb / read_sec if read_sec > 0 else 0.0
 
-    try:
-        os.remove(path)
-    except Exception:
-        pass
+def _disk_benchmark(size_mb: int = 256, tmp_dir: Optional[str] = None, **options: Any) -> Dict[str, Any]:
+    """Disk benchmark: modos seq/randread/randwrite/fsync/mmap sobre um arquivo temporário."""
+    modes = options.pop("modes", None) or ["seq"]
+    return bench_disk.run_disk_benchmark(modes, size_mb=size_mb, tmp_dir=tmp_dir, **options)
 
-    return {
-        "type": "disk",
-        "size_mb": size_mb,
-        "write_sec": round(write_sec, 3),
-        "write_mb_s": round(write_mb_s, 2),
-        "read_sec": round(read_sec, 3),
-        "read_mb_s": round(read_mb_s, 2),
-    }
+
+def _disk_options(params: Dict[str, Any]) -> Dict[str, Any]:
+    """Parâmetros opcionais do benchmark de disco vindos do payload."""
+    opts: Dict[str, Any] = {}
+    if params.get("modes"):
+        modes = params["modes"]
+        opts["modes"] = modes.split(",") if isinstance(modes, str) else list(modes)
+    for key, cast in (("queue_depth", int), ("block_size", int), ("duration", float)):
+        if params.get(key) is not None:
+            opts[key] = cast(params[key])
+    if params.get("direct") is not None:
+        opts["direct"] = bool(params["direct"])
+    return opts
 
 
 def _memory_benchmark(size_mb: int = 512, duration: int = 5) -> Dict[str, Any]:
-    """Memory benchmark: faz cópias em bloco pela duração definida e estima throughput."""
-    size_mb = max(64, min(size_mb, 8192))
-    block = bytearray(1024 * 1024)  # 1MB bloco
-    blocks = size_mb
-    data = bytearray(size_mb * 1024 * 1024)
-    start = time.time()
-    bytes_copied = 0
-    end_time = start + max(1, duration)
-    while time.time() < end_time:
-        # Copia em blocos de 1MB
-        for i in range(blocks):
-            start_idx = i * len(block)
-            data[start_idx:start_idx + len(block)] = block
-            bytes_copied += len(block)
-    sec = time.time() - start
-    mbps = (bytes_copied / (1024 * 1024)) / sec if sec > 0 else 0.0
-    return {"type": "memory", "size_mb": size_mb, "duration": duration, "mem_copy_mb_s": round(mbps, 2)}
+    """Memory benchmark: curvas de largura de banda e latência por working set (processo filho)."""
+    return bench_memory.run_memory_benchmark({"size_mb": size_mb, "duration": duration})
 
 
 def _gpu_benchmark(duration: int = 10) -> Dict[str, Any]:
@@ -661,10 +595,15 @@ async def run_benchmark(
     """Executa benchmarks simples.
 
     payload:
-      - type: "cpu" | "disk" | "memory" | "gpu" (default: cpu)
+      - type: "cpu" | "disk" | "memory" | "gpu" | "network" (default: cpu)
       - duration: segundos (para cpu/gpu/memory)
       - size_mb: tamanho do teste (para disk/memory)
-      - threads: número de workers para CPU
+      - threads: número máximo de workers para CPU
+      - workloads: lista de cargas de CPU (sha256, zlib, lzma, json, bigint, numpy_matmul)
+      - modes: modos de disco (seq, randread, randwrite, fsync, mmap; padrão: seq)
+      - queue_depth / block_size / direct: opções dos modos aleatórios de disco
+      - tests / streams / buffer_size / message_size / datagram_size / host / interface:
+        opções do benchmark de rede (loopback por padrão)
     """
     try:
         btype = str(payload.get("type", "cpu")).lower()
@@ -673,14 +612,18 @@ async def run_benchmark(
         threads = payload.get("threads")
         threads = int(threads) if threads is not None else None
 
+        # Os benchmarks bloqueiam por segundos: rodam em thread para não travar o event loop
         if btype == "cpu":
-            return _cpu_benchmark(duration=duration, workers=threads)
+            return await asyncio.to_thread(_cpu_benchmark, duration=duration, workers=threads, workloads=payload.get("workloads"))
         elif btype == "disk":
-            return _disk_benchmark(size_mb=size_mb)
+            return await asyncio.to_thread(_disk_benchmark, size_mb=size_mb, **_disk_options(payload))
         elif btype == "memory":
-            return _memory_benchmark(size_mb=size_mb, duration=duration)
+            return await asyncio.to_thread(_memory_benchmark, size_mb=size_mb, duration=duration)
         elif btype == "gpu":
-            return _gpu_benchmark(duration=duration)
+            return await asyncio.to_thread(_gpu_benchmark, duration=duration)
+        elif btype == "network":
+            # run_network_benchmark também cria o próprio event loop
+            return await asyncio.to_thread(bench_network.run_network_benchmark, {**payload, "duration": duration})
         else:
             raise HTTPException(status_code=400, detail="Tipo de benchmark inválido")
     except HTTPException:
@@ -696,37 +639,8 @@ async def run_benchmark(
 # Benchmarks em background (jobs)
 # =======================
 
-JOBS: Dict[str, Dict[str, Any]] = {}
-JOBS_LOCK = threading.Lock()
-
-
-def _set_job(job_id: str, updates: Dict[str, Any]):
-    with JOBS_LOCK:
-        if job_id in JOBS:
-            JOBS[job_id].update(updates)
-
-
-def _create_job(payload: Dict[str, Any]) -> str:
-    job_id = str(uuid.uuid4())
-    with JOBS_LOCK:
-        JOBS[job_id] = {
-            "id": job_id,
-            "type": payload.get("type", "cpu"),
-            "status": "queued",
-            "progress": 0.0,
-            "started_at": datetime.now().isoformat(),
-            "duration": payload.get("duration", 10),
-            "result": None,
-            "error": None,
-            "cancel": False,
-            "logs": [],
-            "params": payload,
-        }
-    return job_id
-
-
-def _job_worker(job_id: str):
-    job = JOBS.get(job_id, {})
+def _run_job(job: Dict[str, Any], ctx: JobContext) -> Optional[Dict[str, Any]]:
+    """Runner do agendador: executa o benchmark do job e devolve o resultado."""
     btype = str(job.get("type", "cpu")).lower()
     params = job.get("params", {})
     duration = int(params.get("duration", 10))
@@ -734,211 +648,219 @@ def _job_worker(job_id: str):
     threads = params.get("threads")
     threads = int(threads) if threads is not None else None
     start_time = time.time()
-    _set_job(job_id, {"status": "running", "progress": 0.0})
 
-    try:
-        if btype == "cpu":
-            # Reaproveita lógica: cria processos de CPU e acompanha pelo tempo
-            workers = threads if threads and threads > 0 else (psutil.cpu_count(logical=True) or 1)
-            end_time = start_time + max(1, duration)
-            counter = mp.Value('i', 0)
-
-            def cpu_worker(end_t: float, ctr: Any):
-                data = b"x" * 4096
-                local_count = 0
-                h = hashlib.sha256
-                while time.time() < end_t and not JOBS[job_id].get("cancel"):
-                    _ = h(data).digest()
-                    local_count += 1
-                with ctr.get_lock():
-                    ctr.value += local_count
-
-            procs: List[mp.Process] = []
-            for _ in range(workers):
-                p = mp.Process(target=cpu_worker, args=(end_time, counter))
-                p.start()
-                procs.append(p)
-            # Loop de progresso
-            while time.time() < end_time:
-                if JOBS[job_id].get("cancel"):
-                    break
-                elapsed = time.time() - start_time
-                prog = min(100.0, (elapsed / max(0.1, duration)) * 100.0)
-                _set_job(job_id, {"progress": round(prog, 1), "metrics": {"elapsed": round(elapsed, 2), "ops": int(counter.value)}})
-                time.sleep(0.5)
-            # Finalizar
-            for p in procs:
-                if p.is_alive():
-                    p.join(timeout=1)
-            total_ops = int(counter.value)
-            result = {
-                "type": "cpu",
-                "workers": workers,
-                "duration": duration,
-                "sha256_ops": total_ops,
-                "ops_per_sec": round(total_ops / max(1.0, duration), 2),
-            }
-            _set_job(job_id, {"result": result})
-
-        elif btype == "disk":
-            # Escreve e lê em blocos atualizando progresso por MB
-            size_mb = max(16, min(size_mb, 4096))
-            path = os.path.join(tempfile.gettempdir(), f"serveradmin_bench_{job_id}.bin")
-            buf = b"\0" * (1024 * 1024)
-            # Write with progress
-            written = 0
-            t0 = time.time()
-            with open(path, "wb") as f:
-                for _ in range(size_mb):
-                    if JOBS[job_id].get("cancel"):
-                        break
-                    f.write(buf)
-                    written += 1
-                    if written % 8 == 0:
-                        elapsed = time.time() - t0
-                        _set_job(job_id, {"progress": round((written / size_mb) * 100.0, 1), "metrics": {"written_mb": written, "elapsed": round(elapsed, 2)}})
-                f.flush(); os.fsync(f.fileno())
-            write_sec = time.time() - t0
-            # Read
-            read_bytes = 0
-            t1 = time.time()
-            with open(path, "rb") as f:
-                while True:
-                    if JOBS[job_id].get("cancel"):
-                        break
-                    chunk = f.read(1024 * 1024)
-                    if not chunk:
-                        break
-                    read_bytes += len(chunk)
-                    if (read_bytes // (1024 * 1024)) % 16 == 0:
-                        elapsed = time.time() - t1
-                        _set_job(job_id, {"metrics": {"read_mb": int(read_bytes / (1024 * 1024)), "elapsed": round(elapsed, 2)}})
-            read_sec = time.time() - t1
+    def _progress(pct: float, info: Dict[str, Any]):
+        ctx.progress(round(pct, 1), {"elapsed": round(time.time() - start_time, 2), **info})
+
+    if btype == "cpu":
+        workers = threads if threads and threads > 0 else (psutil.cpu_count(logical=True) or 1)
+        # Pool reutilizável do slot quando comporta o nº de workers pedido
+        shared = workers <= ctx.pool_workers
+        return bench_cpu.run_suite(
+            duration=max(1, duration),
+            max_workers=workers,
+            workloads=params.get("workloads"),
+            executor=ctx.executor if shared else None,
+            cancel_event=ctx.cancel_event,
+            progress=_progress,
+        )
+
+    elif btype == "disk":
+        opts = _disk_options(params)
+        return bench_disk.run_disk_benchmark(
+            opts.pop("modes", None),
+            size_mb=size_mb,
+            should_cancel=ctx.cancelled,
+            progress=_progress,
+            **opts,
+        )
+
+    elif btype == "memory":
+        return bench_memory.run_memory_benchmark(
+            {"size_mb": size_mb, "duration": duration},
+            progress=_progress,
+            cancel_event=ctx.cancel_event,
+        )
+
+    elif btype == "network":
+        return bench_network.run_network_benchmark(
+            {**params, "duration": duration},
+            should_cancel=ctx.cancelled,
+            progress=_progress,
+        )
+
+    elif btype == "gpu":
+        # Executa ferramenta externa se disponível
+        tool = None
+        for name in ["gpu-burn", "gpu_burn"]:
+            if shutil.which(name):
+                tool = name
+                break
+        if not tool and shutil.which("hashcat"):
+            tool = "hashcat"
+        if tool in ("gpu-burn", "gpu_burn"):
             try:
-                os.remove(path)
-            except Exception:
-                pass
-            result = {
-                "type": "disk",
-                "size_mb": size_mb,
-                "write_sec": round(write_sec, 3),
-                "write_mb_s": round(size_mb / write_sec, 2) if write_sec > 0 else 0.0,
-                "read_sec": round(read_sec, 3),
-                "read_mb_s": round((read_bytes / (1024 * 1024)) / read_sec, 2) if read_sec > 0 else 0.0,
-            }
-            _set_job(job_id, {"result": result, "progress": 100.0})
-
-        elif btype == "memory":
-            size_mb = max(64, min(size_mb, 8192))
-            block = bytearray(1024 * 1024)
-            blocks = size_mb
-            data = bytearray(size_mb * 1024 * 1024)
-            end_time = start_time + max(1, duration)
-            bytes_copied = 0
-            while time.time() < end_time and not JOBS[job_id].get("cancel"):
-                for i in range(blocks):
-                    start_idx = i * len(block)
-                    data[start_idx:start_idx + len(block)] = block
-                    bytes_copied += len(block)
-                elapsed = time.time() - start_time
-                prog = min(100.0, (elapsed / max(0.1, duration)) * 100.0)
-                _set_job(job_id, {"progress": round(prog, 1), "metrics": {"elapsed": round(elapsed, 2), "copied_mb": int(bytes_copied / (1024 * 1024))}})
-            sec = time.time() - start_time
-            mbps = (bytes_copied / (1024 * 1024)) / sec if sec > 0 else 0.0
-            result = {"type": "memory", "size_mb": size_mb, "duration": duration, "mem_copy_mb_s": round(mbps, 2)}
-            _set_job(job_id, {"result": result})
-
-        elif btype == "gpu":
-            # Executa ferramenta externa se disponível
-            tool = None
-            for name in ["gpu-burn", "gpu_burn"]:
-                if shutil.which(name):
-                    tool = name
-                    break
-            if not tool and shutil.which("hashcat"):
-                tool = "hashcat"
-            end_time = start_time + max(1, duration)
-            if tool in ("gpu-burn", "gpu_burn"):
-                try:
-                    proc = subprocess.Popen([tool, str(duration)], stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True)
-                    out_lines: List[str] = []
-                    while proc.poll() is None:
-                        if JOBS[job_id].get("cancel"):
-                            proc.terminate(); break
-                        line = proc.stdout.readline() if proc.stdout else ''
-                        if line:
-                            out_lines.append(line.strip())
-                            if len(out_lines) > 200:
-                                out_lines = out_lines[-200:]
-                            _set_job(job_id, {"logs": out_lines[-10:]})
-                        elapsed = time.time() - start_time
-                        prog = min(100.0, (elapsed / max(0.1, duration)) * 100.0)
-                        _set_job(job_id, {"progress": round(prog, 1)})
-                        time.sleep(0.2)
-                    rc = proc.wait(timeout=5) if proc else 1
-                    result = {"type": "gpu", "tool": tool, "duration": duration, "success": rc == 0, "output": "\n".join(out_lines[-50:])}
-                    _set_job(job_id, {"result": result})
-                except Exception as e:
-                    _set_job(job_id, {"error": str(e)})
-            elif tool == "hashcat":
-                try:
-                    proc = subprocess.Popen(["hashcat", "-b", "-m", "0", "--quiet"], stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True)
-                    out_lines: List[str] = []
-                    while proc.poll() is None:
-                        if JOBS[job_id].get("cancel"):
-                            proc.terminate(); break
-                        line = proc.stdout.readline() if proc.stdout else ''
-                        if line:
-                            out_lines.append(line.strip())
-                            _set_job(job_id, {"logs": out_lines[-10:]})
-                        # Sem duração definida, apenas marca como em execução
-                        _set_job(job_id, {"progress": None})
-                        time.sleep(0.3)
-                    rc = proc.wait(timeout=5) if proc else 1
-                    result = {"type": "gpu", "tool": tool, "success": rc == 0, "output": "\n".join(out_lines[-50:])}
-                    _set_job(job_id, {"result": result})
-                except Exception as e:
-                    _set_job(job_id, {"error": str(e)})
-            else:
-                _set_job(job_id, {"result": {"type": "gpu", "available": _which_nvidia_smi() is not None, "message": "Instale gpu-burn ou hashcat para teste."}})
+                proc = subprocess.Popen([tool, str(duration)], stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True)
+                out_lines: List[str] = []
+                while proc.poll() is None:
+                    if ctx.cancelled():
+                        proc.terminate(); break
+                    line = proc.stdout.readline() if proc.stdout else ''
+                    if line:
+                        out_lines.append(line.strip())
+                        if len(out_lines) > 200:
+                            out_lines = out_lines[-200:]
+                        ctx.log(line.strip())
+                    elapsed = time.time() - start_time
+                    prog = min(100.0, (elapsed / max(0.1, duration)) * 100.0)
+                    ctx.progress(round(prog, 1))
+                    time.sleep(0.2)
+                rc = proc.wait(timeout=5) if proc else 1
+                return {"type": "gpu", "tool": tool, "duration": duration, "success": rc == 0, "output": "\n".join(out_lines[-50:])}
+            except Exception as e:
+                ctx.update({"error": str(e)})
+        elif tool == "hashcat":
+            try:
+                proc = subprocess.Popen(["hashcat", "-b", "-m", "0", "--quiet"], stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True)
+                out_lines: List[str] = []
+                # Sem duração definida, apenas marca como em execução
+                ctx.progress(None)
+                while proc.poll() is None:
+                    if ctx.cancelled():
+                        proc.terminate(); break
+                    line = proc.stdout.readline() if proc.stdout else ''
+                    if line:
+                        out_lines.append(line.strip())
+                        ctx.log(line.strip())
+                    time.sleep(0.3)
+                rc = proc.wait(timeout=5) if proc else 1
+                return {"type": "gpu", "tool": tool, "success": rc == 0, "output": "\n".join(out_lines[-50:])}
+            except Exception as e:
+                ctx.update({"error": str(e)})
         else:
-            _set_job(job_id, {"error": "Tipo de benchmark inválido"})
+            return {"type": "gpu", "available": _which_nvidia_smi() is not None, "message": "Instale gpu-burn ou hashcat para teste."}
+        return None
+    raise ValueError("Tipo de benchmark inválido")
 
-        if JOBS[job_id].get("cancel"):
-            _set_job(job_id, {"status": "canceled"})
-        else:
-            _set_job(job_id, {"status": "completed", "progress": 100.0 if JOBS[job_id].get("progress") is not None else None})
 
+def _store_job(job: Dict[str, Any]):
+    """Persiste o resultado de um job concluído no histórico de benchmarks."""
+    if not job.get("result") or job.get("error"):
+        return
+    try:
+        bench_store.save(job)
+        bench_scheduler.update(job["id"], {"stored": True})
     except Exception as e:
-        _set_job(job_id, {"status": "error", "error": str(e)})
+        bench_scheduler.update(job["id"], {"stored": False, "store_error": str(e)})
+
+
+bench_scheduler.set_runner(_run_job, on_finish=_store_job)
 
 
 @router.post("/benchmark/start")
 async def start_benchmark(payload: Dict[str, Any], current_user: str = Depends(verify_token)):
-    """Inicia um benchmark em background e retorna job_id."""
-    job_id = _create_job(payload)
-    t = threading.Thread(target=_job_worker, args=(job_id,), daemon=True)
-    t.start()
-    return {"job_id": job_id}
+    """Enfileira um benchmark e retorna job_id (e a posição na fila)."""
+    job_id = bench_scheduler.submit(payload)
+    job = bench_scheduler.get(job_id) or {}
+    return {"job_id": job_id, "queue_position": job.get("queue_position")}
 
 
 @router.get("/benchmark/status/{job_id}")
 async def get_benchmark_status(job_id: str, current_user: str = Depends(verify_token)):
-    with JOBS_LOCK:
-        job = JOBS.get(job_id)
-        if not job:
-            raise HTTPException(status_code=404, detail="Job não encontrado")
-        # Evitar expor flags internas
-        safe = {k: v for k, v in job.items() if k not in ("cancel",)}
-        return safe
+    job = bench_scheduler.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job não encontrado")
+    return job
+
+
+@router.get("/benchmark/stream/{job_id}")
+async def stream_benchmark(
+    job_id: str,
+    fps: float = Query(4, gt=0, le=20),
+    current_user: str = Depends(verify_token_or_query)
+):
+    """Progresso do job via SSE (substitui o polling de /benchmark/status).
+
+    Eventos: 'state' (ao conectar), 'progress' (agrupados, no máximo 'fps' por
+    segundo) e 'result' (job final, encerra o stream).
+    """
+    job = bench_scheduler.get(job_id)
+    channel = bench_scheduler.channel(job_id)
+    if not job or channel is None:
+        raise HTTPException(status_code=404, detail="Job não encontrado")
+
+    return sse_response(job_stream(lambda: bench_scheduler.get(job_id), channel, fps, FINISHED))
 
 
 @router.post("/benchmark/cancel/{job_id}")
 async def cancel_benchmark(job_id: str, current_user: str = Depends(verify_token)):
-    with JOBS_LOCK:
-        if job_id not in JOBS:
-            raise HTTPException(status_code=404, detail="Job não encontrado")
-        JOBS[job_id]["cancel"] = True
+    if not bench_scheduler.cancel(job_id):
+        raise HTTPException(status_code=404, detail="Job não encontrado")
+    return {"message": "Cancelamento solicitado"}
+
+
+@router.get("/benchmark/queue")
+async def get_benchmark_queue(current_user: str = Depends(verify_token)):
+    return bench_scheduler.stats()
+
+
+@router.get("/benchmark/runs")
+async def list_benchmark_runs(
+    type: Optional[str] = Query(None),
+    limit: int = Query(50, ge=1, le=500),
+    offset: int = Query(0, ge=0),
+    current_user: str = Depends(verify_token)
+):
+    """Histórico de execuções de benchmark gravadas (mais recentes primeiro)."""
+    try:
+        return await asyncio.to_thread(bench_store.list, type, limit, offset)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Erro ao listar benchmarks: {str(e)}")
+
+
+@router.get("/benchmark/runs/{run_id}")
+async def get_benchmark_run(run_id: str, current_user: str = Depends(verify_token)):
+    run = await asyncio.to_thread(bench_store.get, run_id)
+    if not run:
+        raise HTTPException(status_code=404, detail="Execução não encontrada")
+    return run
+
+
+@router.delete("/benchmark/runs/{run_id}")
+async def delete_benchmark_run(run_id: str, current_user: str = Depends(verify_token)):
+    if not await asyncio.to_thread(bench_store.delete, run_id):
+        raise HTTPException(status_code=404, detail="Execução não encontrada")
+    return {"message": "Execução removida"}
+
+
+@router.post("/benchmark/runs/{run_id}/baseline")
+async def set_benchmark_baseline(run_id: str, current_user: str = Depends(verify_token)):
+    """Marca a execução como baseline do seu tipo de benchmark."""
+    run = await asyncio.to_thread(bench_store.set_baseline, run_id)
+    if not run:
+        raise HTTPException(status_code=404, detail="Execução não encontrada")
+    return run
+
+
+@router.get("/benchmark/runs/{run_id}/compare")
+async def compare_benchmark_run(
+    run_id: str,
+    baseline_id: Optional[str] = Query(None),
+    current_user: str = Depends(verify_token)
+):
+    """Compara uma execução com a baseline do tipo (ou com 'baseline_id'), em % de variação."""
+    run = await asyncio.to_thread(bench_store.get, run_id)
+    if not run:
+        raise HTTPException(status_code=404, detail="Execução não encontrada")
+    if baseline_id:
+        base = await asyncio.to_thread(bench_store.get, baseline_id)
+    else:
+        base = await asyncio.to_thread(bench_store.baseline, run["type"])
+    if not base:
+        raise HTTPException(status_code=404, detail="Baseline não encontrada para este tipo de benchmark")
+    if base["type"] != run["type"]:
+        raise HTTPException(status_code=400, detail="Execuções de tipos diferentes não podem ser comparadas")
+    return bench_store.compare(run, base)
 
 
 # =======================
@@ -1044,4 +966,3 @@ async def start_update_background(current_user: str = Depends(verify_token)):
         raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Erro ao iniciar atualização: {str(e)}")
-        return {"message": "Cancelamento solicitado"}
@@ -0,0 +1,265 @@
+"""
+Resolução em lote de versões candidatas do APT.
+
+Em vez de um 'apt-cache policy <pkg>' e um 'apt list --upgradable' por pacote,
+AptPolicyResolver consulta todos os nomes pedidos em UMA chamada de
+'apt-cache policy a b c ...' e guarda o resultado até as listas do APT ou o
+status do dpkg mudarem. A comparação instalado x candidato usa
+compare_versions (regras do dpkg), então "upgradable" não depende de
+comparação de strings.
+"""
+import os
+import subprocess
+import threading
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from app.core.dpkg import dpkg_status, native_arch
+
+APT_LISTS_DIR = "/var/lib/apt/lists"
+APT_PKGCACHE = "/var/cache/apt/pkgcache.bin"
+APT_EXTENDED_STATES = "/var/lib/apt/extended_states"
+APT_PREFERENCES = ("/etc/apt/preferences", "/etc/apt/preferences.d")
+# Limite de nomes por chamada (linha de comando)
+POLICY_BATCH = 500
+
+
+# ---- Comparação de versões (algoritmo do dpkg) -----------------------------
+
+def _order(c: str) -> int:
+    if c == "~":
+        return -1
+    if c.isdigit():
+        return 0
+    if c.isalpha():
+        return ord(c)
+    return ord(c) + 256
+
+
+def _compare_part(a: str, b: str) -> int:
+    """Compara upstream_version ou debian_revision alternando trechos não numéricos e numéricos."""
+    i = j = 0
+    while i < len(a) or j < len(b):
+        first_diff = 0
+        while (i < len(a) and not a[i].isdigit()) or (j < len(b) and not b[j].isdigit()):
+            ac = _order(a[i]) if i < len(a) and not a[i].isdigit() else 0
+            bc = _order(b[j]) if j < len(b) and not b[j].isdigit() else 0
+            if ac != bc:
+                return -1 if ac < bc else 1
+            i += 1
+            j += 1
+        while i < len(a) and a[i] == "0":
+            i += 1
+        while j < len(b) and b[j] == "0":
+            j += 1
+        while i < len(a) and a[i].isdigit() and j < len(b) and b[j].isdigit():
+            if not first_diff:
+                first_diff = ord(a[i]) - ord(b[j])
+            i += 1
+            j += 1
+        if i < len(a) and a[i].isdigit():
+            return 1
+        if j < len(b) and b[j].isdigit():
+            return -1
+        if first_diff:
+            return -1 if first_diff < 0 else 1
+    return 0
+
+
+def _split_version(v: str) -> Tuple[int, str, str]:
+    epoch, sep, rest = v.partition(":")
+    if not sep:
+        epoch, rest = "0", v
+    upstream, sep, revision = rest.rpartition("-")
+    if not sep:
+        upstream, revision = rest, ""
+    try:
+        return int(epoch or 0), upstream, revision
+    except ValueError:
+        return 0, rest, ""
+
+
+def compare_versions(a: str, b: str) -> int:
+    """-1, 0 ou 1 como 'dpkg --compare-versions' (epoch, upstream, revisão)."""
+    ea, ua, ra = _split_version(a.strip())
+    eb, ub, rb = _split_version(b.strip())
+    if ea != eb:
+        return -1 if ea < eb else 1
+    return _compare_part(ua, ub) or _compare_part(ra, rb)
+
+
+# ---- apt-cache policy ------------------------------------------------------
+
+def _none(value: str) -> Optional[str]:
+    value = value.strip()
+    return None if not value or value == "(none)" else value
+
+
+def parse_policy(text: str) -> Dict[str, Dict[str, Any]]:
+    """Saída de 'apt-cache policy' para {nome: {installed, candidate, versions[]}}."""
+    out: Dict[str, Dict[str, Any]] = {}
+    current: Optional[Dict[str, Any]] = None
+    version: Optional[Dict[str, Any]] = None
+    for line in text.splitlines():
+        if not line.strip():
+            continue
+        if not line.startswith(" ") and line.endswith(":"):
+            current = {"installed": None, "candidate": None, "versions": []}
+            out[line[:-1]] = current
+            version = None
+            continue
+        if current is None:
+            continue
+        stripped = line.strip()
+        if stripped.startswith("Installed:"):
+            current["installed"] = _none(stripped.split(":", 1)[1])
+        elif stripped.startswith("Candidate:"):
+            current["candidate"] = _none(stripped.split(":", 1)[1])
+        elif stripped.startswith("Version table:"):
+            continue
+        elif line.startswith(" *** ") or (line.startswith("     ") and not line.startswith("      ")):
+            # " *** 1.2-3 500" ou "     1.2-3 500": linha de versão
+            parts = stripped.lstrip("*").split()
+            if parts:
+                version = {"version": parts[0], "priority": int(parts[1]) if len(parts) > 1 and parts[1].lstrip("-").isdigit() else None, "origins": []}
+                current["versions"].append(version)
+        elif version is not None:
+            # "        500 http://deb.debian.org/debian bookworm/main amd64 Packages"
+            prio, _, origin = stripped.partition(" ")
+            version["origins"].append(origin.strip() or prio)
+    return out
+
+
+def _mtime(path: str) -> int:
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return 0
+
+
+class AptPolicyResolver:
+    """Candidato e 'upgradable' de vários pacotes com uma chamada ao apt-cache."""
+
+    def __init__(self, lists_dir: str = APT_LISTS_DIR, timeout: float = 30.0):
+        self.lists_dir = lists_dir
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self._stamp: Optional[Tuple[int, ...]] = None
+        self._cache: Dict[str, Dict[str, Any]] = {}
+
+    def stamp(self) -> Tuple[int, ...]:
+        """Muda quando 'apt update' troca as listas ou o dpkg altera pacotes instalados."""
+        dpkg_status.stats()  # revalida o índice do dpkg
+        return (
+            _mtime(self.lists_dir),
+            _mtime(APT_PKGCACHE),
+            *(_mtime(p) for p in APT_PREFERENCES),
+            dpkg_status.generation,
+        )
+
+    def quick_stamp(self) -> Tuple[int, ...]:
+        """Como stamp(), mas só com stat (não reindexa o dpkg): barato no event loop."""
+        try:
+            st = os.stat(dpkg_status.path)
+            status = (st.st_mtime_ns, st.st_size)
+        except OSError:
+            status = (0, 0)
+        return (
+            _mtime(self.lists_dir),
+            _mtime(APT_PKGCACHE),
+            *(_mtime(p) for p in APT_PREFERENCES),
+            *status,
+        )
+
+    def _query(self, names: List[str]) -> Dict[str, Dict[str, Any]]:
+        found: Dict[str, Dict[str, Any]] = {}
+        for i in range(0, len(names), POLICY_BATCH):
+            chunk = names[i:i + POLICY_BATCH]
+            try:
+                result = subprocess.run(
+                    ["apt-cache", "policy", *chunk],
+                    capture_output=True,
+                    text=True,
+                    timeout=self.timeout,
+                    env={**os.environ, "LANG": "C", "LC_ALL": "C"},
+                )
+                found.update(parse_policy(result.stdout))
+            except (OSError, subprocess.TimeoutExpired):
+                continue
+        return found
+
+    def resolve(self, names: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+        """{nome: {installed, candidate, upgradable, versions}} (nomes desconhecidos: tudo None)."""
+        names = list(dict.fromkeys(names))
+        stamp = self.stamp()
+        with self._lock:
+            if stamp != self._stamp:
+                self._cache = {}
+                self._stamp = stamp
+            missing = [n for n in names if n not in self._cache]
+            if missing:
+                found = self._query(missing)
+                for name in missing:
+                    info = found.get(name) or {"installed": None, "candidate": None, "versions": []}
+                    installed, candidate = info["installed"], info["candidate"]
+                    info["upgradable"] = bool(installed and candidate and compare_versions(candidate, installed) > 0)
+                    self._cache[name] = info
+            return {n: self._cache[n] for n in names}
+
+    def get(self, name: str) -> Dict[str, Any]:
+        return self.resolve([name])[name]
+
+    def invalidate(self):
+        with self._lock:
+            self._cache = {}
+            self._stamp = None
+
+
+apt_policy = AptPolicyResolver()
+
+
+class ExtendedStates:
+    """Pacotes marcados como instalados automaticamente (/var/lib/apt/extended_states)."""
+
+    def __init__(self, path: str = APT_EXTENDED_STATES):
+        self.path = path
+        self.arch = native_arch()
+        self._lock = threading.Lock()
+        self._stamp: Optional[Tuple[int, int]] = None
+        self._auto: Set[Tuple[str, str]] = set()
+
+    def _refresh(self):
+        try:
+            st = os.stat(self.path)
+            stamp = (st.st_mtime_ns, st.st_size)
+        except OSError:
+            stamp = (0, 0)
+        if stamp == self._stamp:
+            return
+        with self._lock:
+            if stamp == self._stamp:
+                return
+            auto: Set[Tuple[str, str]] = set()
+            try:
+                with open(self.path, "r", encoding="utf-8", errors="replace") as f:
+                    text = f.read()
+            except OSError:
+                text = ""
+            for para in text.split("\n\n"):
+                fields = dict(
+                    (k.strip(), v.strip()) for k, _, v in
+                    (line.partition(":") for line in para.split("\n") if ":" in line)
+                )
+                if fields.get("Auto-Installed") == "1" and "Package" in fields:
+                    auto.add((fields["Package"], fields.get("Architecture", self.arch)))
+            self._auto = auto
+            self._stamp = stamp
+
+    def is_auto(self, name: str, arch: Optional[str] = None) -> bool:
+        """True se o pacote foi instalado como dependência (apt-mark showauto)."""
+        self._refresh()
+        auto = self._auto
+        # pacotes 'all' são registrados com a arquitetura nativa
+        return (name, arch or self.arch) in auto or (arch == "all" and (name, self.arch) in auto)
+
+
+apt_extended_states = ExtendedStates()
@@ -0,0 +1,347 @@
+"""
+Fila de jobs do apt-get (install/upgrade/remove/autoremove).
+
+- Um único worker asyncio executa os jobs em ordem: pedidos simultâneos
+  esperam na fila em vez de falhar no lock do dpkg.
+- Antes de cada passo o worker verifica os locks do dpkg (outro processo,
+  ex.: unattended-upgrades) e aguarda com phase="waiting_lock"; o apt-get
+  também recebe DPkg::Lock::Timeout para a janela entre a verificação e o
+  início.
+- O apt-get roda como subprocesso assíncrono com APT::Status-Fd apontando
+  para um pipe; as linhas dlstatus/pmstatus viram progresso percentual
+  (download 0-50%, instalação 50-100% quando há download).
+- Progresso e saída vão para um JobChannel (mesmo canal dos benchmarks),
+  lido pelos endpoints de status e SSE.
+"""
+import asyncio
+import os
+import re
+import uuid
+from collections import deque
+from datetime import datetime
+from typing import Any, Deque, Dict, List, Optional, Union
+
+from app.core.bench_scheduler import JobChannel
+from app.core.config import settings
+
+try:
+    import fcntl
+except ImportError:  # Windows (desenvolvimento)
+    fcntl = None
+
+DPKG_LOCKS = ("/var/lib/dpkg/lock-frontend", "/var/lib/dpkg/lock")
+FINISHED = ("completed", "error", "canceled")
+OUTPUT_LINES = 2000
+LOCK_POLL = 2.0
+
+# Passo de um job: argv, ou {"argv": [...], "check": bool}
+Step = Union[List[str], Dict[str, Any]]
+
+_PACKAGE_RE = re.compile(r"^[a-z0-9][a-z0-9+.\-]*(:[a-z0-9\-]+)?(=[A-Za-z0-9.+~:\-]+)?$")
+
+
+def _step_argv(step: Step) -> List[str]:
+    return step["argv"] if isinstance(step, dict) else step
+
+
+def validate_packages(packages: List[str]) -> List[str]:
+    """Nomes de pacote válidos (impede opções como '-o ...' na linha de comando)."""
+    names = [p.strip() for p in packages if p and p.strip()]
+    invalid = [p for p in names if not _PACKAGE_RE.match(p)]
+    if invalid:
+        raise ValueError(f"Nome de pacote inválido: {', '.join(invalid)}")
+    return names
+
+
+def apt_command(action: str, packages: Optional[List[str]] = None, purge: bool = False,
+                download_only: bool = False) -> List[str]:
+    """argv do apt-get para uma ação (download_only: só baixa os .deb para o cache)."""
+    packages = validate_packages(packages or [])
+    if action == "install":
+        if not packages:
+            raise ValueError("Nenhum pacote informado")
+        return ["apt-get", "install", "-y", *(["--download-only"] if download_only else []), *packages]
+    if action == "upgrade":
+        if packages:
+            return ["apt-get", "install", "--only-upgrade", "-y", *packages]
+        return ["apt-get", "upgrade", "-y"]
+    if action == "remove":
+        if not packages:
+            raise ValueError("Nenhum pacote informado")
+        return ["apt-get", "purge" if purge else "remove", "-y", *packages]
+    if action == "autoremove":
+        return ["apt-get", "autoremove", "-y"]
+    if action == "update":
+        return ["apt-get", "update"]
+    raise ValueError(f"Ação inválida: {action}")
+
+
+def dpkg_locked() -> bool:
+    """True se outro processo segura o lock do dpkg (teste não bloqueante)."""
+    if fcntl is None:
+        return False
+    for path in DPKG_LOCKS:
+        try:
+            fd = os.open(path, os.O_RDWR)
+        except OSError:
+            continue
+        try:
+            fcntl.lockf(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            fcntl.lockf(fd, fcntl.LOCK_UN)
+        except OSError:
+            return True
+        finally:
+            os.close(fd)
+    return False
+
+
+def parse_status_line(line: str) -> Optional[Dict[str, Any]]:
+    """'pmstatus:pkg:42.5:Installing pkg' -> {kind, package, percent, message}."""
+    parts = line.rstrip("\n").split(":", 3)
+    if len(parts) < 4 or parts[0] not in ("dlstatus", "pmstatus", "pmerror", "pmconffile", "media-change"):
+        return None
+    try:
+        percent = float(parts[2])
+    except ValueError:
+        percent = None
+    return {"kind": parts[0], "package": parts[1], "percent": percent, "message": parts[3]}
+
+
+class AptJobQueue:
+    def __init__(self, lock_timeout: float = 600.0, max_jobs: int = 50):
+        self.lock_timeout = lock_timeout
+        self.max_jobs = max(1, max_jobs)
+        self.jobs: Dict[str, Dict[str, Any]] = {}
+        self._order: Deque[str] = deque()
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+        self.current: Optional[str] = None
+
+    # ---- API -------------------------------------------------------------
+
+    def submit(self, action: str, steps: List[Step], packages: Optional[List[str]] = None,
+               label: Optional[str] = None) -> Dict[str, Any]:
+        """Enfileira 'steps' (executados em sequência) e devolve o job.
+
+        Cada passo é um argv ou {"argv": [...], "check": False} para passos cuja
+        falha só gera aviso (ex.: apt-get update com um repositório fora do ar).
+        """
+        if self._queue is None:
+            self._queue = asyncio.Queue()
+        if self._worker is None or self._worker.done():
+            self._worker = asyncio.create_task(self._run())
+        job_id = str(uuid.uuid4())
+        self.jobs[job_id] = {
+            "id": job_id,
+            "action": action,
+            "label": label or action,
+            "packages": packages or [],
+            "steps": [" ".join(_step_argv(s)) for s in steps],
+            "status": "queued",
+            "phase": "queued",
+            "progress": 0.0,
+            "queued_at": datetime.now().isoformat(),
+            "started_at": None,
+            "finished_at": None,
+            "returncode": None,
+            "error": None,
+            "_argv": steps,
+            "_output": deque(maxlen=OUTPUT_LINES),
+            "_channel": JobChannel(),
+            "_done": asyncio.get_running_loop().create_future(),
+        }
+        self._order.append(job_id)
+        self._queue.put_nowait(job_id)
+        self._evict()
+        return self.get(job_id)
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        job = self.jobs.get(job_id)
+        if job is None:
+            return None
+        safe = {k: v for k, v in job.items() if not k.startswith("_")}
+        channel: JobChannel = job["_channel"]
+        if job["status"] == "running" and isinstance(channel.progress, (int, float)):
+            safe["progress"] = channel.progress
+        safe["output"] = list(job["_output"])[-50:]
+        queued = [j for j in self._order if self.jobs.get(j, {}).get("status") == "queued"]
+        safe["queue_position"] = queued.index(job_id) + 1 if job_id in queued else None
+        return safe
+
+    def list(self) -> List[Dict[str, Any]]:
+        return [self.get(j) for j in reversed(self._order) if j in self.jobs]
+
+    def channel(self, job_id: str) -> Optional[JobChannel]:
+        job = self.jobs.get(job_id)
+        return job["_channel"] if job else None
+
+    def output(self, job_id: str) -> str:
+        job = self.jobs.get(job_id)
+        return "\n".join(job["_output"]) if job else ""
+
+    async def wait(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Aguarda o fim do job sem bloquear o event loop (shield: desconexão não cancela)."""
+        job = self.jobs.get(job_id)
+        if job is None:
+            return None
+        await asyncio.shield(job["_done"])
+        return self.get(job_id)
+
+    def cancel(self, job_id: str) -> bool:
+        """Cancela jobs na fila; um apt-get em execução não é interrompido."""
+        job = self.jobs.get(job_id)
+        if job is None or job["status"] != "queued":
+            return False
+        self._finish(job, "canceled", None)
+        return True
+
+    async def stop(self):
+        if self._worker is not None and not self._worker.done():
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+        self._worker = None
+
+    # ---- execução ----------------------------------------------------------
+
+    def _evict(self):
+        finished = [j for j in self._order if self.jobs.get(j, {}).get("status") in FINISHED]
+        for job_id in finished[: max(0, len(finished) - self.max_jobs)]:
+            self.jobs.pop(job_id, None)
+            self._order.remove(job_id)
+
+    def _finish(self, job: Dict[str, Any], status: str, error: Optional[str]):
+        job.update({"status": status, "phase": status, "error": error, "finished_at": datetime.now().isoformat()})
+        if status == "completed":
+            job["progress"] = 100.0
+        elif isinstance(job["_channel"].progress, (int, float)):
+            job["progress"] = job["_channel"].progress
+        job["_channel"].publish("done")
+        if not job["_done"].done():
+            job["_done"].set_result(status)
+
+    def _log(self, job: Dict[str, Any], line: str):
+        job["_output"].append(line)
+        job["_channel"].publish("log", line)
+
+    def _progress(self, job: Dict[str, Any], pct: float, **info: Any):
+        job["phase"] = info.get("phase", job["phase"])
+        job["_channel"].publish("progress", {"progress": round(pct, 1), **info})
+
+    async def _wait_lock(self, job: Dict[str, Any]):
+        waited = 0.0
+        while dpkg_locked():
+            if waited == 0.0:
+                last = job["_channel"].progress
+                self._log(job, "Aguardando o lock do dpkg (outro processo do apt/dpkg em execução)...")
+                self._progress(job, last if isinstance(last, (int, float)) else 0.0, phase="waiting_lock")
+            if waited >= self.lock_timeout:
+                raise RuntimeError(f"Lock do dpkg não liberado após {self.lock_timeout:.0f}s")
+            await asyncio.sleep(LOCK_POLL)
+            waited += LOCK_POLL
+
+    async def _run_step(self, job: Dict[str, Any], argv: List[str], index: int, total: int) -> int:
+        base, span = index / total * 100.0, 100.0 / total
+        env = {**os.environ, "DEBIAN_FRONTEND": "noninteractive", "LANG": "C", "LC_ALL": "C"}
+        status_r = status_w = None
+        if argv and argv[0] == "apt-get":
+            status_r, status_w = os.pipe()
+            argv = [argv[0],
+                    "-o", f"APT::Status-Fd={status_w}",
+                    "-o", "Dpkg::Use-Pty=0",
+                    "-o", f"DPkg::Lock::Timeout={int(self.lock_timeout)}",
+                    "-o", "Dpkg::Options::=--force-confdef",
+                    "-o", "Dpkg::Options::=--force-confold",
+                    *argv[1:]]
+        self._log(job, "$ " + " ".join(argv))
+        try:
+            proc = await asyncio.create_subprocess_exec(
+                *argv,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.STDOUT,
+                stdin=asyncio.subprocess.DEVNULL,
+                env=env,
+                pass_fds=(status_w,) if status_w is not None else (),
+            )
+        except OSError:
+            if status_r is not None:
+                os.close(status_r)
+                os.close(status_w)
+            raise
+        loop = asyncio.get_running_loop()
+
+        async def _read_output():
+            async for raw in proc.stdout:
+                self._log(job, raw.decode("utf-8", errors="replace").rstrip())
+
+        async def _read_status():
+            os.close(status_w)
+            reader = asyncio.StreamReader()
+            transport, _ = await loop.connect_read_pipe(
+                lambda: asyncio.StreamReaderProtocol(reader), os.fdopen(status_r, "rb", 0)
+            )
+            downloaded = False
+            try:
+                async for raw in reader:
+                    st = parse_status_line(raw.decode("utf-8", errors="replace"))
+                    if st is None or st["percent"] is None:
+                        if st is not None and st["kind"] == "pmerror":
+                            self._log(job, f"Erro em {st['package']}: {st['message']}")
+                        continue
+                    if st["kind"] == "dlstatus":
+                        downloaded = True
+                        pct, phase = st["percent"] * 0.5, "download"
+                    else:
+                        pct = 50.0 + st["percent"] * 0.5 if downloaded else st["percent"]
+                        phase = "install"
+                    self._progress(job, base + pct / 100.0 * span, phase=phase,
+                                   package=st["package"], message=st["message"])
+            finally:
+                transport.close()
+
+        readers = [_read_output()]
+        if status_r is not None:
+            readers.append(_read_status())
+        await asyncio.gather(*readers)
+        rc = await proc.wait()
+        self._progress(job, base + span, phase="running")
+        return rc
+
+    async def _execute(self, job: Dict[str, Any]):
+        steps: List[Step] = job["_argv"]
+        for i, step in enumerate(steps):
+            argv, check = _step_argv(step), not isinstance(step, dict) or step.get("check", True)
+            await self._wait_lock(job)
+            rc = await self._run_step(job, argv, i, len(steps))
+            job["returncode"] = rc
+            if rc != 0:
+                if not check:
+                    self._log(job, f"Aviso: '{' '.join(argv)}' terminou com código {rc} (ignorado)")
+                    continue
+                raise RuntimeError(f"'{' '.join(argv)}' terminou com código {rc}")
+
+    async def _run(self):
+        while True:
+            job_id = await self._queue.get()
+            job = self.jobs.get(job_id)
+            if job is None or job["status"] != "queued":
+                continue
+            self.current = job_id
+            job.update({"status": "running", "phase": "starting", "started_at": datetime.now().isoformat()})
+            job["_channel"].publish("status", {"status": "running", "phase": "starting"})
+            try:
+                await self._execute(job)
+                self._finish(job, "completed", None)
+            except asyncio.CancelledError:
+                self._finish(job, "canceled", "Serviço encerrado")
+                raise
+            except Exception as e:
+                self._finish(job, "error", str(e))
+            finally:
+                self.current = None
+                self._evict()
+
+
+apt_jobs = AptJobQueue(lock_timeout=settings.apt_lock_timeout)
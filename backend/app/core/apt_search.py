@@ -0,0 +1,334 @@
+"""
+Índice local de busca de pacotes (substitui 'apt search').
+
+Fontes: /var/lib/apt/lists/*_Packages* (nome, versão, seção, descrição curta
+e longa), *_i18n_Translation-* (descrições longas, quando o repositório as
+separa) e /var/lib/dpkg/status (pacotes instalados fora dos repositórios).
+Listas comprimidas (.gz/.xz/.bz2) são lidas com a stdlib; outros formatos
+(.lz4, .zst) via 'apt-helper cat-file'.
+
+- Incremental: cada arquivo é reparseado só quando mtime/tamanho mudam; os
+  demais reaproveitam os registros já tokenizados e apenas a junção final é
+  refeita.
+- Memória limitada: strings internadas, descrições longas guardadas apenas
+  como tokens (listas invertidas em array('I')), nomes em um único blob para
+  busca por substring.
+- Busca: nome exato > prefixo do nome > substring do nome, somado à
+  correspondência de tokens (todos os termos precisam casar; o último termo
+  casa por prefixo, para busca enquanto digita). Nome/descrição curta pesam
+  mais que a descrição longa.
+"""
+import bisect
+import bz2
+import gzip
+import heapq
+import lzma
+import os
+import re
+import subprocess
+import sys
+import threading
+import time
+from array import array
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from app.core.apt import APT_LISTS_DIR, compare_versions
+from app.core.dpkg import DPKG_STATUS, dpkg_status
+
+APT_HELPER = "/usr/lib/apt/apt-helper"
+# Intervalo mínimo entre verificações das listas (s)
+CHECK_INTERVAL = 2.0
+# Tamanho mínimo da consulta para busca por substring no nome
+SUBSTRING_MIN = 3
+
+SCORE_EXACT = 100
+SCORE_PREFIX = 50
+SCORE_SUBSTRING = 20
+SCORE_STRONG = 5
+SCORE_WEAK = 1
+
+_TOKEN = re.compile(r"[a-z0-9][a-z0-9+]*")
+_intern = sys.intern
+
+# (nome, versão, seção, descrição curta, tokens fortes, tokens fracos)
+Record = Tuple[str, Optional[str], Optional[str], Optional[str], Tuple[str, ...], Tuple[str, ...]]
+
+
+def tokenize(text: str) -> List[str]:
+    return [t for t in _TOKEN.findall(text.lower()) if len(t) > 1 or t.isdigit()]
+
+
+def _token_set(text: str) -> Tuple[str, ...]:
+    return tuple(_intern(t) for t in set(tokenize(text)))
+
+
+def read_list(path: str) -> str:
+    if path.endswith(".gz"):
+        with gzip.open(path, "rt", encoding="utf-8", errors="replace") as f:
+            return f.read()
+    if path.endswith(".xz"):
+        with lzma.open(path, "rt", encoding="utf-8", errors="replace") as f:
+            return f.read()
+    if path.endswith(".bz2"):
+        with bz2.open(path, "rt", encoding="utf-8", errors="replace") as f:
+            return f.read()
+    if path.endswith((".lz4", ".zst")):
+        result = subprocess.run([APT_HELPER, "cat-file", path], capture_output=True, timeout=60)
+        return result.stdout.decode("utf-8", errors="replace")
+    with open(path, "r", encoding="utf-8", errors="replace") as f:
+        return f.read()
+
+
+def parse_list(text: str, translation: bool = False) -> List[Record]:
+    records: List[Record] = []
+    for para in text.split("\n\n"):
+        name = version = section = synopsis = None
+        long_lines: List[str] = []
+        in_desc = False
+        for line in para.split("\n"):
+            if not line:
+                continue
+            if line[0] in " \t":
+                if in_desc:
+                    long_lines.append(line)
+                continue
+            field, _, value = line.partition(":")
+            in_desc = False
+            if field == "Package":
+                name = value.strip()
+            elif field == "Version":
+                version = value.strip()
+            elif field == "Section":
+                section = value.strip()
+            elif field == "Description" or field.startswith("Description-") and not field.endswith("md5"):
+                synopsis = value.strip()
+                in_desc = True
+        if not name:
+            continue
+        strong = () if translation else _token_set(name + " " + (synopsis or ""))
+        weak = _token_set("\n".join(long_lines) + (" " + synopsis if translation and synopsis else ""))
+        records.append((
+            _intern(name),
+            version,
+            _intern(section) if section else None,
+            None if translation else synopsis,
+            strong,
+            weak,
+        ))
+    return records
+
+
+def _postings(groups: Dict[str, List[int]]) -> Dict[str, array]:
+    return {token: array("I", ids) for token, ids in groups.items()}
+
+
+class _Index:
+    """Snapshot imutável do índice (trocado por referência a cada rebuild)."""
+
+    __slots__ = ("names", "ids", "versions", "sections", "synopsis", "strong", "weak",
+                 "tokens", "blob", "offsets", "built_at")
+
+    def __init__(self, best: Dict[str, Record], extra_weak: Dict[str, Set[str]]):
+        self.names: List[str] = sorted(best)
+        self.ids: Dict[str, int] = {n: i for i, n in enumerate(self.names)}
+        self.versions: List[Optional[str]] = []
+        self.sections: List[Optional[str]] = []
+        self.synopsis: List[Optional[str]] = []
+        strong: Dict[str, List[int]] = {}
+        weak: Dict[str, List[int]] = {}
+        for i, name in enumerate(self.names):
+            _, version, section, synopsis, s_tokens, w_tokens = best[name]
+            self.versions.append(version)
+            self.sections.append(section)
+            self.synopsis.append(synopsis)
+            for t in s_tokens:
+                strong.setdefault(t, []).append(i)
+            for t in set(w_tokens).union(extra_weak.get(name, ())).difference(s_tokens):
+                weak.setdefault(t, []).append(i)
+        self.strong = _postings(strong)
+        self.weak = _postings(weak)
+        self.tokens: List[str] = sorted(set(strong) | set(weak))
+        # Blob "\nnome1\nnome2\n..." para substring; offsets[i] = início do nome i
+        self.blob = "\n" + "\n".join(self.names) + "\n"
+        offsets = array("I")
+        pos = 1
+        for name in self.names:
+            offsets.append(pos)
+            pos += len(name) + 1
+        self.offsets = offsets
+        self.built_at = time.time()
+
+    def _name_scores(self, q: str, scores: Dict[int, int]):
+        i = self.ids.get(q)
+        if i is not None:
+            scores[i] = scores.get(i, 0) + SCORE_EXACT
+        lo = bisect.bisect_left(self.names, q)
+        hi = bisect.bisect_left(self.names, q + "\uffff", lo)
+        for i in range(lo, hi):
+            scores[i] = scores.get(i, 0) + SCORE_PREFIX
+        if len(q) < SUBSTRING_MIN or "\n" in q:
+            return
+        blob, offsets = self.blob, self.offsets
+        pos = blob.find(q)
+        while pos != -1:
+            i = bisect.bisect_right(offsets, pos) - 1
+            if not (lo <= i < hi):
+                scores[i] = scores.get(i, 0) + SCORE_SUBSTRING
+            # pula para o próximo nome (um acerto por nome)
+            nxt = blob.find("\n", pos)
+            pos = blob.find(q, nxt)
+
+    def _term_scores(self, term: str, prefix: bool, within: Optional[Dict[int, int]] = None) -> Dict[int, int]:
+        """Pontuação por pacote de um termo; no prefixo, a união de todos os tokens do intervalo.
+
+        As listas invertidas são unidas como conjuntos (laço em C), então
+        prefixos curtos não precisam ser cortados; 'within' restringe aos
+        pacotes que já casaram com os termos anteriores.
+        """
+        terms = [term]
+        if prefix:
+            lo = bisect.bisect_left(self.tokens, term)
+            hi = bisect.bisect_left(self.tokens, term + "\uffff", lo)
+            terms = self.tokens[lo:hi] or terms
+        strong = set().union(*(self.strong.get(t, ()) for t in terms))
+        weak = set().union(*(self.weak.get(t, ()) for t in terms))
+        if within is not None:
+            strong.intersection_update(within)
+            weak.intersection_update(within)
+        out = dict.fromkeys(weak, SCORE_WEAK)
+        out.update(dict.fromkeys(strong, SCORE_STRONG))
+        return out
+
+    def search(self, query: str, offset: int, limit: int) -> Tuple[int, List[int]]:
+        q = query.strip().lower()
+        if not q:
+            return 0, []
+        scores: Dict[int, int] = {}
+        # "php fpm" também procura o nome "php-fpm"
+        self._name_scores(q.replace(" ", "-"), scores)
+        terms = tokenize(q)
+        if terms:
+            matched: Optional[Dict[int, int]] = None
+            for n, term in enumerate(terms):
+                cur = self._term_scores(term, prefix=(n == len(terms) - 1), within=matched)
+                if matched is None:
+                    matched = cur
+                else:
+                    matched = {i: s + cur[i] for i, s in matched.items() if i in cur}
+                if not matched:
+                    break
+            for i, s in (matched or {}).items():
+                scores[i] = scores.get(i, 0) + s
+        names = self.names
+        top = heapq.nsmallest(offset + limit, scores.items(), key=lambda kv: (-kv[1], len(names[kv[0]]), names[kv[0]]))
+        return len(scores), [i for i, _ in top[offset:]]
+
+
+class PackageSearchIndex:
+    def __init__(self, lists_dir: str = APT_LISTS_DIR, status_path: str = DPKG_STATUS):
+        self.lists_dir = lists_dir
+        self.status_path = status_path
+        self._lock = threading.Lock()
+        self._files: Dict[str, Tuple[Tuple[int, int], List[Record]]] = {}
+        self._index: Optional[_Index] = None
+        self._checked = 0.0
+        self.generation = 0
+
+    def _sources(self) -> Dict[str, Tuple[int, int]]:
+        found: Dict[str, Tuple[int, int]] = {}
+        try:
+            with os.scandir(self.lists_dir) as it:
+                for entry in it:
+                    if not entry.is_file() or ("_Packages" not in entry.name and "_i18n_Translation-" not in entry.name):
+                        continue
+                    st = entry.stat()
+                    found[entry.path] = (st.st_mtime_ns, st.st_size)
+        except OSError:
+            pass
+        try:
+            st = os.stat(self.status_path)
+            found[self.status_path] = (st.st_mtime_ns, st.st_size)
+        except OSError:
+            pass
+        return found
+
+    def refresh(self, force: bool = False) -> _Index:
+        """Reindexa arquivos novos/alterados; devolve o índice atual."""
+        now = time.monotonic()
+        if self._index is not None and not force and now - self._checked < CHECK_INTERVAL:
+            return self._index
+        if self._index is not None and not self._lock.acquire(blocking=False):
+            # rebuild em andamento em outra thread: responde com o índice anterior
+            return self._index
+        if self._index is None:
+            self._lock.acquire()
+        try:
+            self._checked = now
+            sources = self._sources()
+            if self._index is not None and not force and all(
+                self._files.get(p, (None,))[0] == stamp for p, stamp in sources.items()
+            ) and len(sources) == len(self._files):
+                return self._index
+            files: Dict[str, Tuple[Tuple[int, int], List[Record]]] = {}
+            for path, stamp in sources.items():
+                cached = self._files.get(path)
+                if cached is not None and cached[0] == stamp and not force:
+                    files[path] = cached
+                    continue
+                try:
+                    text = read_list(path)
+                except (OSError, subprocess.SubprocessError):
+                    continue
+                files[path] = (stamp, parse_list(text, translation="_i18n_Translation-" in path))
+            best: Dict[str, Record] = {}
+            extra_weak: Dict[str, Set[str]] = {}
+            for path, (_, records) in files.items():
+                for rec in records:
+                    name = rec[0]
+                    if rec[1] is None and rec[3] is None:
+                        # registro de Translation: só acrescenta tokens
+                        extra_weak.setdefault(name, set()).update(rec[5])
+                        continue
+                    cur = best.get(name)
+                    if cur is None or (rec[1] and cur[1] and compare_versions(rec[1], cur[1]) > 0):
+                        best[name] = rec
+            self._files = files
+            self._index = _Index(best, extra_weak)
+            self.generation += 1
+            return self._index
+        finally:
+            self._lock.release()
+
+    def warm(self):
+        """Constrói o índice em background (chamado no startup)."""
+        threading.Thread(target=self.refresh, name="apt-search-index", daemon=True).start()
+
+    def search(self, query: str, offset: int = 0, limit: int = 50) -> Dict[str, Any]:
+        index = self.refresh()
+        total, ids = index.search(query, offset, limit)
+        packages = []
+        for i in ids:
+            name = index.names[i]
+            installed = dpkg_status.installed_version(name)
+            packages.append({
+                "name": name,
+                "version": index.versions[i],
+                "section": index.sections[i],
+                "description": index.synopsis[i] or "",
+                "installed": installed is not None,
+                "installed_version": installed,
+            })
+        return {"packages": packages, "total": total, "offset": offset, "limit": limit}
+
+    def stats(self) -> Dict[str, Any]:
+        index = self.refresh()
+        return {
+            "packages": len(index.names),
+            "tokens": len(index.tokens),
+            "files": len(self._files),
+            "generation": self.generation,
+            "built_at": index.built_at,
+        }
+
+
+package_search = PackageSearchIndex()
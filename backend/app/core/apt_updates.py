@@ -0,0 +1,208 @@
+"""
+Lista de atualizações do APT mantida em cache.
+
+- refresh(): 'apt-get update' enfileirado no apt_jobs (mesma fila e espera
+  pelo lock do dpkg das demais operações), seguido do recálculo da lista.
+  Pedidos simultâneos recebem a mesma task (coalescência).
+- A lista (pacotes instalados com candidato mais novo) é calculada com o
+  AptPolicyResolver, o que também dá a origem de cada candidato para
+  classificar a atualização (security, updates, backports, proposed, other).
+- snapshot() responde na hora com a última lista e 'last_refreshed'; se o
+  dpkg ou as listas mudaram desde o último cálculo (só stat dos arquivos, sem
+  reindexar o dpkg no event loop), um recálculo local (sem rede) é agendado
+  em background.
+- Com APT_REFRESH_INTERVAL > 0, start() agenda refreshes periódicos.
+"""
+import asyncio
+import os
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.core.apt import APT_LISTS_DIR, apt_policy
+from app.core.apt_jobs import apt_command, apt_jobs
+from app.core.config import settings
+from app.core.dpkg import dpkg_status
+
+UPDATE_SUCCESS_STAMP = "/var/lib/apt/periodic/update-success-stamp"
+OUTPUT_TAIL = 50
+
+
+def parse_origin(origin: str) -> Dict[str, Optional[str]]:
+    """'http://host/debian bookworm-security/main amd64 Packages' -> url, suite, component."""
+    parts = origin.split()
+    if not parts or not parts[0].startswith(("http://", "https://", "file:", "cdrom:", "ftp://", "mirror")):
+        return {"url": parts[0] if parts else None, "suite": None, "component": None}
+    suite, _, component = (parts[1] if len(parts) > 1 else "").partition("/")
+    return {"url": parts[0], "suite": suite or None, "component": component or None}
+
+
+def classify(origins: List[Dict[str, Optional[str]]]) -> str:
+    """Classe da atualização pela suíte/URL de origem do candidato."""
+    suites = [(o.get("suite") or "").lower() for o in origins]
+    urls = [(o.get("url") or "").lower() for o in origins]
+    # Debian antigo publicava segurança como "<suite>/updates/main"
+    legacy = any((o.get("component") or "").startswith("updates/") for o in origins)
+    if legacy or any(s.endswith("-security") for s in suites) or any("security" in u for u in urls):
+        return "security"
+    if any(s.endswith("-backports") for s in suites):
+        return "backports"
+    if any(s.endswith("-proposed") for s in suites):
+        return "proposed"
+    if any(s.endswith("-updates") for s in suites):
+        return "updates"
+    return "other"
+
+
+def lists_age() -> Optional[float]:
+    """Segundos desde o último 'apt-get update' bem-sucedido (None se nunca rodou)."""
+    stamps = []
+    for path in (UPDATE_SUCCESS_STAMP, APT_LISTS_DIR):
+        try:
+            stamps.append(os.stat(path).st_mtime)
+        except OSError:
+            continue
+    return max(0.0, time.time() - max(stamps)) if stamps else None
+
+
+def lists_stale(max_age: float) -> bool:
+    age = lists_age()
+    return age is None or age > max_age
+
+
+def _iso_mtime(path: str) -> Optional[str]:
+    try:
+        return datetime.fromtimestamp(os.stat(path).st_mtime).isoformat()
+    except OSError:
+        return None
+
+
+class AptUpdates:
+    def __init__(self, interval: float = 0.0, timeout: float = 600.0):
+        self.interval = interval
+        self.timeout = timeout
+        self.updates: List[Dict[str, Any]] = []
+        self.last_refreshed: Optional[str] = _iso_mtime(UPDATE_SUCCESS_STAMP) or _iso_mtime(APT_LISTS_DIR)
+        self.last_checked: Optional[str] = None
+        self.last_error: Optional[str] = None
+        self.last_output: List[str] = []
+        self._stamp: Optional[Tuple[int, ...]] = None
+        self._refresh_task: Optional[asyncio.Task] = None
+        self._scan_task: Optional[asyncio.Task] = None
+        self._schedule_task: Optional[asyncio.Task] = None
+
+    @property
+    def refreshing(self) -> bool:
+        return self._refresh_task is not None and not self._refresh_task.done()
+
+    # ---- cálculo da lista ----------------------------------------------------
+
+    def compute(self) -> Tuple[Tuple[int, ...], List[Dict[str, Any]]]:
+        """Pacotes instalados com candidato mais novo (bloqueante: rodar em thread)."""
+        stamp = apt_policy.quick_stamp()
+        names = dpkg_status.names()
+        policies = apt_policy.resolve(names)
+        updates: List[Dict[str, Any]] = []
+        for name in names:
+            info = policies[name]
+            if not info["upgradable"]:
+                continue
+            candidate = next((v for v in info["versions"] if v["version"] == info["candidate"]), None)
+            origins = [parse_origin(o) for o in (candidate or {}).get("origins", [])]
+            origins = [o for o in origins if o["suite"]] or origins
+            first = origins[0] if origins else {}
+            kind = classify(origins)
+            updates.append({
+                "name": name,
+                "current_version": info["installed"],
+                "new_version": info["candidate"],
+                "origin": first.get("url"),
+                "suite": first.get("suite"),
+                "component": first.get("component"),
+                "classification": kind,
+                "security": kind == "security",
+            })
+        return stamp, updates
+
+    async def _scan(self):
+        try:
+            self._stamp, self.updates = await asyncio.to_thread(self.compute)
+            self.last_checked = datetime.now().isoformat()
+        except Exception as e:
+            self.last_error = str(e)
+
+    # ---- apt-get update --------------------------------------------------------
+
+    async def _refresh(self) -> Dict[str, Any]:
+        self.last_error = None
+        lines: List[str] = []
+        try:
+            # Pela fila do apt_jobs: não disputa o lock com install/upgrade em
+            # andamento e herda DPkg::Lock::Timeout e a espera pelo lock do dpkg
+            job = apt_jobs.submit("update", [apt_command("update")], label="apt-get update")
+            try:
+                final = await asyncio.wait_for(apt_jobs.wait(job["id"]), timeout=self.timeout)
+            except asyncio.TimeoutError:
+                raise RuntimeError(f"apt-get update excedeu {self.timeout:.0f}s")
+            lines = apt_jobs.output(job["id"]).splitlines()
+            self.last_output = lines[-OUTPUT_TAIL:]
+            if final is None or final["status"] != "completed":
+                raise RuntimeError((final or {}).get("error") or "apt-get update não concluído")
+            self.last_refreshed = datetime.now().isoformat()
+        except Exception as e:
+            self.last_error = str(e)
+        apt_policy.invalidate()
+        await self._scan()
+        return {"success": self.last_error is None, "error": self.last_error, "output": "\n".join(lines)}
+
+    def refresh(self) -> asyncio.Task:
+        """Inicia (ou reaproveita) o refresh em andamento."""
+        if not self.refreshing:
+            self._refresh_task = asyncio.create_task(self._refresh())
+        return self._refresh_task
+
+    # ---- leitura -------------------------------------------------------------
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Última lista calculada; agenda recálculo local se dpkg/listas mudaram."""
+        scanning = self._scan_task is not None and not self._scan_task.done()
+        if not self.refreshing and not scanning and self._stamp != apt_policy.quick_stamp():
+            self._scan_task = asyncio.create_task(self._scan())
+            scanning = True
+        return {
+            "updates": self.updates,
+            "total_count": len(self.updates),
+            "security_count": sum(1 for u in self.updates if u["security"]),
+            "last_refreshed": self.last_refreshed,
+            "last_checked": self.last_checked,
+            "refreshing": self.refreshing,
+            "stale": scanning,
+            "error": self.last_error,
+        }
+
+    # ---- agendamento -----------------------------------------------------------
+
+    async def _schedule(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.refresh()
+            except Exception:
+                pass
+
+    def start(self):
+        if self.interval > 0 and self._schedule_task is None:
+            self._schedule_task = asyncio.create_task(self._schedule())
+
+    async def stop(self):
+        for task in (self._schedule_task, self._refresh_task, self._scan_task):
+            if task is not None and not task.done():
+                task.cancel()
+                try:
+                    await task
+                except (asyncio.CancelledError, Exception):
+                    pass
+        self._schedule_task = None
+
+
+apt_updates = AptUpdates(interval=settings.apt_refresh_interval, timeout=settings.apt_update_timeout)
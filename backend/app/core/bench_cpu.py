@@ -0,0 +1,266 @@
+"""
+Suíte de benchmark de CPU com várias cargas e curva de escalabilidade.
+
+Cada carga (workload) é uma função sem argumentos que executa uma unidade de
+trabalho (hash de 64 KiB, compressão de um bloco, JSON ida e volta...). O
+trabalho roda em lotes calibrados: o tamanho do lote é dobrado até um lote
+levar ~50 ms, e o relógio só é consultado entre lotes, então o overhead do
+timer e do laço Python fica desprezível.
+
+Cada carga roda com 1, 2, 4 … N processos (N = núcleos lógicos, ou 'threads'),
+gerando ops/s, speedup e eficiência (speedup / workers) por ponto da curva.
+
+Novas cargas podem ser registradas com @workload("nome", "unidade").
+"""
+import hashlib
+import json
+import lzma
+import os
+import random
+import time
+import zlib
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_EXCEPTION
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+try:
+    import numpy as np  # type: ignore
+    _numpy_available = True
+except Exception:
+    np = None
+    _numpy_available = False
+
+try:
+    from threadpoolctl import threadpool_limits  # type: ignore
+except Exception:
+    threadpool_limits = None
+
+CALIBRATION_TARGET = 0.05  # segundos por lote
+
+WORKLOADS: Dict[str, Dict[str, Any]] = {}
+
+# Definidos nos processos filhos pelo initializer do pool
+_cancel_event = None
+_blas_limits = None
+
+
+def workload(name: str, unit: str, available: bool = True):
+    """Registra uma fábrica de carga; a fábrica roda no processo filho e devolve op()."""
+    def deco(factory: Callable[[], Callable[[], Any]]):
+        if available:
+            WORKLOADS[name] = {"factory": factory, "unit": unit}
+        return factory
+    return deco
+
+
+def _payload(size: int, seed: int = 42) -> bytes:
+    """Dados semi-compressíveis (texto com variação), determinísticos."""
+    rnd = random.Random(seed)
+    words = [b"server", b"admin", b"kernel", b"packet", b"disk", b"cache", b"thread", b"queue"]
+    out = bytearray()
+    while len(out) < size:
+        out += rnd.choice(words) + str(rnd.randint(0, 9999)).encode() + b" "
+    return bytes(out[:size])
+
+
+@workload("sha256", "hashes de 64 KiB")
+def _sha256():
+    data = _payload(64 * 1024)
+    h = hashlib.sha256
+    return lambda: h(data).digest()
+
+
+@workload("zlib", "compressões de 64 KiB (nível 6)")
+def _zlib():
+    data = _payload(64 * 1024)
+    return lambda: zlib.compress(data, 6)
+
+
+@workload("lzma", "compressões de 16 KiB (preset 1)")
+def _lzma():
+    data = _payload(16 * 1024)
+    return lambda: lzma.compress(data, preset=1)
+
+
+@workload("json", "encode+decode de documento com 200 itens")
+def _json():
+    rnd = random.Random(7)
+    doc = [
+        {"id": i, "name": f"pkg-{i}", "version": f"{rnd.randint(0, 9)}.{rnd.randint(0, 99)}",
+         "size": rnd.random() * 1e6, "tags": ["a", "b", "c"][: rnd.randint(1, 3)], "ok": i % 2 == 0}
+        for i in range(200)
+    ]
+    dumps, loads = json.dumps, json.loads
+    return lambda: loads(dumps(doc))
+
+
+@workload("bigint", "exponenciações modulares de 2048 bits")
+def _bigint():
+    rnd = random.Random(3)
+    base = rnd.getrandbits(2048)
+    exp = rnd.getrandbits(256)
+    mod = rnd.getrandbits(2048) | 1
+    return lambda: pow(base, exp, mod)
+
+
+@workload("numpy_matmul", "multiplicações de matrizes 128x128 float64", available=_numpy_available)
+def _numpy_matmul():
+    rng = np.random.default_rng(1)
+    a = rng.random((128, 128))
+    b = rng.random((128, 128))
+    return lambda: a @ b
+
+
+def init_worker(cancel_event=None):
+    """Initializer do pool: evento de cancelamento e BLAS com uma thread por processo.
+
+    O NumPy já foi importado (no processo pai, antes do fork, ou ao importar
+    este módulo), então variáveis como OPENBLAS_NUM_THREADS não teriam mais
+    efeito: o limite é aplicado em tempo de execução com threadpoolctl. Sem
+    threadpoolctl instalado, o BLAS usa o padrão da biblioteca e o ponto
+    numpy_matmul da curva pode usar mais de um núcleo por worker.
+    """
+    global _cancel_event, _blas_limits
+    _cancel_event = cancel_event
+    if threadpool_limits is not None and _blas_limits is None:
+        try:
+            _blas_limits = threadpool_limits(limits=1, user_api="blas")
+        except Exception:
+            _blas_limits = None
+
+
+def _cancelled() -> bool:
+    return _cancel_event is not None and _cancel_event.is_set()
+
+
+def calibrate(name: str, target: float = CALIBRATION_TARGET) -> int:
+    """Tamanho de lote para que um lote da carga leve ~'target' segundos."""
+    op = WORKLOADS[name]["factory"]()
+    op()  # aquecimento
+    batch = 1
+    while True:
+        t0 = time.perf_counter()
+        for _ in range(batch):
+            op()
+        if time.perf_counter() - t0 >= target or batch >= 1 << 24:
+            return batch
+        batch *= 2
+
+
+def run_step(name: str, batch: int, start_at: float, duration: float) -> Tuple[int, float]:
+    """Executado no processo filho: lotes até 'duration' segundos. Retorna (ops, segundos)."""
+    op = WORKLOADS[name]["factory"]()
+    delay = start_at - time.monotonic()
+    if delay > 0:
+        time.sleep(delay)  # todos os workers do passo começam juntos
+    ops = 0
+    t0 = time.perf_counter()
+    end = t0 + duration
+    while True:
+        for _ in range(batch):
+            op()
+        ops += batch
+        t = time.perf_counter()
+        if t >= end or _cancelled():
+            return ops, t - t0
+
+
+def worker_counts(max_workers: int) -> List[int]:
+    """1, 2, 4 … até max_workers (inclusive, mesmo se não for potência de 2)."""
+    counts = []
+    n = 1
+    while n < max_workers:
+        counts.append(n)
+        n *= 2
+    counts.append(max_workers)
+    return counts
+
+
+def run_suite(
+    duration: float = 10,
+    max_workers: Optional[int] = None,
+    workloads: Optional[List[str]] = None,
+    executor: Optional[ProcessPoolExecutor] = None,
+    cancel_event: Any = None,
+    should_cancel: Optional[Callable[[], bool]] = None,
+    progress: Optional[Callable[[float, Dict[str, Any]], None]] = None,
+) -> Dict[str, Any]:
+    """Roda a suíte inteira dentro de ~'duration' segundos.
+
+    'executor' deve ter pelo menos max_workers processos e ter sido criado com
+    initializer=init_worker (initargs=(cancel_event,)); sem ele, um pool é
+    criado para a execução. 'should_cancel' é consultado no processo pai e
+    aciona 'cancel_event', que os filhos checam a cada lote.
+    """
+    max_workers = max(1, int(max_workers or os.cpu_count() or 1))
+    names = [w for w in (workloads or list(WORKLOADS)) if w in WORKLOADS]
+    if not names:
+        raise ValueError("Nenhuma carga de CPU válida selecionada")
+    counts = worker_counts(max_workers)
+    steps = len(names) * len(counts)
+    step_seconds = max(0.3, float(duration) / steps)
+
+    own_pool = executor is None
+    if own_pool:
+        import multiprocessing as mp
+        cancel_event = cancel_event or mp.get_context().Event()
+        executor = ProcessPoolExecutor(max_workers=max_workers, initializer=init_worker, initargs=(cancel_event,))
+
+    def _wait(futures):
+        pending = set(futures)
+        while pending:
+            done, pending = wait(pending, timeout=0.25, return_when=FIRST_EXCEPTION)
+            for f in done:
+                if f.exception() is not None:
+                    raise f.exception()
+            if should_cancel is not None and cancel_event is not None and should_cancel():
+                cancel_event.set()
+        return [f.result() for f in futures]
+
+    results: Dict[str, Any] = {}
+    t_start = time.monotonic()
+    done_steps = 0
+    try:
+        for name in names:
+            batch = _wait([executor.submit(calibrate, name)])[0]
+            curve = []
+            single = None
+            for n in counts:
+                if cancel_event is not None and cancel_event.is_set():
+                    break
+                start_at = time.monotonic() + 0.1
+                parts = _wait([executor.submit(run_step, name, batch, start_at, step_seconds) for _ in range(n)])
+                ops_per_sec = sum(ops / sec for ops, sec in parts if sec > 0)
+                if single is None:
+                    single = ops_per_sec
+                speedup = ops_per_sec / single if single else 0.0
+                curve.append({
+                    "workers": n,
+                    "ops_per_sec": round(ops_per_sec, 2),
+                    "speedup": round(speedup, 3),
+                    "efficiency": round(speedup / n, 3),
+                })
+                done_steps += 1
+                if progress:
+                    progress(done_steps / steps * 100.0, {"workload": name, "workers": n, "ops_per_sec": round(ops_per_sec, 2)})
+            results[name] = {
+                "unit": WORKLOADS[name]["unit"],
+                "batch": batch,
+                "curve": curve,
+                "single_ops_per_sec": curve[0]["ops_per_sec"] if curve else None,
+                "max_ops_per_sec": max((p["ops_per_sec"] for p in curve), default=None),
+                "scaling_efficiency": curve[-1]["efficiency"] if curve else None,
+            }
+    finally:
+        if own_pool:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+    sha = results.get("sha256", {}).get("curve") or []
+    return {
+        "type": "cpu",
+        "workers": max_workers,
+        "duration": round(time.monotonic() - t_start, 2),
+        "step_seconds": round(step_seconds, 3),
+        "workloads": results,
+        # Compatibilidade: throughput de SHA-256 com todos os workers
+        "ops_per_sec": sha[-1]["ops_per_sec"] if sha else None,
+    }
@@ -0,0 +1,339 @@
+"""
+Benchmark de disco com vários modos, sempre sobre um arquivo temporário local.
+
+Modos:
+- seq: escrita sequencial de blocos de 1 MiB (fsync no fim) e leitura de volta
+  sem o page cache.
+- randread / randwrite: IOPS de blocos de 4 KiB (block_size) em offsets
+  aleatórios, com 'queue_depth' threads fazendo pread/pwrite em paralelo.
+- fsync: latência de escrita de um bloco + fdatasync por operação.
+- mmap: leitura do arquivo mapeado em memória, em pedaços de 1 MiB.
+
+Para não medir a RAM, as leituras usam O_DIRECT (buffers alinhados via mmap)
+quando o sistema de arquivos aceita; senão, posix_fadvise(DONTNEED) antes de
+cada fase. Latências vão para um LatencyHistogram (p50/p95/p99/max em µs).
+"""
+import mmap
+import os
+import random
+import tempfile
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from app.core.histogram import LatencyHistogram
+
+MODES = ("seq", "randread", "randwrite", "fsync", "mmap")
+MB = 1024 * 1024
+_O_DIRECT = getattr(os, "O_DIRECT", 0)
+
+
+def _drop_cache(fd: int):
+    if hasattr(os, "posix_fadvise"):
+        try:
+            os.fdatasync(fd)
+            os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_DONTNEED)
+        except OSError:
+            pass
+
+
+def _aligned_buffer(size: int) -> mmap.mmap:
+    """Buffer anônimo alinhado à página (requisito do O_DIRECT)."""
+    buf = mmap.mmap(-1, size)
+    buf.write(os.urandom(min(size, 4096)) * (size // min(size, 4096)))
+    return buf
+
+
+def _open_direct(path: str, flags: int) -> Tuple[int, bool]:
+    """Abre com O_DIRECT se possível; devolve (fd, direct)."""
+    if _O_DIRECT:
+        try:
+            return os.open(path, flags | _O_DIRECT), True
+        except OSError:
+            pass  # tmpfs e alguns FUSE não suportam O_DIRECT
+    return os.open(path, flags), False
+
+
+class DiskBenchmark:
+    def __init__(
+        self,
+        size_mb: int = 256,
+        duration: float = 10,
+        queue_depth: int = 4,
+        block_size: int = 4096,
+        tmp_dir: Optional[str] = None,
+        direct: bool = True,
+        should_cancel: Optional[Callable[[], bool]] = None,
+        progress: Optional[Callable[[float, Dict[str, Any]], None]] = None,
+    ):
+        self.size_mb = max(16, min(int(size_mb), 4096))  # 16MB..4GB
+        # 'duration' é o orçamento total dos modos temporizados (random e fsync)
+        self.duration = max(1.0, float(duration))
+        self.mode_seconds = self.duration
+        self.queue_depth = max(1, min(int(queue_depth), 256))
+        # múltiplo de 512 (setor) para O_DIRECT
+        self.block_size = max(512, min(int(block_size), MB)) // 512 * 512
+        self.tmp_dir = tmp_dir or tempfile.gettempdir()
+        self.direct = direct
+        self.should_cancel = should_cancel or (lambda: False)
+        self.progress = progress
+        self.path = os.path.join(self.tmp_dir, f"serveradmin_bench_{os.getpid()}_{threading.get_ident()}.bin")
+
+    def _cancelled(self) -> bool:
+        return self.should_cancel()
+
+    def _report(self, pct: float, metrics: Dict[str, Any]):
+        if self.progress:
+            self.progress(round(min(100.0, pct), 1), metrics)
+
+    # ---- seq -------------------------------------------------------------
+
+    def _seq(self, base: float, span: float) -> Dict[str, Any]:
+        buf = _aligned_buffer(MB)
+        hist = LatencyHistogram()
+        fd = os.open(self.path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        t0 = time.perf_counter()
+        written = 0
+        try:
+            for i in range(self.size_mb):
+                if self._cancelled():
+                    break
+                s = time.perf_counter_ns()
+                os.write(fd, buf)
+                hist.record(time.perf_counter_ns() - s)
+                written += 1
+                if written % 16 == 0:
+                    self._report(base + span * 0.5 * written / self.size_mb, {"mode": "seq", "written_mb": written})
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+        write_sec = time.perf_counter() - t0
+
+        read = self._read_back(base + span * 0.5, span * 0.5)
+        buf.close()
+        return {
+            "size_mb": written,
+            "write_sec": round(write_sec, 3),
+            "write_mb_s": round(written / write_sec, 2) if write_sec > 0 else 0.0,
+            "write_latency_us": hist.summary(),
+            **read,
+        }
+
+    def _read_back(self, base: float, span: float) -> Dict[str, Any]:
+        fd, direct = _open_direct(self.path, os.O_RDONLY) if self.direct else (os.open(self.path, os.O_RDONLY), False)
+        if not direct:
+            _drop_cache(fd)
+        buf = _aligned_buffer(MB)
+        read_bytes = 0
+        t0 = time.perf_counter()
+        try:
+            while not self._cancelled():
+                n = os.preadv(fd, [buf], read_bytes)
+                if n <= 0:
+                    break
+                read_bytes += n
+                if (read_bytes // MB) % 16 == 0:
+                    self._report(base + span * read_bytes / (self.size_mb * MB), {"mode": "seq", "read_mb": read_bytes // MB})
+        finally:
+            os.close(fd)
+            buf.close()
+        read_sec = time.perf_counter() - t0
+        return {
+            "read_sec": round(read_sec, 3),
+            "read_mb_s": round(read_bytes / MB / read_sec, 2) if read_sec > 0 else 0.0,
+            "read_cache_bypass": "o_direct" if direct else ("fadvise" if hasattr(os, "posix_fadvise") else "none"),
+        }
+
+    # ---- random / fsync --------------------------------------------------
+
+    def _ensure_file(self):
+        """Arquivo com o tamanho total preenchido (não esparso) para leituras aleatórias."""
+        if os.path.exists(self.path) and os.path.getsize(self.path) >= self.size_mb * MB:
+            return
+        buf = os.urandom(MB)
+        with open(self.path, "wb") as f:
+            for _ in range(self.size_mb):
+                f.write(buf)
+            f.flush()
+            os.fsync(f.fileno())
+
+    def _random(self, write: bool, base: float, span: float) -> Dict[str, Any]:
+        self._ensure_file()
+        flags = os.O_RDWR if write else os.O_RDONLY
+        fd, direct = _open_direct(self.path, flags) if self.direct else (os.open(self.path, flags), False)
+        if not direct:
+            _drop_cache(fd)
+        blocks = (self.size_mb * MB) // self.block_size
+        per_mode = self.mode_seconds
+        stop = threading.Event()
+        hists: List[LatencyHistogram] = []
+        ops = [0] * self.queue_depth
+
+        def worker(slot: int):
+            hist = LatencyHistogram()
+            hists.append(hist)
+            buf = _aligned_buffer(max(self.block_size, mmap.PAGESIZE))
+            view = memoryview(buf)[: self.block_size]
+            rnd = random.Random(slot)
+            io = os.pwritev if write else os.preadv
+            n = 0
+            while not stop.is_set():
+                offset = rnd.randrange(blocks) * self.block_size
+                s = time.perf_counter_ns()
+                io(fd, [view], offset)
+                hist.record(time.perf_counter_ns() - s)
+                n += 1
+                if n & 63 == 0:
+                    ops[slot] = n
+            ops[slot] = n
+            view.release()
+            buf.close()
+
+        threads = [threading.Thread(target=worker, args=(i,), daemon=True) for i in range(self.queue_depth)]
+        t0 = time.perf_counter()
+        for t in threads:
+            t.start()
+        try:
+            while True:
+                elapsed = time.perf_counter() - t0
+                if elapsed >= per_mode or self._cancelled():
+                    break
+                time.sleep(0.25)
+                self._report(base + span * min(1.0, elapsed / per_mode), {
+                    "mode": "randwrite" if write else "randread",
+                    "iops": round(sum(ops) / max(elapsed, 1e-6), 1),
+                })
+        finally:
+            stop.set()
+            for t in threads:
+                t.join()
+            elapsed = time.perf_counter() - t0
+            if write:
+                os.fsync(fd)
+            os.close(fd)
+        total = LatencyHistogram()
+        for h in hists:
+            total.merge(h)
+        return {
+            "block_size": self.block_size,
+            "queue_depth": self.queue_depth,
+            "seconds": round(elapsed, 3),
+            "ops": total.count,
+            "iops": round(total.count / elapsed, 1) if elapsed > 0 else 0.0,
+            "mb_s": round(total.count * self.block_size / MB / elapsed, 2) if elapsed > 0 else 0.0,
+            "cache_bypass": "o_direct" if direct else "fadvise",
+            "latency_us": total.summary(),
+        }
+
+    def _fsync(self, base: float, span: float) -> Dict[str, Any]:
+        path = self.path + ".fsync"
+        fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        data = os.urandom(self.block_size)
+        sync = getattr(os, "fdatasync", os.fsync)
+        hist = LatencyHistogram()
+        t0 = time.perf_counter()
+        try:
+            while not self._cancelled():
+                elapsed = time.perf_counter() - t0
+                if elapsed >= self.mode_seconds:
+                    break
+                s = time.perf_counter_ns()
+                os.write(fd, data)
+                sync(fd)
+                hist.record(time.perf_counter_ns() - s)
+                if hist.count % 64 == 0:
+                    self._report(base + span * elapsed / self.mode_seconds, {"mode": "fsync", "ops": hist.count})
+        finally:
+            os.close(fd)
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+        elapsed = time.perf_counter() - t0
+        return {
+            "block_size": self.block_size,
+            "seconds": round(elapsed, 3),
+            "ops": hist.count,
+            "ops_per_sec": round(hist.count / elapsed, 1) if elapsed > 0 else 0.0,
+            "latency_us": hist.summary(),
+        }
+
+    def _mmap(self, base: float, span: float) -> Dict[str, Any]:
+        self._ensure_file()
+        hist = LatencyHistogram()
+        with open(self.path, "rb") as f:
+            _drop_cache(f.fileno())
+            size = os.fstat(f.fileno()).st_size
+            mm = mmap.mmap(f.fileno(), size, access=mmap.ACCESS_READ)
+            try:
+                if hasattr(mm, "madvise") and hasattr(mmap, "MADV_SEQUENTIAL"):
+                    mm.madvise(mmap.MADV_SEQUENTIAL)
+                view = memoryview(mm)
+                sink = bytearray(MB)
+                t0 = time.perf_counter()
+                pos = 0
+                while pos < size and not self._cancelled():
+                    s = time.perf_counter_ns()
+                    chunk = view[pos:pos + MB]
+                    sink[: len(chunk)] = chunk  # cópia força as page faults
+                    hist.record(time.perf_counter_ns() - s)
+                    pos += len(chunk)
+                    if hist.count % 16 == 0:
+                        self._report(base + span * pos / size, {"mode": "mmap", "read_mb": pos // MB})
+                elapsed = time.perf_counter() - t0
+                chunk = None
+                view.release()
+            finally:
+                mm.close()
+        return {
+            "read_mb": pos // MB,
+            "seconds": round(elapsed, 3),
+            "mb_s": round(pos / MB / elapsed, 2) if elapsed > 0 else 0.0,
+            "chunk_latency_us": hist.summary(),
+        }
+
+    # ---- orquestração ----------------------------------------------------
+
+    def run(self, modes: Optional[List[str]] = None) -> Dict[str, Any]:
+        modes = [m for m in (modes or MODES) if m in MODES] or ["seq"]
+        timed = sum(1 for m in modes if m in ("randread", "randwrite", "fsync"))
+        self.mode_seconds = max(1.0, self.duration / max(1, timed))
+        os.makedirs(self.tmp_dir, exist_ok=True)
+        results: Dict[str, Any] = {}
+        span = 100.0 / len(modes)
+        try:
+            for i, mode in enumerate(modes):
+                if self._cancelled():
+                    break
+                base = i * span
+                if mode == "seq":
+                    results[mode] = self._seq(base, span)
+                elif mode == "randread":
+                    results[mode] = self._random(False, base, span)
+                elif mode == "randwrite":
+                    results[mode] = self._random(True, base, span)
+                elif mode == "fsync":
+                    results[mode] = self._fsync(base, span)
+                elif mode == "mmap":
+                    results[mode] = self._mmap(base, span)
+        finally:
+            try:
+                os.remove(self.path)
+            except OSError:
+                pass
+        out: Dict[str, Any] = {
+            "type": "disk",
+            "size_mb": self.size_mb,
+            "tmp_dir": self.tmp_dir,
+            "modes": results,
+        }
+        # Compatibilidade com o formato anterior (modo sequencial)
+        seq = results.get("seq")
+        if seq:
+            for key in ("write_sec", "write_mb_s", "read_sec", "read_mb_s"):
+                out[key] = seq[key]
+        return out
+
+
+def run_disk_benchmark(modes: Optional[List[str]] = None, **kwargs) -> Dict[str, Any]:
+    return DiskBenchmark(**kwargs).run(modes)
@@ -0,0 +1,240 @@
+"""
+Benchmark de memória: largura de banda e latência por tamanho de working set.
+
+Roda em um processo filho (os buffers de vários GiB não ficam no processo da
+API) e produz curvas para o dashboard:
+
+- bandwidth: cópia (memcpy via memoryview) e, com NumPy, leitura (soma
+  vetorizada) para working sets de 32 KiB até 'size_mb', dobrando a cada
+  ponto. Os patamares da curva mostram L1/L2/L3/DRAM.
+- latency: pointer chasing em um ciclo aleatório (cada acesso depende do
+  anterior, então o prefetcher não ajuda). O laço é Python, por isso o custo
+  do interpretador é medido no menor working set e descontado (ns_adjusted).
+"""
+import multiprocessing as mp
+import os
+import queue as queue_mod
+import random
+import time
+from array import array
+from typing import Any, Callable, Dict, List, Optional
+
+try:
+    import numpy as np  # type: ignore
+    _numpy_available = True
+except Exception:
+    np = None
+    _numpy_available = False
+
+KB = 1024
+MB = 1024 * KB
+MIN_SIZE = 32 * KB
+CHASE_STEPS = 1 << 20
+MIN_CHASE_STEPS = 1 << 12
+# Fração de 'duration' de cada fase
+BANDWIDTH_SHARE = 0.6
+LATENCY_SHARE = 0.4
+
+
+def cache_sizes() -> Dict[str, Optional[int]]:
+    """Tamanhos de cache informados pelo sistema (bytes), para anotar o gráfico."""
+    out: Dict[str, Optional[int]] = {}
+    for key, name in (("l1d", "SC_LEVEL1_DCACHE_SIZE"), ("l2", "SC_LEVEL2_CACHE_SIZE"), ("l3", "SC_LEVEL3_CACHE_SIZE")):
+        try:
+            value = os.sysconf(name)
+            out[key] = value if value and value > 0 else None
+        except (ValueError, OSError, AttributeError):
+            out[key] = None
+    return out
+
+
+def sizes_up_to(max_bytes: int, start: int = MIN_SIZE) -> List[int]:
+    sizes = []
+    s = start
+    while s <= max_bytes:
+        sizes.append(s)
+        s *= 2
+    return sizes
+
+
+def _timed_reps(fn: Callable[[], Any], budget: float) -> float:
+    """Melhor tempo por repetição: calibra o nº de repetições e pega o melhor de 3."""
+    reps = 1
+    while True:
+        t0 = time.perf_counter()
+        for _ in range(reps):
+            fn()
+        dt = time.perf_counter() - t0
+        if dt >= budget / 4 or reps >= 1 << 20:
+            break
+        reps *= 2
+    best = dt / reps
+    for _ in range(2):
+        t0 = time.perf_counter()
+        for _ in range(reps):
+            fn()
+        best = min(best, (time.perf_counter() - t0) / reps)
+    return best
+
+
+def bandwidth_point(size: int, budget: float) -> Dict[str, Any]:
+    """Cópia de 'size' bytes (origem e destino com size/2 cada) e leitura de 'size' bytes."""
+    half = max(size // 2, 4 * KB)
+    src = bytearray(os.urandom(4 * KB)) * (half // (4 * KB))
+    dst = bytearray(len(src))
+    sv, dv = memoryview(src), memoryview(dst)
+
+    def copy():
+        dv[:] = sv
+
+    t = _timed_reps(copy, budget)
+    point: Dict[str, Any] = {"size_kb": size // KB, "copy_gb_s": round(len(src) / t / 1e9, 3)}
+    if _numpy_available:
+        a = np.frombuffer(src, dtype=np.uint64)
+        b = np.frombuffer(dst, dtype=np.uint64)
+        t = _timed_reps(lambda: (a.sum(), b.sum()), budget)
+        point["read_gb_s"] = round((a.nbytes + b.nbytes) / t / 1e9, 3)
+        del a, b
+    sv.release()
+    dv.release()
+    return point
+
+
+def _chase_ring(slots: int, seed: int = 1) -> Any:
+    """Permutação cíclica aleatória: ring[i] é o próximo índice do ciclo."""
+    if _numpy_available:
+        perm = np.random.default_rng(seed).permutation(slots).astype(np.int64)
+        nxt = np.empty(slots, dtype=np.int64)
+        nxt[perm] = np.roll(perm, -1)
+        del perm
+        # memoryview indexa devolvendo int Python, sem o custo de escalares NumPy
+        return memoryview(nxt)
+    order = list(range(slots))
+    random.Random(seed).shuffle(order)
+    ring = array("q", bytes(8 * slots))
+    for a, b in zip(order, order[1:] + order[:1]):
+        ring[a] = b
+    return ring
+
+
+def latency_point(size: int, steps: int = CHASE_STEPS, budget: Optional[float] = None) -> Dict[str, Any]:
+    """ns por acesso no anel de 'size' bytes.
+
+    Com 'budget' (s), o aquecimento também calibra: 'steps' passa a ser o nº de
+    acessos que cabe no budget (entre MIN_CHASE_STEPS e 'steps').
+    """
+    slots = max(2, size // 8)
+    ring = _chase_ring(slots)
+    i = 0
+    # aquecimento: percorre uma vez (até 'steps') para trazer as páginas
+    warm = max(1, min(slots, steps))
+    t0 = time.perf_counter()
+    for _ in range(warm):
+        i = ring[i]
+    if budget is not None:
+        per_access = (time.perf_counter() - t0) / warm
+        steps = max(MIN_CHASE_STEPS, min(steps, int(budget / max(per_access, 1e-9))))
+    t0 = time.perf_counter()
+    for _ in range(steps):
+        i = ring[i]
+    dt = time.perf_counter() - t0
+    return {"size_kb": size // KB, "ns_per_access": round(dt / steps * 1e9, 2)}
+
+
+def memory_child(params: Dict[str, Any], out: Any, cancel_event: Any = None):
+    """Corpo do processo filho: envia ('progress', pct, metrics) e ('result', dict) em 'out'."""
+    try:
+        max_bytes = max(MIN_SIZE, min(int(params.get("size_mb", 512)), 8192) * MB)
+        duration = max(1.0, float(params.get("duration", 10)))
+        bw_sizes = sizes_up_to(max_bytes)
+        # Latência vai até 256 MiB (sem NumPy o anel é montado em Python: limitar a 16 MiB)
+        lat_sizes = sizes_up_to(min(max_bytes, (256 if _numpy_available else 16) * MB), 16 * KB)
+        total = len(bw_sizes) + len(lat_sizes)
+        budget = duration * BANDWIDTH_SHARE / len(bw_sizes)
+        done = 0
+
+        bandwidth: List[Dict[str, Any]] = []
+        for size in bw_sizes:
+            if cancel_event is not None and cancel_event.is_set():
+                break
+            point = bandwidth_point(size, budget)
+            bandwidth.append(point)
+            done += 1
+            out.put(("progress", done / total * 100.0, {"phase": "bandwidth", **point}))
+
+        # Latência: a fase tem LATENCY_SHARE de 'duration'; cada ponto recebe
+        # uma fração do tempo restante e a varredura para quando ele acaba
+        latency: List[Dict[str, Any]] = []
+        deadline = time.monotonic() + duration * LATENCY_SHARE
+        last_elapsed = 0.0
+        for n, size in enumerate(lat_sizes):
+            if cancel_event is not None and cancel_event.is_set():
+                break
+            remaining = deadline - time.monotonic()
+            # o próximo anel tem o dobro do tamanho: custa ~2x o ponto anterior
+            if latency and remaining < last_elapsed * 2:
+                break
+            t0 = time.monotonic()
+            # metade do budget do ponto para o aquecimento, metade para a medição
+            point = latency_point(size, budget=max(remaining, 0.0) / (len(lat_sizes) - n) / 2)
+            last_elapsed = time.monotonic() - t0
+            latency.append(point)
+            done += 1
+            out.put(("progress", done / total * 100.0, {"phase": "latency", **point}))
+        if latency:
+            base = latency[0]["ns_per_access"]  # custo do interpretador com tudo em L1
+            for p in latency:
+                p["ns_adjusted"] = round(max(0.0, p["ns_per_access"] - base), 2)
+
+        largest = bandwidth[-1] if bandwidth else {}
+        out.put(("result", {
+            "type": "memory",
+            "size_mb": max_bytes // MB,
+            "duration": duration,
+            "caches": cache_sizes(),
+            "bandwidth": bandwidth,
+            "latency": latency,
+            # Compatibilidade: cópia no maior working set (DRAM), em MB/s
+            "mem_copy_mb_s": round(largest.get("copy_gb_s", 0.0) * 1e9 / MB, 2),
+        }))
+    except Exception as e:
+        out.put(("error", str(e)))
+
+
+def run_memory_benchmark(
+    params: Dict[str, Any],
+    should_cancel: Optional[Callable[[], bool]] = None,
+    progress: Optional[Callable[[float, Dict[str, Any]], None]] = None,
+    cancel_event: Any = None,
+) -> Dict[str, Any]:
+    """Executa memory_child em um processo dedicado e repassa o progresso.
+
+    O processo é criado por execução (e não tirado do pool do agendador) para
+    que os buffers grandes voltem ao sistema assim que ele termina.
+    """
+    ctx = mp.get_context()
+    out = ctx.Queue()
+    cancel_event = cancel_event if cancel_event is not None else ctx.Event()
+    proc = ctx.Process(target=memory_child, args=(params, out, cancel_event), daemon=True)
+    proc.start()
+    try:
+        while True:
+            if should_cancel is not None and should_cancel():
+                cancel_event.set()
+            try:
+                msg = out.get(timeout=0.5)
+            except queue_mod.Empty:
+                if not proc.is_alive():
+                    raise RuntimeError(f"Processo do benchmark de memória terminou (código {proc.exitcode})")
+                continue
+            if msg[0] == "progress":
+                if progress:
+                    progress(round(msg[1], 1), msg[2])
+            elif msg[0] == "result":
+                return msg[1]
+            else:
+                raise RuntimeError(msg[1])
+    finally:
+        proc.join(timeout=5)
+        if proc.is_alive():
+            proc.kill()
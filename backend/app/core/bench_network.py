@@ -0,0 +1,346 @@
+"""
+Benchmark da pilha de rede via loopback (ou um endereço local escolhido).
+
+Sobe servidores asyncio efêmeros (TCP sink/echo e UDP sink/echo) e mede:
+- tcp.throughput: 'streams' conexões enviando blocos de 'buffer_size' bytes
+- tcp.rtt: request/response de 'message_size' bytes em uma conexão
+- tcp.connect: taxa de abertura+fechamento de conexões e latência do handshake
+- udp.throughput: datagramas de 'datagram_size' bytes, com perda observada
+  (o sink UDP é uma thread com socket bloqueante; ver udp_throughput)
+- udp.rtt: ida e volta de um datagrama (timeouts contam como perdidos)
+
+Latências vão para LatencyHistogram (µs). Tudo roda em um event loop próprio,
+na thread do job.
+"""
+import asyncio
+import socket
+import struct
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+import psutil
+
+from app.core.histogram import LatencyHistogram
+
+TESTS = ("tcp_throughput", "tcp_rtt", "tcp_connect", "udp_throughput", "udp_rtt")
+# Número de sequência no início de cada datagrama do udp_rtt
+UDP_SEQ = struct.Struct("!Q")
+
+
+def resolve_host(host: Optional[str] = None, interface: Optional[str] = None) -> str:
+    """Endereço IPv4 para o teste: 'host' explícito, IPv4 da 'interface' ou 127.0.0.1."""
+    if host:
+        return host
+    if interface:
+        for addr in psutil.net_if_addrs().get(interface, []):
+            if addr.family == socket.AF_INET:
+                return addr.address
+        raise ValueError(f"Interface {interface} sem endereço IPv4")
+    return "127.0.0.1"
+
+
+class _TcpSink(asyncio.Protocol):
+    def __init__(self, stats: Dict[str, int]):
+        self.stats = stats
+
+    def data_received(self, data: bytes):
+        self.stats["bytes"] += len(data)
+
+
+class _TcpEcho(asyncio.Protocol):
+    def connection_made(self, transport):
+        self.transport = transport
+        sock = transport.get_extra_info("socket")
+        if sock is not None:
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+    def data_received(self, data: bytes):
+        self.transport.write(data)
+
+
+class _UdpEcho(asyncio.DatagramProtocol):
+    def connection_made(self, transport):
+        self.transport = transport
+
+    def datagram_received(self, data: bytes, addr):
+        self.transport.sendto(data, addr)
+
+
+class _UdpClient(asyncio.DatagramProtocol):
+    def __init__(self):
+        self.waiter: Optional[asyncio.Future] = None
+        self.seq = 0
+
+    def datagram_received(self, data: bytes, addr):
+        # Eco atrasado de um datagrama que já deu timeout tem outro número: ignora
+        if len(data) < UDP_SEQ.size or UDP_SEQ.unpack_from(data)[0] != self.seq:
+            return
+        if self.waiter is not None and not self.waiter.done():
+            self.waiter.set_result(data)
+
+
+class NetworkBenchmark:
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        duration: float = 10,
+        streams: int = 4,
+        buffer_size: int = 128 * 1024,
+        message_size: int = 64,
+        datagram_size: int = 1400,
+        tests: Optional[List[str]] = None,
+        should_cancel: Optional[Callable[[], bool]] = None,
+        progress: Optional[Callable[[float, Dict[str, Any]], None]] = None,
+    ):
+        self.host = host
+        self.tests = [t for t in (tests or TESTS) if t in TESTS] or list(TESTS)
+        self.phase_seconds = max(1.0, float(duration) / len(self.tests))
+        self.streams = max(1, min(int(streams), 256))
+        self.buffer_size = max(1024, min(int(buffer_size), 4 * 1024 * 1024))
+        self.message_size = max(1, min(int(message_size), 64 * 1024))
+        self.datagram_size = max(16, min(int(datagram_size), 65000))
+        self.should_cancel = should_cancel or (lambda: False)
+        self.progress = progress
+        self._phase = 0
+
+    def _running(self, t0: float) -> bool:
+        return time.perf_counter() - t0 < self.phase_seconds and not self.should_cancel()
+
+    def _report(self, t0: float, metrics: Dict[str, Any]):
+        if self.progress:
+            frac = min(1.0, (time.perf_counter() - t0) / self.phase_seconds)
+            self.progress(round((self._phase + frac) / len(self.tests) * 100.0, 1), metrics)
+
+    # ---- TCP -------------------------------------------------------------
+
+    async def tcp_throughput(self) -> Dict[str, Any]:
+        loop = asyncio.get_running_loop()
+        stats = {"bytes": 0}
+        server = await loop.create_server(lambda: _TcpSink(stats), self.host, 0)
+        port = server.sockets[0].getsockname()[1]
+        payload = b"\xa5" * self.buffer_size
+        t0 = time.perf_counter()
+
+        async def sender():
+            _, writer = await asyncio.open_connection(self.host, port)
+            try:
+                while self._running(t0):
+                    writer.write(payload)
+                    await writer.drain()
+            finally:
+                writer.close()
+                await writer.wait_closed()
+
+        async def reporter():
+            while self._running(t0):
+                await asyncio.sleep(0.5)
+                elapsed = time.perf_counter() - t0
+                self._report(t0, {"test": "tcp_throughput", "mb_s": round(stats["bytes"] / 1e6 / elapsed, 1)})
+
+        try:
+            await asyncio.gather(reporter(), *(sender() for _ in range(self.streams)))
+            await asyncio.sleep(0.05)  # deixa o servidor drenar o que está em trânsito
+            elapsed = time.perf_counter() - t0
+        finally:
+            server.close()
+            await server.wait_closed()
+        return {
+            "streams": self.streams,
+            "buffer_size": self.buffer_size,
+            "seconds": round(elapsed, 3),
+            "bytes": stats["bytes"],
+            "mb_s": round(stats["bytes"] / 1e6 / elapsed, 2),
+            "gbit_s": round(stats["bytes"] * 8 / 1e9 / elapsed, 3),
+        }
+
+    async def tcp_rtt(self) -> Dict[str, Any]:
+        loop = asyncio.get_running_loop()
+        server = await loop.create_server(_TcpEcho, self.host, 0)
+        port = server.sockets[0].getsockname()[1]
+        hist = LatencyHistogram()
+        msg = b"x" * self.message_size
+        reader, writer = await asyncio.open_connection(self.host, port)
+        sock = writer.get_extra_info("socket")
+        if sock is not None:
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        t0 = time.perf_counter()
+        try:
+            while self._running(t0):
+                s = time.perf_counter_ns()
+                writer.write(msg)
+                await reader.readexactly(self.message_size)
+                hist.record(time.perf_counter_ns() - s)
+                if hist.count % 2000 == 0:
+                    self._report(t0, {"test": "tcp_rtt", "round_trips": hist.count})
+            elapsed = time.perf_counter() - t0
+        finally:
+            writer.close()
+            await writer.wait_closed()
+            server.close()
+            await server.wait_closed()
+        return {
+            "message_size": self.message_size,
+            "round_trips": hist.count,
+            "round_trips_per_sec": round(hist.count / elapsed, 1),
+            "latency_us": hist.summary(),
+        }
+
+    async def tcp_connect(self) -> Dict[str, Any]:
+        loop = asyncio.get_running_loop()
+        server = await loop.create_server(asyncio.Protocol, self.host, 0, backlog=1024)
+        port = server.sockets[0].getsockname()[1]
+        hist = LatencyHistogram()
+        errors = 0
+        t0 = time.perf_counter()
+        try:
+            while self._running(t0):
+                s = time.perf_counter_ns()
+                try:
+                    _, writer = await asyncio.open_connection(self.host, port)
+                except OSError:
+                    errors += 1  # ex.: portas efêmeras esgotadas (TIME_WAIT)
+                    await asyncio.sleep(0.01)
+                    continue
+                hist.record(time.perf_counter_ns() - s)
+                writer.close()
+                await writer.wait_closed()
+                if hist.count % 500 == 0:
+                    self._report(t0, {"test": "tcp_connect", "connections": hist.count})
+            elapsed = time.perf_counter() - t0
+        finally:
+            server.close()
+            await server.wait_closed()
+        return {
+            "connections": hist.count,
+            "errors": errors,
+            "conn_per_sec": round(hist.count / elapsed, 1),
+            "connect_latency_us": hist.summary(),
+        }
+
+    # ---- UDP -------------------------------------------------------------
+
+    async def udp_throughput(self) -> Dict[str, Any]:
+        loop = asyncio.get_running_loop()
+        # O transport UDP do asyncio lê um datagrama por iteração do loop; o sink
+        # usa uma thread com socket bloqueante (recv_into libera o GIL) para medir
+        # a pilha do kernel e não o event loop.
+        sink = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        sink.bind((self.host, 0))
+        sink.settimeout(0.2)
+        port = sink.getsockname()[1]
+        stats = {"bytes": 0, "packets": 0}
+        stop = threading.Event()
+
+        def receiver():
+            buf = bytearray(65536)
+            while not stop.is_set():
+                try:
+                    n = sink.recv_into(buf)
+                except socket.timeout:
+                    continue
+                except OSError:
+                    break
+                stats["bytes"] += n
+                stats["packets"] += 1
+
+        thread = threading.Thread(target=receiver, name="bench-udp-sink", daemon=True)
+        thread.start()
+        client, _ = await loop.create_datagram_endpoint(asyncio.DatagramProtocol, remote_addr=(self.host, port))
+        payload = b"\x5a" * self.datagram_size
+        sent = 0
+        t0 = time.perf_counter()
+        try:
+            while self._running(t0):
+                for _ in range(64):
+                    client.sendto(payload)
+                sent += 64
+                # Controle de fluxo: não acumular datagramas no buffer do transport
+                while client.get_write_buffer_size() > 0:
+                    await asyncio.sleep(0)
+                await asyncio.sleep(0)
+                if sent % 32768 == 0:
+                    self._report(t0, {"test": "udp_throughput", "sent": sent})
+            await asyncio.sleep(0.1)
+            elapsed = time.perf_counter() - t0
+        finally:
+            client.close()
+            stop.set()
+            await asyncio.to_thread(thread.join)
+            sink.close()
+        received = stats["packets"]
+        return {
+            "datagram_size": self.datagram_size,
+            "seconds": round(elapsed, 3),
+            "sent": sent,
+            "received": received,
+            "loss_percent": round((1 - received / sent) * 100.0, 2) if sent else 0.0,
+            "mb_s": round(stats["bytes"] / 1e6 / elapsed, 2),
+            "packets_per_sec": round(received / elapsed, 1),
+        }
+
+    async def udp_rtt(self) -> Dict[str, Any]:
+        loop = asyncio.get_running_loop()
+        server, _ = await loop.create_datagram_endpoint(_UdpEcho, local_addr=(self.host, 0))
+        port = server.get_extra_info("sockname")[1]
+        client, proto = await loop.create_datagram_endpoint(_UdpClient, remote_addr=(self.host, port))
+        padding = b"y" * max(0, self.message_size - UDP_SEQ.size)
+        hist = LatencyHistogram()
+        lost = 0
+        t0 = time.perf_counter()
+        try:
+            while self._running(t0):
+                proto.seq += 1
+                proto.waiter = loop.create_future()
+                msg = UDP_SEQ.pack(proto.seq) + padding
+                s = time.perf_counter_ns()
+                client.sendto(msg)
+                try:
+                    await asyncio.wait_for(proto.waiter, timeout=1.0)
+                except asyncio.TimeoutError:
+                    lost += 1
+                    continue
+                hist.record(time.perf_counter_ns() - s)
+                if hist.count % 2000 == 0:
+                    self._report(t0, {"test": "udp_rtt", "round_trips": hist.count})
+            elapsed = time.perf_counter() - t0
+        finally:
+            client.close()
+            server.close()
+        return {
+            "message_size": UDP_SEQ.size + len(padding),
+            "round_trips": hist.count,
+            "lost": lost,
+            "round_trips_per_sec": round(hist.count / elapsed, 1),
+            "latency_us": hist.summary(),
+        }
+
+    # ---- orquestração ----------------------------------------------------
+
+    async def run_async(self) -> Dict[str, Any]:
+        tcp: Dict[str, Any] = {}
+        udp: Dict[str, Any] = {}
+        for i, test in enumerate(self.tests):
+            if self.should_cancel():
+                break
+            self._phase = i
+            proto, name = test.split("_", 1)
+            result = await getattr(self, test)()
+            (tcp if proto == "tcp" else udp)[name] = result
+        return {"type": "network", "host": self.host, "tcp": tcp, "udp": udp}
+
+    def run(self) -> Dict[str, Any]:
+        return asyncio.run(self.run_async())
+
+
+def run_network_benchmark(params: Dict[str, Any], **kwargs) -> Dict[str, Any]:
+    """Monta o benchmark a partir do payload da API e executa."""
+    opts: Dict[str, Any] = {}
+    for key, cast in (("duration", float), ("streams", int), ("buffer_size", int), ("message_size", int), ("datagram_size", int)):
+        if params.get(key) is not None:
+            opts[key] = cast(params[key])
+    tests = params.get("tests")
+    if tests:
+        opts["tests"] = tests.split(",") if isinstance(tests, str) else list(tests)
+    host = resolve_host(params.get("host"), params.get("interface"))
+    return NetworkBenchmark(host=host, **opts, **kwargs).run()
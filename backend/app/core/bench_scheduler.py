@@ -0,0 +1,316 @@
+"""
+Agendador dos jobs de benchmark.
+
+- Fila FIFO com concorrência configurável (padrão 1: um benchmark por vez, para
+  que execuções simultâneas não distorçam umas às outras nem esgotem a RAM).
+- Cada vaga (slot) tem uma thread de execução, um multiprocessing.Event de
+  cancelamento e um ProcessPoolExecutor criado sob demanda e reutilizado entre
+  jobs (os processos recebem o Event pelo initializer, então os workers não
+  leem o dicionário de jobs do processo pai).
+- Jobs finalizados são removidos após 'ttl' segundos ou quando passam de
+  'max_jobs' (os mais antigos primeiro).
+- O worker publica progresso, métricas e linhas de log em um JobChannel
+  (deque sem lock) em vez de alterar o dicionário do job; /status e o stream
+  SSE leem o canal.
+"""
+import itertools
+import multiprocessing as mp
+import os
+import threading
+import time
+import uuid
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from typing import Any, Callable, Deque, Dict, List, Optional
+
+from app.core import bench_cpu
+from app.core.config import settings
+
+FINISHED = ("completed", "canceled", "error")
+# Campos internos que não vão para a API
+_PRIVATE = ("finished_ts", "slot", "channel")
+LOG_TAIL = 50
+_UNSET = object()
+
+
+class JobChannel:
+    """Eventos worker -> leitores sem lock.
+
+    deque.append e a cópia tuple(deque) são atômicas sob o GIL, e next() de um
+    itertools.count também; o worker nunca espera por quem lê. Eventos são
+    (seq, tipo, dados) com tipo 'status' ({status, phase?} a cada transição),
+    'progress', 'log' ou 'done'; os mais antigos
+    saem quando o deque enche (o último progresso fica em 'progress'/'metrics').
+    """
+
+    def __init__(self, maxlen: int = 1024):
+        self.events: Deque[tuple] = deque(maxlen=maxlen)
+        self._seq = itertools.count(1)
+        self.progress: Any = _UNSET
+        self.metrics: Optional[Dict[str, Any]] = None
+
+    def publish(self, kind: str, data: Any = None):
+        if kind == "progress":
+            self.progress, self.metrics = data.get("progress", _UNSET), data.get("metrics", self.metrics)
+        self.events.append((next(self._seq), kind, data))
+
+    def since(self, seq: int) -> List[tuple]:
+        return [e for e in tuple(self.events) if e[0] > seq]
+
+    def log_tail(self, n: int = LOG_TAIL) -> List[str]:
+        lines = [e[2] for e in tuple(self.events) if e[1] == "log"]
+        return lines[-n:]
+
+
+class _Slot:
+    """Vaga de execução: evento de cancelamento + pool de processos reutilizável."""
+
+    def __init__(self, index: int, pool_workers: int):
+        self.index = index
+        self.pool_workers = pool_workers
+        self.cancel_event = mp.get_context().Event()
+        self.job_id: Optional[str] = None
+        self._pool: Optional[ProcessPoolExecutor] = None
+
+    @property
+    def pool(self) -> ProcessPoolExecutor:
+        if self._pool is None or getattr(self._pool, "_broken", False):
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.pool_workers,
+                initializer=bench_cpu.init_worker,
+                initargs=(self.cancel_event,),
+            )
+        return self._pool
+
+    def shutdown(self):
+        self.cancel_event.set()
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+
+class JobContext:
+    """O que o runner de um job recebe: atualização de estado e cancelamento."""
+
+    def __init__(self, scheduler: "BenchmarkScheduler", job_id: str, slot: _Slot):
+        self.scheduler = scheduler
+        self.job_id = job_id
+        self.slot = slot
+        self.cancel_event = slot.cancel_event
+        self.pool_workers = slot.pool_workers
+        self.channel: JobChannel = scheduler.channel(job_id)
+
+    @property
+    def executor(self) -> ProcessPoolExecutor:
+        return self.slot.pool
+
+    def cancelled(self) -> bool:
+        return self.cancel_event.is_set()
+
+    def progress(self, pct: Optional[float], metrics: Optional[Dict[str, Any]] = None):
+        data: Dict[str, Any] = {"progress": pct}
+        if metrics is not None:
+            data["metrics"] = metrics
+        self.channel.publish("progress", data)
+
+    def log(self, line: str):
+        self.channel.publish("log", line)
+
+    def update(self, updates: Dict[str, Any]):
+        """Campos raros (ex.: erro) que vão direto para o job, sob o lock."""
+        self.scheduler.update(self.job_id, updates)
+
+
+class BenchmarkScheduler:
+    def __init__(self, concurrency: int = 1, ttl: float = 3600, max_jobs: int = 50, pool_workers: Optional[int] = None):
+        self.concurrency = max(1, concurrency)
+        self.ttl = ttl
+        self.max_jobs = max(1, max_jobs)
+        self.pool_workers = pool_workers or os.cpu_count() or 1
+        self.jobs: Dict[str, Dict[str, Any]] = {}
+        self._queue: Deque[str] = deque()
+        self._cond = threading.Condition()
+        self._slots: List[_Slot] = []
+        self._threads: List[threading.Thread] = []
+        self._runner: Optional[Callable[[Dict[str, Any], JobContext], Optional[Dict[str, Any]]]] = None
+        self._on_finish: Optional[Callable[[Dict[str, Any]], None]] = None
+        self._stopping = False
+
+    def set_runner(self, runner: Callable[[Dict[str, Any], JobContext], Optional[Dict[str, Any]]],
+                   on_finish: Optional[Callable[[Dict[str, Any]], None]] = None):
+        """runner(job, ctx) executa o benchmark e devolve o resultado; on_finish recebe o job concluído."""
+        self._runner = runner
+        self._on_finish = on_finish
+
+    def _ensure_threads(self):
+        if self._threads:
+            return
+        for i in range(self.concurrency):
+            slot = _Slot(i, self.pool_workers)
+            t = threading.Thread(target=self._loop, args=(slot,), name=f"benchmark-{i}", daemon=True)
+            self._slots.append(slot)
+            self._threads.append(t)
+            t.start()
+
+    # ---- API -------------------------------------------------------------
+
+    def submit(self, payload: Dict[str, Any]) -> str:
+        job_id = str(uuid.uuid4())
+        with self._cond:
+            self._evict()
+            self.jobs[job_id] = {
+                "id": job_id,
+                "type": payload.get("type", "cpu"),
+                "status": "queued",
+                "progress": 0.0,
+                "queued_at": datetime.now().isoformat(),
+                "started_at": None,
+                "duration": payload.get("duration", 10),
+                "result": None,
+                "error": None,
+                "params": payload,
+                "channel": JobChannel(),
+            }
+            self._queue.append(job_id)
+            self._ensure_threads()
+            self._cond.notify()
+        return job_id
+
+    def update(self, job_id: str, updates: Dict[str, Any]):
+        with self._cond:
+            job = self.jobs.get(job_id)
+            if job is not None:
+                job.update(updates)
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Cópia do job com a posição na fila (1 = próximo a executar)."""
+        with self._cond:
+            job = self.jobs.get(job_id)
+            if job is None:
+                return None
+            safe = self._public(job)
+            if job["status"] == "queued":
+                safe["queue_position"] = self._queue.index(job_id) + 1
+            else:
+                safe["queue_position"] = None
+            safe["queue_length"] = len(self._queue)
+            return safe
+
+    def channel(self, job_id: str) -> Optional[JobChannel]:
+        job = self.jobs.get(job_id)
+        return job.get("channel") if job else None
+
+    @staticmethod
+    def _public(job: Dict[str, Any]) -> Dict[str, Any]:
+        """Job sem campos internos, com progresso/métricas/logs vindos do canal."""
+        safe = {k: v for k, v in job.items() if k not in _PRIVATE}
+        channel: Optional[JobChannel] = job.get("channel")
+        if channel is not None:
+            if job["status"] == "running" and channel.progress is not _UNSET:
+                safe["progress"] = channel.progress
+            if channel.metrics is not None:
+                safe["metrics"] = channel.metrics
+            safe["logs"] = channel.log_tail()
+        return safe
+
+    def cancel(self, job_id: str) -> bool:
+        with self._cond:
+            job = self.jobs.get(job_id)
+            if job is None:
+                return False
+            if job["status"] == "queued":
+                self._queue.remove(job_id)
+                job.update({"status": "canceled", "finished_at": datetime.now().isoformat(), "finished_ts": time.monotonic()})
+                job["channel"].publish("done")
+            elif job["status"] == "running":
+                job["cancel_requested"] = True
+                slot = job.get("slot")
+                if slot is not None:
+                    slot.cancel_event.set()
+            return True
+
+    def stats(self) -> Dict[str, Any]:
+        with self._cond:
+            running = [s.job_id for s in self._slots if s.job_id]
+            return {"queued": len(self._queue), "running": running, "jobs": len(self.jobs), "concurrency": self.concurrency}
+
+    def shutdown(self):
+        with self._cond:
+            self._stopping = True
+            self._cond.notify_all()
+        for slot in self._slots:
+            slot.shutdown()
+
+    # ---- execução ----------------------------------------------------------
+
+    def _evict(self):
+        """Remove jobs finalizados expirados e limita o total de finalizados (chamar com o lock)."""
+        now = time.monotonic()
+        finished = [j for j in self.jobs.values() if j["status"] in FINISHED]
+        for job in finished:
+            if now - job.get("finished_ts", now) > self.ttl:
+                self.jobs.pop(job["id"], None)
+        finished = sorted(
+            (j for j in self.jobs.values() if j["status"] in FINISHED),
+            key=lambda j: j.get("finished_ts", 0.0),
+        )
+        for job in finished[: max(0, len(finished) - self.max_jobs)]:
+            self.jobs.pop(job["id"], None)
+
+    def _loop(self, slot: _Slot):
+        while True:
+            with self._cond:
+                while not self._queue and not self._stopping:
+                    self._cond.wait()
+                if self._stopping:
+                    return
+                job_id = self._queue.popleft()
+                job = self.jobs.get(job_id)
+                if job is None:
+                    continue
+                slot.cancel_event.clear()
+                slot.job_id = job_id
+                job.update({"status": "running", "slot": slot, "started_at": datetime.now().isoformat()})
+                job["channel"].publish("status", {"status": "running"})
+                snapshot = dict(job)
+            ctx = JobContext(self, job_id, slot)
+            try:
+                result = self._runner(snapshot, ctx) if self._runner else None
+                final: Dict[str, Any] = {"status": "canceled" if ctx.cancelled() else "completed"}
+                if result is not None:
+                    final["result"] = result
+                with self._cond:
+                    if self.jobs.get(job_id, {}).get("error"):
+                        final["status"] = "error"
+            except Exception as e:
+                final = {"status": "error", "error": str(e)}
+            final.update({"finished_at": datetime.now().isoformat(), "finished_ts": time.monotonic()})
+            with self._cond:
+                job = self.jobs.get(job_id)
+                if job is not None:
+                    last = ctx.channel.progress
+                    if final["status"] == "completed":
+                        final["progress"] = None if last is None else 100.0
+                    elif last is not _UNSET:
+                        final["progress"] = last
+                    job.update(final)
+                    job.pop("slot", None)
+                    done = self._public(job)
+                    ctx.channel.publish("done")
+                else:
+                    done = None
+                slot.job_id = None
+                self._evict()
+            if done is not None and done["status"] == "completed" and self._on_finish:
+                try:
+                    self._on_finish(done)
+                except Exception:
+                    pass
+
+
+bench_scheduler = BenchmarkScheduler(
+    concurrency=settings.benchmark_concurrency,
+    ttl=settings.benchmark_job_ttl,
+    max_jobs=settings.benchmark_max_jobs,
+)
@@ -0,0 +1,250 @@
+"""
+Armazenamento persistente dos resultados de benchmark (SQLite).
+
+Cada execução concluída é gravada com o host onde rodou (hostname, kernel,
+modelo de CPU) e os parâmetros usados, para comparar execuções do mesmo tipo
+antes/depois de mudanças de kernel, BIOS ou configuração. Uma execução por
+tipo pode ser marcada como baseline; compare() calcula a variação percentual
+de cada métrica numérica do resultado (parâmetros e contagens ficam de fora).
+"""
+import json
+import os
+import platform
+import re
+import sqlite3
+import threading
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+from app.core.config import settings
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS benchmark_runs (
+    id TEXT PRIMARY KEY,
+    type TEXT NOT NULL,
+    status TEXT NOT NULL,
+    started_at TEXT,
+    finished_at TEXT,
+    hostname TEXT,
+    kernel TEXT,
+    cpu_model TEXT,
+    params TEXT,
+    result TEXT,
+    is_baseline INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS idx_benchmark_runs_type ON benchmark_runs (type, finished_at);
+"""
+
+# Sufixos do último trecho da chave em que valor MAIOR é melhor (taxas);
+# têm precedência sobre os de baixo ("ops_per_sec" termina em "_sec")
+_HIGHER_IS_BETTER = ("per_sec", "_mb_s", "_gb_s", "_gbit_s", "iops", "_efficiency")
+# Sufixos em que valor MENOR é melhor (tempos, latências, perdas)
+_LOWER_IS_BETTER = ("_sec", "_ms", "_us", "_ns", "_per_access", "_latency", "loss_percent", "_lost", "_errors")
+# Campos do LatencyHistogram.summary() sob uma chave de latência ("latency_us.p99")
+_HISTOGRAM_FIELDS = re.compile(r"^(min|mean|max|p\d+(_\d+)?)$")
+# Parâmetros da execução e contagens brutas: não entram no compare()
+_PARAMETER_KEYS = {
+    "workers", "duration", "seconds", "step_seconds", "batch", "size_mb", "size_kb", "read_mb",
+    "block_size", "queue_depth", "buffer_size", "streams", "message_size", "datagram_size",
+    "count", "ops", "bytes", "sent", "received", "round_trips", "connections",
+}
+_PARAMETER_GROUPS = {"caches"}
+
+
+def sqlite_path(url: str) -> str:
+    """Extrai o caminho de 'sqlite:///arquivo.db'; outras URLs usam o arquivo padrão."""
+    if url.startswith("sqlite:///"):
+        path = url[len("sqlite:///"):]
+        return path or "server_admin.db"
+    return "server_admin.db"
+
+
+def _cpu_model() -> Optional[str]:
+    try:
+        from app.core.hardware import inventory
+        cpu = inventory.get().get("cpu") or {}
+        return cpu.get("model_name")
+    except Exception:
+        return platform.processor() or None
+
+
+def host_tags() -> Dict[str, Any]:
+    uname = platform.uname()
+    return {"hostname": uname.node, "kernel": uname.release, "cpu_model": _cpu_model()}
+
+
+def _flatten(data: Any, prefix: str = "") -> Dict[str, float]:
+    """Métricas numéricas do resultado com chaves pontilhadas (listas são ignoradas)."""
+    out: Dict[str, float] = {}
+    if isinstance(data, dict):
+        for k, v in data.items():
+            out.update(_flatten(v, f"{prefix}{k}."))
+    elif isinstance(data, (int, float)) and not isinstance(data, bool):
+        out[prefix[:-1]] = float(data)
+    return out
+
+
+def _is_parameter(metric: str) -> bool:
+    parts = metric.lower().split(".")
+    return parts[-1] in _PARAMETER_KEYS or any(p in _PARAMETER_GROUPS for p in parts[:-1])
+
+
+def _higher_is_better(metric: str) -> Optional[bool]:
+    parts = metric.lower().split(".")
+    leaf = "_" + parts[-1]
+    if leaf.endswith(_HIGHER_IS_BETTER):
+        return True
+    if leaf.endswith(_LOWER_IS_BETTER):
+        return False
+    if len(parts) > 1 and _HISTOGRAM_FIELDS.match(parts[-1]) and ("_" + parts[-2]).endswith(_LOWER_IS_BETTER):
+        return False
+    return None
+
+
+class BenchmarkStore:
+    """Tabela benchmark_runs em SQLite, com uma conexão por operação."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._ready = False
+
+    def _connect(self) -> sqlite3.Connection:
+        if not self._ready:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        conn = sqlite3.connect(self.path, timeout=10)
+        conn.row_factory = sqlite3.Row
+        if not self._ready:
+            with self._lock:
+                if not self._ready:
+                    conn.executescript(SCHEMA)
+                    conn.commit()
+                    self._ready = True
+        return conn
+
+    @staticmethod
+    def _row(row: sqlite3.Row) -> Dict[str, Any]:
+        item = dict(row)
+        item["params"] = json.loads(item["params"]) if item.get("params") else {}
+        item["result"] = json.loads(item["result"]) if item.get("result") else None
+        item["is_baseline"] = bool(item["is_baseline"])
+        return item
+
+    def save(self, job: Dict[str, Any]) -> None:
+        """Grava (ou substitui) a execução de um job finalizado."""
+        tags = host_tags()
+        conn = self._connect()
+        try:
+            with conn:
+                conn.execute(
+                    """INSERT OR REPLACE INTO benchmark_runs
+                       (id, type, status, started_at, finished_at, hostname, kernel, cpu_model, params, result, is_baseline)
+                       VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?,
+                               COALESCE((SELECT is_baseline FROM benchmark_runs WHERE id = ?), 0))""",
+                    (
+                        job["id"],
+                        str(job.get("type", "cpu")).lower(),
+                        job.get("status", "completed"),
+                        job.get("started_at"),
+                        job.get("finished_at") or datetime.now().isoformat(),
+                        tags["hostname"],
+                        tags["kernel"],
+                        tags["cpu_model"],
+                        json.dumps(job.get("params") or {}, default=str),
+                        json.dumps(job.get("result"), default=str),
+                        job["id"],
+                    ),
+                )
+        finally:
+            conn.close()
+
+    def list(self, btype: Optional[str] = None, limit: int = 50, offset: int = 0) -> Dict[str, Any]:
+        where, args = ("WHERE type = ?", [btype.lower()]) if btype else ("", [])
+        conn = self._connect()
+        try:
+            total = conn.execute(f"SELECT COUNT(*) FROM benchmark_runs {where}", args).fetchone()[0]
+            rows = conn.execute(
+                f"SELECT * FROM benchmark_runs {where} ORDER BY finished_at DESC LIMIT ? OFFSET ?",
+                args + [limit, offset],
+            ).fetchall()
+        finally:
+            conn.close()
+        return {"runs": [self._row(r) for r in rows], "total": total, "limit": limit, "offset": offset}
+
+    def get(self, run_id: str) -> Optional[Dict[str, Any]]:
+        conn = self._connect()
+        try:
+            row = conn.execute("SELECT * FROM benchmark_runs WHERE id = ?", (run_id,)).fetchone()
+        finally:
+            conn.close()
+        return self._row(row) if row else None
+
+    def baseline(self, btype: str) -> Optional[Dict[str, Any]]:
+        conn = self._connect()
+        try:
+            row = conn.execute(
+                "SELECT * FROM benchmark_runs WHERE type = ? AND is_baseline = 1", (btype.lower(),)
+            ).fetchone()
+        finally:
+            conn.close()
+        return self._row(row) if row else None
+
+    def set_baseline(self, run_id: str) -> Optional[Dict[str, Any]]:
+        """Marca a execução como baseline do seu tipo (desmarcando a anterior)."""
+        conn = self._connect()
+        try:
+            with conn:
+                row = conn.execute("SELECT type FROM benchmark_runs WHERE id = ?", (run_id,)).fetchone()
+                if not row:
+                    return None
+                conn.execute("UPDATE benchmark_runs SET is_baseline = 0 WHERE type = ?", (row["type"],))
+                conn.execute("UPDATE benchmark_runs SET is_baseline = 1 WHERE id = ?", (run_id,))
+        finally:
+            conn.close()
+        return self.get(run_id)
+
+    def delete(self, run_id: str) -> bool:
+        conn = self._connect()
+        try:
+            with conn:
+                cur = conn.execute("DELETE FROM benchmark_runs WHERE id = ?", (run_id,))
+        finally:
+            conn.close()
+        return cur.rowcount > 0
+
+    @staticmethod
+    def compare(run: Dict[str, Any], base: Dict[str, Any]) -> Dict[str, Any]:
+        """Variação percentual de cada métrica numérica presente nos dois resultados."""
+        cur_m = _flatten(run.get("result") or {})
+        base_m = _flatten(base.get("result") or {})
+        metrics = []
+        for name in sorted(cur_m.keys() & base_m.keys()):
+            if _is_parameter(name):
+                continue
+            value, ref = cur_m[name], base_m[name]
+            delta = round((value - ref) / ref * 100.0, 2) if ref else None
+            higher = _higher_is_better(name)
+            if delta is None or higher is None or delta == 0:
+                verdict = None
+            else:
+                verdict = "better" if (delta > 0) == higher else "worse"
+            metrics.append({
+                "metric": name,
+                "value": value,
+                "baseline": ref,
+                "delta_percent": delta,
+                "higher_is_better": higher,
+                "verdict": verdict,
+            })
+        same_host = {k: run.get(k) == base.get(k) for k in ("hostname", "kernel", "cpu_model")}
+        return {
+            "run_id": run["id"],
+            "baseline_id": base["id"],
+            "type": run["type"],
+            "same": same_host,
+            "params_match": run.get("params") == base.get("params"),
+            "metrics": metrics,
+        }
+
+
+bench_store = BenchmarkStore(sqlite_path(settings.database_url))
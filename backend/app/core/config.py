@@ -42,5 +42,27 @@ class Settings(BaseSettings):
     host: str = os.getenv("HOST", "0.0.0.0")
     port: int = int(os.getenv("PORT", "8000"))
     debug: bool = os.getenv("DEBUG", "True").lower() in ("1", "true", "yes", "on")
+
+    # Telemetria (intervalo de amostragem em segundos)
+    telemetry_interval: float = float(os.getenv("TELEMETRY_INTERVAL", "1.0"))
+    # Janela mantida no histórico em memória (segundos)
+    metrics_history_seconds: int = int(os.getenv("METRICS_HISTORY_SECONDS", "86400"))
+    # Intervalo do coletor contínuo do nvidia-smi (ms)
+    gpu_sample_interval_ms: int = int(os.getenv("GPU_SAMPLE_INTERVAL_MS", "2000"))
+    # Uso de disco: orçamento de latência por requisição (s), TTL do cache (s) e threads
+    disk_usage_timeout: float = float(os.getenv("DISK_USAGE_TIMEOUT", "2.0"))
+    disk_usage_ttl: float = float(os.getenv("DISK_USAGE_TTL", "5.0"))
+    disk_usage_workers: int = int(os.getenv("DISK_USAGE_WORKERS", "8"))
+    # Benchmarks: jobs simultâneos, retenção de jobs finalizados (s) e máximo guardado
+    benchmark_concurrency: int = int(os.getenv("BENCHMARK_CONCURRENCY", "1"))
+    benchmark_job_ttl: int = int(os.getenv("BENCHMARK_JOB_TTL", "3600"))
+    benchmark_max_jobs: int = int(os.getenv("BENCHMARK_MAX_JOBS", "50"))
+    # APT: intervalo do refresh automático das listas (s, 0 = só manual) e timeout do apt-get update (s)
+    apt_refresh_interval: float = float(os.getenv("APT_REFRESH_INTERVAL", "0"))
+    apt_update_timeout: float = float(os.getenv("APT_UPDATE_TIMEOUT", "600"))
+    # APT: espera máxima pelo lock do dpkg antes de falhar um job (s)
+    apt_lock_timeout: float = float(os.getenv("APT_LOCK_TIMEOUT", "600"))
+    # APT: idade máxima das listas (s) antes de uma instalação rodar apt-get update
+    apt_lists_max_age: float = float(os.getenv("APT_LISTS_MAX_AGE", "3600"))
     
 settings = Settings()
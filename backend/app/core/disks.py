@@ -0,0 +1,285 @@
+"""
+Uso de disco por ponto de montagem, paralelo e com prazo.
+
+psutil.disk_usage em série trava a requisição inteira (e o event loop) quando
+um único mount NFS/CIFS/FUSE não responde. Aqui:
+
+- /proc/self/mountinfo só é reprocessado quando o kernel sinaliza mudança na
+  tabela de montagens (poll com POLLPRI); sem isso, compara-se o conteúdo.
+- statvfs roda em um pool limitado de threads daemon (um statvfs travado não
+  impede o encerramento do processo, ao contrário do ThreadPoolExecutor).
+- Cada requisição espera no máximo 'timeout' segundos; mounts que não
+  responderam voltam com stale=True e o último valor conhecido, e não recebem
+  nova consulta enquanto a anterior estiver pendente.
+- Resultados ficam em cache por mountpoint durante 'ttl' segundos.
+"""
+import asyncio
+import os
+import queue
+import select
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Dict, List, Optional, Tuple
+
+import psutil
+
+from app.core.config import settings
+
+MOUNTINFO = "/proc/self/mountinfo"
+
+# Sistemas de arquivos de rede/FUSE listados mesmo sendo 'nodev' em /proc/filesystems
+NETWORK_FSTYPES = {
+    "nfs", "nfs4", "cifs", "smb3", "smbfs", "ceph", "glusterfs", "9p",
+    "fuse.sshfs", "fuse.s3fs", "fuse.rclone", "fuse.glusterfs", "fuse.ceph",
+}
+
+
+def _unescape(field: str) -> str:
+    """mountinfo escapa espaço, tab, \\n e \\ como octal (\\040 etc.)."""
+    if "\\" not in field:
+        return field
+    out, i = [], 0
+    while i < len(field):
+        if field[i] == "\\" and field[i + 1:i + 4].isdigit() and len(field[i + 1:i + 4]) == 3:
+            out.append(chr(int(field[i + 1:i + 4], 8)))
+            i += 4
+        else:
+            out.append(field[i])
+            i += 1
+    return "".join(out)
+
+
+def _physical_fstypes() -> set:
+    fstypes = {"zfs"}
+    try:
+        with open("/proc/filesystems") as f:
+            for line in f:
+                if not line.startswith("nodev"):
+                    fstypes.add(line.strip())
+    except OSError:
+        pass
+    return fstypes
+
+
+def parse_mountinfo(data: str, fstypes: set) -> List[Dict[str, Any]]:
+    """Partições 'reais' (mesmo critério do psutil.disk_partitions) + mounts de rede."""
+    # mountinfo está em ordem de montagem: em montagens empilhadas a última
+    # linha é a visível (a que o statvfs mede), então ela sobrescreve as
+    # anteriores; o dict mantém a posição da primeira ocorrência. Um mount de
+    # cima que não entra na lista (ex.: tmpfs sobre /mnt) esconde o de baixo.
+    by_mountpoint: Dict[str, Optional[Dict[str, Any]]] = {}
+    for line in data.splitlines():
+        left, sep, right = line.partition(" - ")
+        if not sep:
+            continue
+        lf = left.split(" ")
+        rf = right.split(" ")
+        if len(lf) < 6 or len(rf) < 2:
+            continue
+        mountpoint = _unescape(lf[4])
+        fstype, device = rf[0], _unescape(rf[1])
+        network = fstype in NETWORK_FSTYPES
+        if not network and (device in ("", "none") or fstype not in fstypes):
+            by_mountpoint[mountpoint] = None
+            continue
+        by_mountpoint[mountpoint] = {
+            "device": device,
+            "mountpoint": mountpoint,
+            "fstype": fstype,
+            "opts": lf[5],
+            "network": network,
+        }
+    mounts = [m for m in by_mountpoint.values() if m is not None]
+    return mounts
+
+
+class MountTable:
+    """Tabela de montagens reprocessada apenas quando muda."""
+
+    def __init__(self, path: str = MOUNTINFO):
+        self.path = path
+        self._mounts: Optional[List[Dict[str, Any]]] = None
+        self._raw: Optional[str] = None
+        self._fstypes = _physical_fstypes()
+        self._poll = None
+        self._fd: Optional[int] = None
+        self._lock = threading.Lock()
+        self.generation = 0
+
+    def _changed(self) -> bool:
+        if self._fd is None:
+            try:
+                self._fd = os.open(self.path, os.O_RDONLY)
+                self._poll = select.poll()
+                self._poll.register(self._fd, select.POLLPRI | select.POLLERR)
+            except (OSError, AttributeError):
+                self._fd, self._poll = None, None
+                return True
+            return True
+        # O kernel acorda POLLPRI/POLLERR no descritor quando a tabela muda
+        return bool(self._poll.poll(0))
+
+    def _read(self) -> str:
+        if self._fd is not None:
+            # Reler pelo mesmo fd "rearma" o evento de mudança
+            os.lseek(self._fd, 0, os.SEEK_SET)
+            chunks = []
+            while True:
+                chunk = os.read(self._fd, 65536)
+                if not chunk:
+                    break
+                chunks.append(chunk)
+            return b"".join(chunks).decode("utf-8", errors="replace")
+        with open(self.path) as f:
+            return f.read()
+
+    def mounts(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            try:
+                if self._mounts is None or self._changed():
+                    raw = self._read()
+                    if raw != self._raw:
+                        self._raw = raw
+                        self._mounts = parse_mountinfo(raw, self._fstypes)
+                        self.generation += 1
+            except OSError:
+                # Sem /proc (ex.: Windows em desenvolvimento)
+                if self._mounts is None:
+                    self._mounts = [
+                        {"device": p.device, "mountpoint": p.mountpoint, "fstype": p.fstype, "opts": p.opts, "network": False}
+                        for p in psutil.disk_partitions()
+                    ]
+            return self._mounts
+
+
+def _statvfs(mountpoint: str) -> Dict[str, Any]:
+    try:
+        st = os.statvfs(mountpoint)
+    except AttributeError:
+        u = psutil.disk_usage(mountpoint)
+        return {"total": u.total, "used": u.used, "free": u.free}
+    total = st.f_blocks * st.f_frsize
+    free = st.f_bavail * st.f_frsize
+    used = (st.f_blocks - st.f_bfree) * st.f_frsize
+    return {"total": total, "used": used, "free": free}
+
+
+class _DaemonPool:
+    """Pool mínimo de threads daemon que devolve concurrent.futures.Future."""
+
+    def __init__(self, workers: int):
+        self._queue: "queue.Queue[Tuple[Future, Any, tuple]]" = queue.Queue()
+        for i in range(max(1, workers)):
+            threading.Thread(target=self._worker, name=f"disk-usage-{i}", daemon=True).start()
+
+    def _worker(self):
+        while True:
+            fut, fn, args = self._queue.get()
+            if not fut.set_running_or_notify_cancel():
+                continue
+            try:
+                fut.set_result(fn(*args))
+            except BaseException as e:
+                fut.set_exception(e)
+
+    def submit(self, fn, *args) -> Future:
+        fut: Future = Future()
+        self._queue.put((fut, fn, args))
+        return fut
+
+
+class DiskUsageCollector:
+    """Coleta paralela de uso por mountpoint com cache e marcação de 'stale'."""
+
+    def __init__(self, timeout: float = 2.0, ttl: float = 5.0, workers: int = 8):
+        self.timeout = timeout
+        self.ttl = ttl
+        self.workers = workers
+        self.table = MountTable()
+        self._pool: Optional[_DaemonPool] = None
+        # mountpoint -> (instante da coleta, resultado ou erro)
+        self._cache: Dict[str, Tuple[float, Dict[str, Any]]] = {}
+        self._pending: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+
+    def _submit(self, mountpoint: str) -> Future:
+        if self._pool is None:
+            self._pool = _DaemonPool(self.workers)
+        fut = self._pool.submit(_statvfs, mountpoint)
+
+        def _done(f: Future, mp: str = mountpoint):
+            try:
+                value = f.result()
+            except PermissionError:
+                value = {"error": "permission denied"}
+            except Exception as e:
+                value = {"error": str(e)}
+            with self._lock:
+                self._cache[mp] = (time.monotonic(), value)
+                self._pending.pop(mp, None)
+
+        with self._lock:
+            self._pending[mountpoint] = fut
+        fut.add_done_callback(_done)
+        return fut
+
+    def _row(self, mount: Dict[str, Any], now: float) -> Optional[Dict[str, Any]]:
+        entry = self._cache.get(mount["mountpoint"])
+        pending = mount["mountpoint"] in self._pending
+        if entry is None:
+            values: Dict[str, Any] = {"total": None, "used": None, "free": None}
+            age = None
+        else:
+            values, age = entry[1], round(now - entry[0], 2)
+            if "error" in values:
+                return None  # ex.: sem permissão — omitido como antes
+        total = values.get("total")
+        return {
+            "device": mount["device"],
+            "mountpoint": mount["mountpoint"],
+            "fstype": mount["fstype"],
+            "total": total,
+            "used": values.get("used"),
+            "free": values.get("free"),
+            "percent": round((values["used"] / total) * 100, 1) if total else (0.0 if total == 0 else None),
+            "network": mount["network"],
+            "stale": pending or entry is None or (age is not None and age > self.ttl),
+            "age": age,
+        }
+
+    async def usage(self) -> Dict[str, Any]:
+        """Uso de todos os mounts em no máximo 'timeout' segundos."""
+        mounts = await asyncio.to_thread(self.table.mounts)
+        now = time.monotonic()
+        waiting = []
+        with self._lock:
+            for m in mounts:
+                mp = m["mountpoint"]
+                entry = self._cache.get(mp)
+                if mp in self._pending:
+                    continue  # consulta anterior ainda travada: não empilhar outra
+                if entry is None or now - entry[0] > self.ttl:
+                    waiting.append(mp)
+        futures = [asyncio.wrap_future(self._submit(mp)) for mp in waiting]
+        if futures:
+            await asyncio.wait(futures, timeout=self.timeout)
+        now = time.monotonic()
+        with self._lock:
+            rows = [r for r in (self._row(m, now) for m in mounts) if r is not None]
+            # Esquecer mounts que sumiram da tabela
+            live = {m["mountpoint"] for m in mounts}
+            for mp in list(self._cache.keys() - live):
+                self._cache.pop(mp, None)
+        return {
+            "disks": rows,
+            "stale": sum(1 for r in rows if r["stale"]),
+            "mount_generation": self.table.generation,
+        }
+
+
+disk_usage = DiskUsageCollector(
+    timeout=settings.disk_usage_timeout,
+    ttl=settings.disk_usage_ttl,
+    workers=settings.disk_usage_workers,
+)
@@ -0,0 +1,177 @@
+"""
+Índice em memória de /var/lib/dpkg/status.
+
+Substitui os 'dpkg -l | grep' por pacote: o arquivo é lido uma vez e
+reindexado só quando mtime ou tamanho mudam (o dpkg grava status-new e faz
+rename, então a leitura nunca vê um arquivo pela metade). Consultas de
+instalado/versão não criam processos.
+
+Entradas são indexadas por (nome, arquitetura); consultas só pelo nome
+preferem a arquitetura nativa, depois 'all', depois qualquer outra.
+"""
+import os
+import platform
+import threading
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+DPKG_STATUS = "/var/lib/dpkg/status"
+
+# Campos guardados no índice (demais campos do status são descartados)
+FIELDS = {
+    "Package": "name",
+    "Architecture": "arch",
+    "Version": "version",
+    "Status": "status",
+    "Description": "description",
+    "Depends": "depends",
+    "Pre-Depends": "pre_depends",
+    "Installed-Size": "installed_size",
+    "Section": "section",
+    "Priority": "priority",
+    "Source": "source",
+    "Multi-Arch": "multi_arch",
+    "Maintainer": "maintainer",
+}
+
+_MACHINE_ARCH = {
+    "x86_64": "amd64",
+    "amd64": "amd64",
+    "aarch64": "arm64",
+    "arm64": "arm64",
+    "armv7l": "armhf",
+    "armv6l": "armel",
+    "i386": "i386",
+    "i686": "i386",
+    "ppc64le": "ppc64el",
+    "s390x": "s390x",
+    "riscv64": "riscv64",
+}
+
+
+def native_arch() -> str:
+    """Arquitetura Debian nativa, sem chamar 'dpkg --print-architecture'."""
+    machine = platform.machine().lower()
+    return _MACHINE_ARCH.get(machine, machine)
+
+
+def parse_status(text: str) -> Iterator[Dict[str, Any]]:
+    """Parágrafos do formato deb822 com os campos de FIELDS já normalizados."""
+    for para in text.split("\n\n"):
+        if not para.strip():
+            continue
+        entry: Dict[str, Any] = {}
+        key: Optional[str] = None
+        for line in para.split("\n"):
+            if not line:
+                continue
+            if line[0] in " \t":
+                # Continuação (descrição longa etc.): só a primeira linha da descrição interessa
+                continue
+            field, _, value = line.partition(":")
+            key = FIELDS.get(field)
+            if key is not None:
+                entry[key] = value.strip()
+        if "name" not in entry:
+            continue
+        want, _, rest = entry.get("status", "").partition(" ")
+        entry["want"] = want
+        entry["status"] = rest.rpartition(" ")[2] or "unknown"
+        entry["installed"] = entry["status"] == "installed"
+        try:
+            entry["installed_size"] = int(entry["installed_size"]) if "installed_size" in entry else None
+        except ValueError:
+            entry["installed_size"] = None
+        entry.setdefault("arch", "all")
+        entry.setdefault("version", None)
+        entry.setdefault("description", "")
+        yield entry
+
+
+class DpkgStatusIndex:
+    """Cache de /var/lib/dpkg/status invalidado por (mtime, tamanho)."""
+
+    def __init__(self, path: str = DPKG_STATUS):
+        self.path = path
+        self.arch = native_arch()
+        self.generation = 0
+        self._lock = threading.Lock()
+        self._stamp: Optional[Tuple[int, int]] = None
+        self._by_key: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        self._by_name: Dict[str, List[Dict[str, Any]]] = {}
+        self._sorted: List[Dict[str, Any]] = []
+
+    def _refresh(self):
+        try:
+            st = os.stat(self.path)
+        except OSError:
+            st = None
+        stamp = (st.st_mtime_ns, st.st_size) if st else (0, 0)
+        if stamp == self._stamp:
+            return
+        with self._lock:
+            if stamp == self._stamp:
+                return
+            by_key: Dict[Tuple[str, str], Dict[str, Any]] = {}
+            by_name: Dict[str, List[Dict[str, Any]]] = {}
+            if st is not None:
+                with open(self.path, "r", encoding="utf-8", errors="replace") as f:
+                    text = f.read()
+                for entry in parse_status(text):
+                    by_key[(entry["name"], entry["arch"])] = entry
+                    by_name.setdefault(entry["name"], []).append(entry)
+            self._by_key, self._by_name = by_key, by_name
+            self._sorted = sorted(by_key.values(), key=lambda e: (e["name"], e["arch"]))
+            self._stamp = stamp
+            self.generation += 1
+
+    def _rank(self, entry: Dict[str, Any]) -> int:
+        if entry["arch"] == self.arch:
+            return 0
+        return 1 if entry["arch"] == "all" else 2
+
+    def get(self, name: str, arch: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """Entrada de 'nome' ou 'nome:arch' (instaladas têm prioridade)."""
+        self._refresh()
+        if arch is None and ":" in name:
+            name, _, arch = name.partition(":")
+        if arch is not None:
+            return self._by_key.get((name, arch))
+        entries = self._by_name.get(name)
+        if not entries:
+            return None
+        return min(entries, key=lambda e: (not e["installed"], self._rank(e)))
+
+    def installed_version(self, name: str) -> Optional[str]:
+        entry = self.get(name)
+        return entry["version"] if entry and entry["installed"] else None
+
+    def is_installed(self, name: str) -> Tuple[bool, str]:
+        """Mesmo contrato de check_package_installed: (instalado, versão)."""
+        version = self.installed_version(name)
+        return (True, version or "installed") if version is not None else (False, "")
+
+    def entries(self, installed_only: bool = True) -> List[Dict[str, Any]]:
+        """Entradas ordenadas por nome (e arquitetura)."""
+        self._refresh()
+        items = self._sorted
+        return [e for e in items if e["installed"]] if installed_only else list(items)
+
+    def names(self, prefix: str = "") -> List[str]:
+        """Nomes de pacotes instalados começando com 'prefix'."""
+        self._refresh()
+        return sorted(
+            name for name, entries in self._by_name.items()
+            if name.startswith(prefix) and any(e["installed"] for e in entries)
+        )
+
+    def stats(self) -> Dict[str, Any]:
+        self._refresh()
+        return {
+            "path": self.path,
+            "packages": len(self._by_key),
+            "installed": sum(1 for e in self._by_key.values() if e["installed"]),
+            "generation": self.generation,
+        }
+
+
+dpkg_status = DpkgStatusIndex()
@@ -0,0 +1,177 @@
+"""
+Inventário de hardware estático.
+
+Fatos que não mudam enquanto o host está ligado (modelo/sockets/núcleos da CPU,
+GPUs PCI, uname, limites de frequência) são coletados uma vez na inicialização
+e servidos da memória. Pode ser recoletado explicitamente via refresh().
+"""
+import json
+import platform
+import re
+import subprocess
+import threading
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+import psutil
+
+
+def _lscpu_json() -> Optional[Dict[str, Any]]:
+    """Tenta obter 'lscpu -J' (JSON)."""
+    try:
+        result = subprocess.run(["lscpu", "-J"], capture_output=True, text=True, timeout=5)
+        if result.returncode == 0:
+            data = json.loads(result.stdout)
+            # Newer lscpu returns {"lscpu": [{"field":"...","data":"..."}, ...]}
+            return data
+    except (subprocess.TimeoutExpired, FileNotFoundError, json.JSONDecodeError):
+        return None
+    return None
+
+
+def _cpuinfo_proc() -> Dict[str, Any]:
+    """Fallback via /proc/cpuinfo para sockets e modelos."""
+    sockets: Dict[str, str] = {}
+    try:
+        with open("/proc/cpuinfo", "r", encoding="utf-8", errors="ignore") as f:
+            phys_id = None
+            model_name = None
+            for line in f:
+                if line.startswith("physical id"):
+                    phys_id = line.split(":", 1)[1].strip()
+                elif line.startswith("model name") or line.startswith("Model name"):
+                    model_name = line.split(":", 1)[1].strip()
+                if phys_id is not None and model_name is not None:
+                    sockets[phys_id] = model_name
+                    phys_id = None
+                    model_name = None
+    except Exception:
+        pass
+    return {"sockets": sockets}
+
+
+def get_cpu_details() -> Dict[str, Any]:
+    """Detalhes de CPU: sockets, modelos, threads, etc."""
+    details: Dict[str, Any] = {
+        "cores_physical": psutil.cpu_count(logical=False),
+        "cores_logical": psutil.cpu_count(logical=True),
+    }
+    data = _lscpu_json()
+    def _get(field: str) -> Optional[str]:
+        if not data or "lscpu" not in data:
+            return None
+        for item in data["lscpu"]:
+            if item.get("field", "").strip().rstrip(":") == field:
+                return item.get("data")
+        return None
+    model_name = _get("Model name") or _get("Model Name")
+    sockets_str = _get("Socket(s)")
+    cores_per_socket = _get("Core(s) per socket")
+    threads_per_core = _get("Thread(s) per core")
+    if model_name:
+        details["model_name"] = model_name
+    if sockets_str:
+        try:
+            details["sockets"] = int(sockets_str)
+        except Exception:
+            details["sockets"] = None
+    if cores_per_socket:
+        try:
+            details["cores_per_socket"] = int(cores_per_socket)
+        except Exception:
+            pass
+    if threads_per_core:
+        try:
+            details["threads_per_core"] = int(threads_per_core)
+        except Exception:
+            pass
+    # Per-socket models via /proc/cpuinfo if available
+    sockets = _cpuinfo_proc().get("sockets", {})
+    if sockets:
+        details["models_per_socket"] = sockets
+    return details
+
+
+def get_pci_gpus() -> List[Dict[str, Any]]:
+    """Lista GPUs via 'lspci -nn' (VGA/Display/3D) classificando o fabricante."""
+    gpus: List[Dict[str, Any]] = []
+    try:
+        result = subprocess.run(["lspci", "-nn"], capture_output=True, text=True, timeout=10)
+        if result.returncode == 0:
+            for line in result.stdout.splitlines():
+                if any(word in line.lower() for word in ["vga", "display", "3d"]):
+                    gpu_match = re.search(r":\s*(.+?)\s*\[", line)
+                    if gpu_match:
+                        gpu_name = gpu_match.group(1).strip()
+                        lower = gpu_name.lower()
+                        gpu_type = "Integrated"
+                        if any(v in lower for v in ["nvidia", "geforce", "quadro"]):
+                            gpu_type = "NVIDIA"
+                        elif any(v in lower for v in ["amd", "radeon", "ati"]):
+                            gpu_type = "AMD"
+                        elif any(v in lower for v in ["intel", "uhd", "iris"]):
+                            gpu_type = "Intel"
+                        gpus.append(
+                            {
+                                "type": gpu_type,
+                                "name": gpu_name,
+                                "memory_total": None,
+                                "memory_used": None,
+                                "memory_free": None,
+                                "temperature": None,
+                                "utilization": None,
+                            }
+                        )
+    except (subprocess.TimeoutExpired, FileNotFoundError):
+        pass
+    return gpus
+
+
+class HardwareInventory:
+    """Cache dos fatos estáticos de hardware, coletados uma vez e renovados sob demanda."""
+
+    def __init__(self):
+        self._data: Optional[Dict[str, Any]] = None
+        self._lock = threading.Lock()
+
+    def _collect(self) -> Dict[str, Any]:
+        uname = platform.uname()
+        try:
+            freq = psutil.cpu_freq()
+        except Exception:
+            freq = None
+        return {
+            "collected_at": datetime.now().isoformat(),
+            "uname": {
+                "system": uname.system,
+                "node": uname.node,
+                "release": uname.release,
+                "version": uname.version,
+                "machine": uname.machine,
+                "processor": uname.processor,
+            },
+            "boot_time": psutil.boot_time(),
+            "cpu": get_cpu_details(),
+            "cpu_freq_limits": {"min": freq.min, "max": freq.max} if freq else None,
+            "pci_gpus": get_pci_gpus(),
+        }
+
+    def refresh(self) -> Dict[str, Any]:
+        """Recoleta todos os fatos (executa lscpu/lspci)."""
+        data = self._collect()
+        with self._lock:
+            self._data = data
+        return data
+
+    def get(self) -> Dict[str, Any]:
+        """Retorna o inventário em cache, coletando na primeira chamada."""
+        data = self._data
+        if data is None:
+            with self._lock:
+                if self._data is None:
+                    self._data = self._collect()
+                data = self._data
+        return data
+
+
+inventory = HardwareInventory()
@@ -0,0 +1,89 @@
+"""
+Histograma de latências no estilo HDR (log-linear).
+
+Valores inteiros (ns) caem em baldes cuja largura dobra a cada potência de 2,
+cada uma subdividida em 2**SUB_BITS baldes lineares: erro relativo máximo de
+~1/2**SUB_BITS (0,8% com SUB_BITS=7), memória fixa (~8 K contadores) e
+record() O(1), independentemente de quantas amostras forem gravadas.
+"""
+from array import array
+from typing import Dict, Iterable, Optional
+
+SUB_BITS = 7
+SUB_COUNT = 1 << SUB_BITS
+MAX_EXP = 64
+
+
+class LatencyHistogram:
+    __slots__ = ("counts", "count", "min", "max", "total")
+
+    def __init__(self):
+        self.counts = array("Q", bytes(8 * SUB_COUNT * MAX_EXP))
+        self.count = 0
+        self.min: Optional[int] = None
+        self.max = 0
+        self.total = 0
+
+    @staticmethod
+    def _index(value: int) -> int:
+        if value < SUB_COUNT:
+            return value
+        shift = value.bit_length() - SUB_BITS - 1
+        # Baldes [0, SUB_COUNT) guardam valores exatos; depois, SUB_COUNT por potência de 2
+        return (shift + 1) * SUB_COUNT + ((value >> shift) - SUB_COUNT)
+
+    @staticmethod
+    def _upper(index: int) -> int:
+        """Maior valor representado pelo balde (percentis reportam o limite superior)."""
+        if index < SUB_COUNT:
+            return index
+        shift = index // SUB_COUNT - 1
+        sub = index % SUB_COUNT + SUB_COUNT
+        return ((sub + 1) << shift) - 1
+
+    def record(self, value: int):
+        value = max(0, int(value))
+        self.counts[self._index(value)] += 1
+        self.count += 1
+        self.total += value
+        if self.min is None or value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+
+    def merge(self, other: "LatencyHistogram"):
+        if not other.count:
+            return
+        counts = self.counts
+        for i, c in enumerate(other.counts):
+            if c:
+                counts[i] += c
+        self.count += other.count
+        self.total += other.total
+        self.min = other.min if self.min is None else min(self.min, other.min)
+        self.max = max(self.max, other.max)
+
+    def percentile(self, p: float) -> int:
+        if not self.count:
+            return 0
+        target = max(1, int(round(self.count * p / 100.0)))
+        seen = 0
+        for i, c in enumerate(self.counts):
+            if c:
+                seen += c
+                if seen >= target:
+                    return min(self._upper(i), self.max)
+        return self.max
+
+    def summary(self, unit_divisor: float = 1000.0, percentiles: Iterable[float] = (50, 95, 99, 99.9)) -> Dict[str, float]:
+        """Resumo em microssegundos (padrão: ns / 1000)."""
+        out: Dict[str, float] = {"count": self.count}
+        if not self.count:
+            return out
+        out["min"] = round(self.min / unit_divisor, 2)
+        out["mean"] = round(self.total / self.count / unit_divisor, 2)
+        for p in percentiles:
+            key = "p" + (str(p).replace(".", "_") if p != int(p) else str(int(p)))
+            out[key] = round(self.percentile(p) / unit_divisor, 2)
+        out["max"] = round(self.max / unit_divisor, 2)
+        return out
@@ -0,0 +1,173 @@
+"""
+Leitura de logs: últimas N linhas e modo follow.
+
+- tail_lines: lê blocos de tamanho fixo a partir do fim do arquivo até achar N
+  linhas, sem ler o arquivo inteiro.
+- follow_file: acompanha um arquivo em /var/log por polling, detectando rotação
+  (inode trocado) e truncamento (logrotate copytruncate).
+- follow_journal / journal_tail: journalctl via subprocess assíncrono sem shell.
+
+A memória por conexão é limitada: linhas maiores que MAX_LINE_BYTES são
+truncadas e nada além da linha corrente fica em buffer.
+"""
+import asyncio
+import json
+import os
+import subprocess
+from datetime import datetime
+from typing import AsyncIterator, List, Optional, Tuple
+
+BLOCK_SIZE = 8192
+MAX_LINE_BYTES = 16 * 1024
+
+# Logs de arquivo conhecidos (demais nomes são tratados como unidades do journal)
+LOG_FILES = {
+    "syslog": "/var/log/syslog",
+    "auth": "/var/log/auth.log",
+    "kern": "/var/log/kern.log",
+}
+
+
+def _decode(raw: bytes) -> str:
+    if len(raw) > MAX_LINE_BYTES:
+        raw = raw[:MAX_LINE_BYTES]
+    return raw.decode("utf-8", errors="replace").rstrip("\r\n")
+
+
+def tail_lines(path: str, lines: int = 100, block_size: int = BLOCK_SIZE) -> List[str]:
+    """Últimas 'lines' linhas de 'path', lendo blocos de trás para frente."""
+    lines = max(0, int(lines))
+    if lines == 0:
+        return []
+    with open(path, "rb") as f:
+        f.seek(0, os.SEEK_END)
+        pos = f.tell()
+        chunks: List[bytes] = []
+        newlines = 0
+        # Um '\n' a mais para saber onde começa a primeira linha pedida
+        while pos > 0 and newlines <= lines:
+            step = min(block_size, pos)
+            pos -= step
+            f.seek(pos)
+            chunk = f.read(step)
+            chunks.append(chunk)
+            newlines += chunk.count(b"\n")
+    data = b"".join(reversed(chunks))
+    if data.endswith(b"\n"):
+        data = data[:-1]
+    return [_decode(l) for l in data.split(b"\n")[-lines:]] if data else []
+
+
+def _take_line(partial: bytes, raw: bytes) -> Tuple[Optional[str], bytes]:
+    """Junta 'raw' à linha parcial: (linha completa ou None, novo parcial)."""
+    if raw.endswith(b"\n") or len(partial) + len(raw) >= MAX_LINE_BYTES:
+        return _decode(partial + raw), b""
+    return None, partial + raw
+
+
+async def follow_file(path: str, lines: int = 0, poll_interval: float = 0.5) -> AsyncIterator[str]:
+    """Emite as últimas 'lines' linhas e depois cada linha nova, seguindo rotações."""
+    for line in await asyncio.to_thread(tail_lines, path, lines):
+        yield line
+    f = open(path, "rb")
+    try:
+        f.seek(0, os.SEEK_END)
+        partial = b""
+        while True:
+            raw = f.readline(MAX_LINE_BYTES)
+            if raw:
+                # sem '\n': linha ainda sendo escrita, fica em 'partial'
+                line, partial = _take_line(partial, raw)
+                if line is not None:
+                    yield line
+                continue
+            await asyncio.sleep(poll_interval)
+            try:
+                st = os.stat(path)
+            except FileNotFoundError:
+                continue  # entre o rename do logrotate e a criação do novo arquivo
+            cur = os.fstat(f.fileno())
+            if st.st_ino != cur.st_ino or st.st_dev != cur.st_dev:
+                # Rotacionado: terminar o arquivo antigo (linha a linha, com o mesmo
+                # limite por linha) e abrir o novo desde o início
+                while True:
+                    raw = f.readline(MAX_LINE_BYTES)
+                    if not raw:
+                        break
+                    line, partial = _take_line(partial, raw)
+                    if line is not None:
+                        yield line
+                if partial:
+                    yield _decode(partial)
+                partial = b""
+                f.close()
+                f = open(path, "rb")
+            elif st.st_size < f.tell():
+                # Truncado (copytruncate)
+                f.seek(0)
+                partial = b""
+    finally:
+        f.close()
+
+
+def _journal_line(entry: dict) -> str:
+    """Formata uma entrada JSON do journal no estilo 'short' do journalctl."""
+    msg = entry.get("MESSAGE", "")
+    if isinstance(msg, list):  # mensagens binárias vêm como lista de bytes
+        msg = bytes(msg).decode("utf-8", errors="replace")
+    try:
+        ts = datetime.fromtimestamp(int(entry.get("__REALTIME_TIMESTAMP", 0)) / 1_000_000).strftime("%b %d %H:%M:%S")
+    except (TypeError, ValueError):
+        ts = ""
+    ident = entry.get("SYSLOG_IDENTIFIER") or entry.get("_COMM") or ""
+    pid = entry.get("_PID")
+    ident = f"{ident}[{pid}]" if pid else ident
+    return f"{ts} {entry.get('_HOSTNAME', '')} {ident}: {msg}".strip()
+
+
+def journal_tail(unit: str, lines: int = 100, timeout: int = 15) -> Optional[List[str]]:
+    """Últimas linhas de uma unidade via journalctl (sem shell); None se falhar."""
+    try:
+        result = subprocess.run(
+            ["journalctl", "-u", unit, "-n", str(int(lines)), "--no-pager"],
+            capture_output=True,
+            text=True,
+            timeout=timeout,
+        )
+    except (subprocess.TimeoutExpired, FileNotFoundError):
+        return None
+    if result.returncode != 0:
+        return None
+    out = result.stdout.strip()
+    return out.split("\n") if out else []
+
+
+async def follow_journal(unit: str, lines: int = 0) -> AsyncIterator[str]:
+    """Segue uma unidade com 'journalctl -f -o json', emitindo linhas formatadas."""
+    proc = await asyncio.create_subprocess_exec(
+        "journalctl", "-u", unit, "-f", "-o", "json", "-n", str(int(lines)), "--no-pager",
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.DEVNULL,
+        limit=MAX_LINE_BYTES * 4,
+    )
+    try:
+        assert proc.stdout is not None
+        while True:
+            try:
+                raw = await proc.stdout.readline()
+            except ValueError:
+                # Entrada maior que o limite do buffer: descartar
+                continue
+            if not raw:
+                break
+            try:
+                yield _decode(_journal_line(json.loads(raw)).encode("utf-8"))
+            except (json.JSONDecodeError, UnicodeDecodeError):
+                yield _decode(raw)
+    finally:
+        if proc.returncode is None:
+            proc.terminate()
+            try:
+                await asyncio.wait_for(proc.wait(), timeout=2)
+            except asyncio.TimeoutError:
+                proc.kill()
@@ -0,0 +1,161 @@
+"""
+Histórico de métricas em memória (ring buffer por métrica).
+
+Cada métrica usa um array pré-alocado de tamanho fixo, alimentado pelo sampler
+de telemetria. Todas as métricas compartilham o mesmo vetor de timestamps, pois
+são amostradas juntas. A redução para N pontos (min/max/média por bucket) é
+feita no servidor, com NumPy quando disponível.
+"""
+import math
+import threading
+from array import array
+from bisect import bisect_left
+from typing import Any, Dict, List, Optional
+
+import psutil
+
+from app.core.config import settings
+
+try:
+    import numpy as np  # type: ignore
+    _numpy_available = True
+except Exception:
+    np = None
+    _numpy_available = False
+
+
+class MetricsHistory:
+    """Ring buffers de tamanho fixo: um vetor de timestamps e um vetor de valores por métrica."""
+
+    def __init__(self, capacity: int, cpu_cores: int):
+        self.capacity = max(2, int(capacity))
+        self.cpu_cores = max(1, int(cpu_cores))
+        self.metrics: List[str] = [
+            "cpu",
+            *[f"cpu_core_{i}" for i in range(self.cpu_cores)],
+            "memory",
+            "disk_read",
+            "disk_write",
+            "net_sent",
+            "net_recv",
+            "load1",
+            "load5",
+            "load15",
+        ]
+        # Timestamps em double; valores em float32 para reduzir a memória
+        self._ts = array("d", bytes(8 * self.capacity))
+        self._values: Dict[str, array] = {m: array("f", bytes(4 * self.capacity)) for m in self.metrics}
+        self._head = 0  # próxima posição de escrita
+        self._count = 0
+        self._lock = threading.Lock()
+
+    def memory_bytes(self) -> int:
+        return self._ts.itemsize * self.capacity + sum(v.itemsize * self.capacity for v in self._values.values())
+
+    def record(self, snapshot: Dict[str, Any]):
+        """Grava um snapshot do TelemetrySampler (usado como listener do sampler)."""
+        cpu = snapshot.get("cpu") or {}
+        per_core = cpu.get("percent_per_core") or []
+        disk = snapshot.get("disk_io") or {}
+        net = snapshot.get("net_io") or {}
+        load = list(snapshot.get("load_avg") or [0.0, 0.0, 0.0]) + [0.0, 0.0, 0.0]
+        row = {
+            "cpu": cpu.get("percent_total", 0.0),
+            "memory": (snapshot.get("memory") or {}).get("percent", 0.0),
+            # Na primeira amostra ainda não há taxa; registra 0
+            "disk_read": disk.get("read_bytes_per_sec", 0.0),
+            "disk_write": disk.get("write_bytes_per_sec", 0.0),
+            "net_sent": net.get("bytes_sent_per_sec", 0.0),
+            "net_recv": net.get("bytes_recv_per_sec", 0.0),
+            "load1": load[0],
+            "load5": load[1],
+            "load15": load[2],
+        }
+        for i in range(self.cpu_cores):
+            row[f"cpu_core_{i}"] = per_core[i] if i < len(per_core) else 0.0
+
+        with self._lock:
+            pos = self._head
+            self._ts[pos] = float(snapshot.get("sampled_at_ts", 0.0))
+            for name, buf in self._values.items():
+                buf[pos] = float(row[name] or 0.0)
+            self._head = (pos + 1) % self.capacity
+            self._count = min(self._count + 1, self.capacity)
+
+    def _ordered(self, metric: str):
+        """Copia (timestamps, valores) em ordem cronológica."""
+        values = self._values[metric]
+        with self._lock:
+            if self._count < self.capacity:
+                return self._ts[:self._count], values[:self._count]
+            h = self._head
+            return self._ts[h:] + self._ts[:h], values[h:] + values[:h]
+
+    def query(self, metric: str, start: Optional[float] = None, end: Optional[float] = None, points: int = 300) -> Dict[str, Any]:
+        """Retorna a série de 'metric' entre start e end reduzida a no máximo 'points' buckets."""
+        if metric not in self._values:
+            raise KeyError(metric)
+        points = max(1, int(points))
+        ts, vals = self._ordered(metric)
+        lo = bisect_left(ts, start) if start is not None else 0
+        hi = bisect_left(ts, end) if end is not None else len(ts)
+        ts, vals = ts[lo:hi], vals[lo:hi]
+        n = len(ts)
+
+        result: Dict[str, Any] = {
+            "metric": metric,
+            "from": ts[0] if n else start,
+            "to": ts[-1] if n else end,
+            "samples": n,
+            "points": 0,
+            "t": [],
+            "avg": [],
+            "min": [],
+            "max": [],
+        }
+        if n == 0:
+            return result
+
+        if n <= points:
+            # Sem redução: min = max = avg
+            raw = [round(v, 2) for v in vals]
+            result.update({"points": n, "t": [round(t, 3) for t in ts], "avg": raw, "min": raw, "max": raw})
+            return result
+
+        if _numpy_available:
+            t_arr = np.frombuffer(ts, dtype=np.float64)
+            v_arr = np.frombuffer(vals, dtype=np.float32).astype(np.float64)
+            edges = np.linspace(0, n, points + 1).astype(np.int64)
+            starts = edges[:-1]
+            counts = np.diff(edges)
+            t_out = np.add.reduceat(t_arr, starts) / counts
+            avg = np.add.reduceat(v_arr, starts) / counts
+            vmin = np.minimum.reduceat(v_arr, starts)
+            vmax = np.maximum.reduceat(v_arr, starts)
+            result.update({
+                "points": points,
+                "t": np.round(t_out, 3).tolist(),
+                "avg": np.round(avg, 2).tolist(),
+                "min": np.round(vmin, 2).tolist(),
+                "max": np.round(vmax, 2).tolist(),
+            })
+        else:
+            # Fallback sem NumPy: min/max/sum sobre fatias de array (executados em C)
+            t_out, avg, vmin, vmax = [], [], [], []
+            for b in range(points):
+                a = (b * n) // points
+                z = ((b + 1) * n) // points
+                seg = vals[a:z]
+                cnt = z - a
+                t_out.append(round((ts[a] + ts[z - 1]) / 2, 3))
+                avg.append(round(sum(seg) / cnt, 2))
+                vmin.append(round(min(seg), 2))
+                vmax.append(round(max(seg), 2))
+            result.update({"points": points, "t": t_out, "avg": avg, "min": vmin, "max": vmax})
+        return result
+
+
+history = MetricsHistory(
+    capacity=math.ceil(settings.metrics_history_seconds / max(0.1, settings.telemetry_interval)),
+    cpu_cores=psutil.cpu_count(logical=True) or 1,
+)
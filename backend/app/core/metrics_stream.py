@@ -0,0 +1,141 @@
+"""
+Broadcast de métricas ao vivo para WebSocket/SSE.
+
+O sampler de telemetria coleta uma vez por tick; o broadcaster monta os grupos
+de métricas uma única vez e entrega a cada assinante apenas os grupos que ele
+assinou, em frames delta (somente campos que mudaram desde o último envio).
+Cada assinante tem uma fila limitada: se ela enche, o cliente é descartado em
+vez de bloquear o broadcaster.
+"""
+import asyncio
+import json
+import time
+from typing import Any, Dict, Iterable, List, Optional, Set
+
+from app.core.config import settings
+from app.core.nvidia import gpu_collector
+
+GROUPS = ("cpu", "memory", "load", "disk", "net", "gpu")
+DEFAULT_GROUPS = ("cpu", "memory", "load", "disk", "net")
+
+
+def parse_groups(metrics: Optional[Iterable[str]]) -> Set[str]:
+    """Normaliza uma lista de grupos (ou string separada por vírgula) para os grupos válidos."""
+    if metrics is None:
+        return set(DEFAULT_GROUPS)
+    if isinstance(metrics, str):
+        metrics = metrics.split(",")
+    groups = {m.strip().lower() for m in metrics if m and m.strip()}
+    return {g for g in groups if g in GROUPS} or set(DEFAULT_GROUPS)
+
+
+def _diff(new: Any, old: Any) -> Any:
+    """Delta raso: para dicts retorna apenas chaves alteradas; outros tipos comparam inteiros."""
+    if isinstance(new, dict) and isinstance(old, dict):
+        return {k: v for k, v in new.items() if old.get(k) != v}
+    return new if new != old else None
+
+
+class Subscriber:
+    """Estado de um cliente conectado: grupos assinados, cadência e fila de frames."""
+
+    def __init__(self, groups: Set[str], interval: float, queue_size: int):
+        self.groups = groups
+        self.interval = interval
+        self.queue: "asyncio.Queue[Optional[str]]" = asyncio.Queue(maxsize=queue_size)
+        self.next_due = 0.0
+        self.last_sent: Dict[str, Any] = {}
+        self.dropped = False
+
+    def update(self, groups: Optional[Iterable[str]] = None, interval: Optional[float] = None, min_interval: float = 0.1):
+        if groups is not None:
+            self.groups = parse_groups(groups)
+            # Novos grupos precisam de um frame completo
+            self.last_sent = {g: v for g, v in self.last_sent.items() if g in self.groups}
+        if interval is not None:
+            self.interval = max(min_interval, float(interval))
+            self.next_due = 0.0
+
+
+class MetricsBroadcaster:
+    """Distribui cada snapshot do sampler para todos os assinantes sem bloquear."""
+
+    def __init__(self, queue_size: int = 8, min_interval: float = 1.0):
+        self.queue_size = queue_size
+        self.min_interval = min_interval
+        self.subscribers: List[Subscriber] = []
+        self.dropped_total = 0
+
+    def subscribe(self, metrics: Optional[Iterable[str]] = None, interval: Optional[float] = None) -> Subscriber:
+        sub = Subscriber(parse_groups(metrics), max(self.min_interval, float(interval or self.min_interval)), self.queue_size)
+        self.subscribers.append(sub)
+        return sub
+
+    def unsubscribe(self, sub: Subscriber):
+        try:
+            self.subscribers.remove(sub)
+        except ValueError:
+            pass
+
+    def _drop(self, sub: Subscriber):
+        """Cliente lento: esvazia a fila e deixa apenas o sentinela de encerramento."""
+        sub.dropped = True
+        self.dropped_total += 1
+        self.unsubscribe(sub)
+        while not sub.queue.empty():
+            sub.queue.get_nowait()
+        sub.queue.put_nowait(None)
+
+    def _groups(self, snapshot: Dict[str, Any], wanted: Set[str]) -> Dict[str, Any]:
+        groups: Dict[str, Any] = {}
+        if "cpu" in wanted:
+            groups["cpu"] = snapshot.get("cpu")
+        if "memory" in wanted:
+            groups["memory"] = snapshot.get("memory")
+        if "load" in wanted:
+            groups["load"] = snapshot.get("load_avg")
+        if "disk" in wanted:
+            groups["disk"] = snapshot.get("disk_io")
+        if "net" in wanted:
+            groups["net"] = snapshot.get("net_io")
+        if "gpu" in wanted:
+            groups["gpu"] = gpu_collector.latest() or []
+        return groups
+
+    def publish(self, snapshot: Dict[str, Any]):
+        """Listener do sampler: roda no event loop, nunca aguarda os clientes."""
+        if not self.subscribers:
+            return
+        now = time.monotonic()
+        due = [s for s in self.subscribers if now >= s.next_due]
+        if not due:
+            return
+        wanted: Set[str] = set().union(*(s.groups for s in due))
+        groups = self._groups(snapshot, wanted)
+        for sub in due:
+            sub.next_due = now + sub.interval - 0.05
+            full = not sub.last_sent
+            data: Dict[str, Any] = {}
+            for g in sub.groups:
+                value = groups.get(g)
+                if g not in sub.last_sent:
+                    data[g] = value
+                else:
+                    delta = _diff(value, sub.last_sent[g])
+                    if delta is not None and delta != {}:
+                        data[g] = delta
+                sub.last_sent[g] = value
+            frame = json.dumps(
+                {"type": "full" if full else "delta", "t": snapshot.get("sampled_at_ts"), "data": data},
+                separators=(",", ":"),
+            )
+            try:
+                sub.queue.put_nowait(frame)
+            except asyncio.QueueFull:
+                self._drop(sub)
+
+    def stats(self) -> Dict[str, Any]:
+        return {"subscribers": len(self.subscribers), "dropped_total": self.dropped_total}
+
+
+broadcaster = MetricsBroadcaster(min_interval=settings.telemetry_interval)
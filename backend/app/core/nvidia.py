@@ -0,0 +1,227 @@
+"""
+Coletor contínuo de métricas de GPU NVIDIA.
+
+Em vez de executar 'nvidia-smi' várias vezes por atualização do dashboard, um
+único processo 'nvidia-smi --query-gpu=... -lms <intervalo>' fica rodando e sua
+saída CSV é lida incrementalmente por uma task asyncio. O último registro por
+GPU e um histórico curto ficam em memória.
+"""
+import asyncio
+import csv
+import glob
+import os
+import re
+import shutil
+import subprocess
+import time
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional
+
+from app.core.config import settings
+
+QUERY_FIELDS = [
+    "index",
+    "name",
+    "pci.bus_id",
+    "memory.total",
+    "memory.used",
+    "memory.free",
+    "temperature.gpu",
+    "utilization.gpu",
+    "driver_version",
+]
+
+
+def which_nvidia_smi() -> Optional[str]:
+    """Locate the nvidia-smi binary even if not in PATH (systemd envs)."""
+    # Try PATH first
+    exe = shutil.which("nvidia-smi")
+    if exe:
+        return exe
+    # Common absolute locations
+    candidates = [
+        "/usr/bin/nvidia-smi",
+        "/usr/local/bin/nvidia-smi",
+        "/bin/nvidia-smi",
+        "/usr/local/nvidia/bin/nvidia-smi",
+    ]
+    for c in candidates:
+        if os.path.isfile(c) and os.access(c, os.X_OK):
+            return c
+    # Some distros place it under versioned nvidia dirs
+    for path in glob.glob("/usr/lib/nvidia-*/bin/nvidia-smi"):
+        if os.path.isfile(path) and os.access(path, os.X_OK):
+            return path
+    return None
+
+
+def nvidia_env(exe: str) -> Dict[str, str]:
+    """Ambiente com PATH incluindo o diretório do nvidia-smi e caminhos comuns."""
+    env = os.environ.copy()
+    extra_paths = [os.path.dirname(exe), "/usr/bin", "/usr/local/bin", "/bin", "/usr/local/nvidia/bin"]
+    env["PATH"] = os.pathsep.join([p for p in extra_paths + [env.get("PATH", "")] if p])
+    return env
+
+
+def _to_int(x: Optional[str]) -> Optional[int]:
+    try:
+        return int(float(x))
+    except Exception:
+        return None
+
+
+def parse_query_line(line: str) -> Optional[Dict[str, Any]]:
+    """Converte uma linha CSV (noheader,nounits) de QUERY_FIELDS em registro de GPU."""
+    line = line.strip()
+    if not line:
+        return None
+    try:
+        parts = next(csv.reader([line], skipinitialspace=True))
+    except Exception:
+        return None
+    if len(parts) < len(QUERY_FIELDS):
+        return None
+    parts = [p.strip() for p in parts]
+    return {
+        "index": _to_int(parts[0]),
+        "type": "NVIDIA",
+        "name": parts[1],
+        "bus_id": parts[2],
+        "memory_total": _to_int(parts[3]),
+        "memory_used": _to_int(parts[4]),
+        "memory_free": _to_int(parts[5]),
+        "temperature": _to_int(parts[6]),
+        "utilization": _to_int(parts[7]),
+        "driver_version": parts[8] if parts[8] and not parts[8].startswith("[") else None,
+    }
+
+
+class NvidiaSmiCollector:
+    """Mantém um 'nvidia-smi -lms' em execução e publica o último registro por GPU."""
+
+    def __init__(self, interval_ms: int = 2000, history_size: int = 300):
+        self.interval_ms = max(100, int(interval_ms))
+        self.history_size = max(1, int(history_size))
+        self.exe: Optional[str] = None
+        self.cuda_version: Optional[str] = None
+        self.last_error: Optional[str] = None
+        self._latest: Dict[int, Dict[str, Any]] = {}
+        self._history: Dict[int, Deque[Dict[str, Any]]] = {}
+        self._updated_at: Optional[float] = None
+        self._proc: Optional[asyncio.subprocess.Process] = None
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def _publish(self, record: Dict[str, Any]):
+        idx = record.get("index")
+        if idx is None:
+            return
+        now = time.time()
+        record["sampled_at"] = now
+        record["cuda_version"] = self.cuda_version
+        self._latest[idx] = record
+        hist = self._history.get(idx)
+        if hist is None:
+            hist = self._history[idx] = deque(maxlen=self.history_size)
+        hist.append({
+            "t": round(now, 3),
+            "utilization": record["utilization"],
+            "memory_used": record["memory_used"],
+            "temperature": record["temperature"],
+        })
+        self._updated_at = now
+
+    def _detect_cuda(self):
+        """CUDA não é um campo de --query-gpu; lê uma vez do cabeçalho do nvidia-smi."""
+        try:
+            out = subprocess.run([self.exe], capture_output=True, text=True, timeout=5, env=nvidia_env(self.exe)).stdout
+            m = re.search(r"CUDA Version:\s*([\d.]+)", out or "")
+            self.cuda_version = m.group(1) if m else None
+        except Exception:
+            self.cuda_version = None
+
+    async def _stream_once(self):
+        self._proc = await asyncio.create_subprocess_exec(
+            self.exe,
+            f"--query-gpu={','.join(QUERY_FIELDS)}",
+            "--format=csv,noheader,nounits",
+            "-lms",
+            str(self.interval_ms),
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.DEVNULL,
+            env=nvidia_env(self.exe),
+        )
+        assert self._proc.stdout is not None
+        while True:
+            raw = await self._proc.stdout.readline()
+            if not raw:
+                break
+            record = parse_query_line(raw.decode("utf-8", errors="ignore"))
+            if record:
+                self._publish(record)
+        return await self._proc.wait()
+
+    async def _run(self):
+        await asyncio.to_thread(self._detect_cuda)
+        backoff = 1.0
+        while True:
+            started = time.time()
+            try:
+                rc = await self._stream_once()
+                self.last_error = f"nvidia-smi terminou com código {rc}"
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.last_error = str(e)
+            # Reinicia com backoff exponencial se o processo morrer cedo
+            backoff = 1.0 if time.time() - started > 60 else min(backoff * 2, 60.0)
+            await asyncio.sleep(backoff)
+
+    def start(self):
+        if self.running:
+            return
+        self.exe = which_nvidia_smi()
+        if not self.exe:
+            return
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._proc is not None and self._proc.returncode is None:
+            try:
+                self._proc.terminate()
+            except ProcessLookupError:
+                pass
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def latest(self) -> Optional[List[Dict[str, Any]]]:
+        """Últimos registros por GPU, ou None se o coletor não tem dados recentes."""
+        if self._updated_at is None:
+            return None
+        max_age = 3 * self.interval_ms / 1000.0 + 5
+        if time.time() - self._updated_at > max_age:
+            return None
+        return [dict(self._latest[i]) for i in sorted(self._latest)]
+
+    def history(self) -> Dict[int, List[Dict[str, Any]]]:
+        return {i: list(h) for i, h in sorted(self._history.items())}
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "available": self.exe is not None,
+            "running": self.running,
+            "interval_ms": self.interval_ms,
+            "updated_at": self._updated_at,
+            "last_error": self.last_error,
+        }
+
+
+gpu_collector = NvidiaSmiCollector(interval_ms=settings.gpu_sample_interval_ms)
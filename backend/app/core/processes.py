@@ -0,0 +1,199 @@
+"""
+Tabela de processos com cache persistente de psutil.Process por PID.
+
+psutil.Process.cpu_percent(interval=None) mede o delta desde a chamada anterior
+no MESMO objeto; criando objetos novos a cada requisição o primeiro valor é
+sempre 0.0. Aqui os objetos são mantidos entre chamadas (PIDs mortos são
+removidos), então o %CPU é o uso real desde a última amostra.
+
+No Linux o caminho padrão usa app.core.procfs (varredura direta de /proc em
+arrays colunares), guardando o snapshot anterior para o delta de CPU.
+"""
+import heapq
+import threading
+import time
+from functools import lru_cache
+from typing import Any, Dict, List, Optional
+
+import psutil
+
+from app.core import procfs
+
+try:
+    import pwd
+except ImportError:  # Windows (desenvolvimento)
+    pwd = None
+
+SORT_KEYS = {
+    "cpu": ("cpu_percent", True),
+    "memory": ("memory_percent", True),
+    "rss": ("rss", True),
+    "pid": ("pid", False),
+    "name": ("name", False),
+}
+
+
+class ProcessTable:
+    """Cache PID -> psutil.Process usado por /system/processes."""
+
+    def __init__(self, use_procfs: Optional[bool] = None):
+        self._procs: Dict[int, psutil.Process] = {}
+        self._prev_snap: Optional[procfs.ProcSnapshot] = None
+        self._lock = threading.Lock()
+        self.last_sample: Optional[float] = None
+        self.use_procfs = procfs.available() if use_procfs is None else use_procfs
+
+    def _top_procfs(
+        self,
+        sort: str,
+        limit: int,
+        user: Optional[str],
+        needle: Optional[str],
+        min_cpu: Optional[float],
+    ) -> Dict[str, Any]:
+        """Top-N a partir de snapshots de /proc; só monta dicts para as linhas escolhidas."""
+        with self._lock:
+            cur = procfs.scan()
+            cpu, known = procfs.cpu_percent(self._prev_snap, cur)
+            self._prev_snap = cur
+            self.last_sample = time.time()
+        total_mem = psutil.virtual_memory().total or 1
+
+        idx: Any = range(len(cur))
+        if user:
+            uid = _uid_for(user)
+            idx = [i for i in idx if cur.uid[i] == uid]
+        if needle:
+            idx = [i for i in idx if needle in cur.comm[i].lower()]
+        if min_cpu is not None:
+            idx = [i for i in idx if cpu[i] >= min_cpu]
+        columns = {
+            "cpu": cpu,
+            "memory": cur.rss,
+            "rss": cur.rss,
+            "pid": cur.pid,
+            "name": cur.comm,
+        }
+        column = columns.get(sort, cpu)
+        descending = SORT_KEYS.get(sort, SORT_KEYS["cpu"])[1]
+        select = heapq.nlargest if descending else heapq.nsmallest
+        chosen = select(limit, idx, key=column.__getitem__)
+
+        rows = []
+        for i in chosen:
+            row = cur.row(i)
+            rows.append({
+                "pid": row["pid"],
+                "name": row["name"],
+                "username": _username(cur.uid[i]),
+                "status": row["state"],
+                "cpu_percent": cpu[i],
+                "memory_percent": round(cur.rss[i] * 100.0 / total_mem, 2),
+                "rss": cur.rss[i],
+                "cpu_sampled": known[i],
+            })
+        return {"processes": rows, "total": len(cur), "matched": len(idx), "sort": sort, "limit": limit}
+
+    def sample(self) -> List[Dict[str, Any]]:
+        """Amostra todos os processos reaproveitando os objetos cacheados."""
+        rows: List[Dict[str, Any]] = []
+        with self._lock:
+            seen = set()
+            for pid in psutil.pids():
+                proc = self._procs.get(pid)
+                # PID reutilizado por outro processo: descartar o objeto antigo
+                if proc is not None and not proc.is_running():
+                    proc = None
+                if proc is None:
+                    try:
+                        proc = psutil.Process(pid)
+                    except (psutil.NoSuchProcess, psutil.AccessDenied):
+                        continue
+                    self._procs[pid] = proc
+                    first = True
+                else:
+                    first = False
+                try:
+                    with proc.oneshot():
+                        cpu = proc.cpu_percent(interval=None)
+                        mem = proc.memory_info()
+                        rows.append({
+                            "pid": pid,
+                            "name": proc.name(),
+                            "username": _safe_username(proc),
+                            "status": proc.status(),
+                            "cpu_percent": cpu,
+                            "memory_percent": round(proc.memory_percent(), 2),
+                            "rss": mem.rss,
+                            # False quando o processo acabou de entrar no cache (CPU ainda sem delta)
+                            "cpu_sampled": not first,
+                        })
+                    seen.add(pid)
+                except psutil.NoSuchProcess:
+                    self._procs.pop(pid, None)
+                except psutil.AccessDenied:
+                    seen.add(pid)
+            # Remover PIDs que não existem mais
+            for pid in list(self._procs.keys() - seen):
+                self._procs.pop(pid, None)
+            self.last_sample = time.time()
+        return rows
+
+    def top(
+        self,
+        sort: str = "cpu",
+        limit: int = 50,
+        user: Optional[str] = None,
+        name_contains: Optional[str] = None,
+        min_cpu: Optional[float] = None,
+    ) -> Dict[str, Any]:
+        """Filtra e seleciona os N primeiros com heap (sem ordenar a lista inteira)."""
+        key, descending = SORT_KEYS.get(sort, SORT_KEYS["cpu"])
+        needle = name_contains.lower() if name_contains else None
+        if self.use_procfs:
+            try:
+                return self._top_procfs(sort, limit, user, needle, min_cpu)
+            except OSError:
+                # /proc indisponível (ex.: container restrito): usar psutil
+                self.use_procfs = False
+        rows = self.sample()
+        total = len(rows)
+        if user or needle or min_cpu is not None:
+            rows = [
+                r for r in rows
+                if (not user or r["username"] == user)
+                and (not needle or needle in (r["name"] or "").lower())
+                and (min_cpu is None or r["cpu_percent"] >= min_cpu)
+            ]
+        select = heapq.nlargest if descending else heapq.nsmallest
+        top = select(limit, rows, key=lambda r: r[key])
+        return {"processes": top, "total": total, "matched": len(rows), "sort": sort, "limit": limit}
+
+
+@lru_cache(maxsize=1024)
+def _username(uid: int) -> Optional[str]:
+    if uid < 0 or pwd is None:
+        return None
+    try:
+        return pwd.getpwuid(uid).pw_name
+    except KeyError:
+        return str(uid)
+
+
+def _uid_for(user: str) -> Optional[int]:
+    if pwd is None:
+        return None
+    try:
+        return pwd.getpwnam(user).pw_uid
+    except KeyError:
+        return int(user) if user.isdigit() else None
+
+
+def _safe_username(proc: psutil.Process) -> Optional[str]:
+    try:
+        return proc.username()
+    except (psutil.AccessDenied, KeyError):
+        return None
+
+
+process_table = ProcessTable()
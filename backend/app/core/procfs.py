@@ -0,0 +1,202 @@
+"""
+Snapshot de processos lendo /proc diretamente.
+
+Alternativa mais barata a psutil.process_iter em hosts com milhares de
+processos: uma única varredura com os.scandir por tick, leitura binária de
+/proc/<pid>/stat, statm e status (os.open/os.read, sem objetos por PID) e
+resultados guardados em arrays colunares (pid, ppid, uid, utime, stime, rss,
+starttime, state, comm). O %CPU entre dois snapshots é calculado de forma
+vetorizada (NumPy quando disponível).
+"""
+import os
+import sys
+import time
+from array import array
+from typing import Dict, Iterator, List, Optional, Tuple
+
+try:
+    import numpy as np  # type: ignore
+    _numpy_available = True
+except Exception:
+    np = None
+    _numpy_available = False
+
+PROC_ROOT = "/proc"
+CLK_TCK = os.sysconf("SC_CLK_TCK") if hasattr(os, "sysconf") else 100
+PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+STATES = {
+    "R": "running",
+    "S": "sleeping",
+    "D": "disk-sleep",
+    "Z": "zombie",
+    "T": "stopped",
+    "t": "tracing-stop",
+    "X": "dead",
+    "I": "idle",
+    "P": "parked",
+    "W": "waking",
+}
+
+
+def available(root: str = PROC_ROOT) -> bool:
+    return os.path.isfile(os.path.join(root, "self", "stat")) or os.path.isfile(os.path.join(root, "1", "stat"))
+
+
+def _read(path: str, size: int = 4096) -> Optional[bytes]:
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except OSError:
+        return None
+    try:
+        return os.read(fd, size)
+    except OSError:
+        return None
+    finally:
+        os.close(fd)
+
+
+def read_comm(pid: int, root: str = PROC_ROOT) -> Optional[str]:
+    """Nome (comm) de um único PID, sem varrer /proc inteiro."""
+    data = _read(f"{root}/{pid}/comm", 64)
+    return data.rstrip(b"\n").decode("utf-8", errors="replace") if data else None
+
+
+class ProcSnapshot:
+    """Tabela colunar de processos em um instante."""
+
+    __slots__ = ("taken_at", "pid", "ppid", "uid", "utime", "stime", "rss", "starttime", "state", "comm")
+
+    def __init__(self, taken_at: float):
+        self.taken_at = taken_at
+        self.pid = array("i")
+        self.ppid = array("i")
+        self.uid = array("q")  # -1 quando não lido
+        self.utime = array("q")  # ticks (CLK_TCK)
+        self.stime = array("q")
+        self.rss = array("q")  # bytes
+        self.starttime = array("q")  # ticks desde o boot (detecta PID reutilizado)
+        self.state = bytearray()
+        self.comm: List[str] = []
+
+    def __len__(self) -> int:
+        return len(self.pid)
+
+    def row(self, i: int) -> Dict[str, object]:
+        state = chr(self.state[i])
+        return {
+            "pid": self.pid[i],
+            "ppid": self.ppid[i],
+            "uid": self.uid[i] if self.uid[i] >= 0 else None,
+            "utime": self.utime[i] / CLK_TCK,
+            "stime": self.stime[i] / CLK_TCK,
+            "rss": self.rss[i],
+            "state": STATES.get(state, state),
+            "name": self.comm[i],
+        }
+
+    def rows(self) -> Iterator[Dict[str, object]]:
+        for i in range(len(self)):
+            yield self.row(i)
+
+    def index(self) -> Dict[int, int]:
+        """Mapa pid -> linha."""
+        return {pid: i for i, pid in enumerate(self.pid)}
+
+
+def scan(root: str = PROC_ROOT, with_uid: bool = True) -> ProcSnapshot:
+    """Varre /proc uma vez e devolve um ProcSnapshot colunar."""
+    snap = ProcSnapshot(time.monotonic())
+    pid_a, ppid_a, uid_a = snap.pid.append, snap.ppid.append, snap.uid.append
+    ut_a, st_a, rss_a, start_a = snap.utime.append, snap.stime.append, snap.rss.append, snap.starttime.append
+    state_a, comm_a = snap.state.append, snap.comm.append
+    intern = sys.intern
+
+    with os.scandir(root) as it:
+        for entry in it:
+            name = entry.name
+            if not name.isdigit():
+                continue
+            base = entry.path
+            stat = _read(base + "/stat", 1024)
+            if not stat:
+                continue  # processo terminou durante a varredura
+            lp = stat.find(b"(")
+            rp = stat.rfind(b")")
+            if lp < 0 or rp < 0:
+                continue
+            # Campos após ") ": state(3) ppid(4) ... utime(14) stime(15) ... starttime(22)
+            fields = stat[rp + 2:].split(b" ", 20)
+            if len(fields) < 20:
+                continue
+            statm = _read(base + "/statm", 256)
+            rss_pages = 0
+            if statm:
+                parts = statm.split(b" ", 2)
+                if len(parts) > 1:
+                    rss_pages = int(parts[1])
+            uid = -1
+            if with_uid:
+                status = _read(base + "/status", 2048)
+                if status:
+                    k = status.find(b"\nUid:")
+                    if k >= 0:
+                        end = status.find(b"\t", k + 6)
+                        try:
+                            uid = int(status[k + 6:end] if end > 0 else status[k + 6:].split()[0])
+                        except ValueError:
+                            uid = -1
+
+            pid_a(int(name))
+            ppid_a(int(fields[1]))
+            uid_a(uid)
+            ut_a(int(fields[11]))
+            st_a(int(fields[12]))
+            rss_a(rss_pages * PAGE_SIZE)
+            start_a(int(fields[19]))
+            state_a(fields[0][0])
+            comm_a(intern(stat[lp + 1:rp].decode("utf-8", errors="replace")))
+    return snap
+
+
+def cpu_percent(prev: Optional[ProcSnapshot], cur: ProcSnapshot) -> Tuple[List[float], List[bool]]:
+    """%CPU por linha de 'cur' desde 'prev' (semântica do psutil: 100% = um núcleo).
+
+    Retorna (percentuais, conhecidos); processos novos ou com PID reutilizado
+    ficam com 0.0 e conhecido=False.
+    """
+    n = len(cur)
+    if prev is None or len(prev) == 0 or n == 0:
+        return [0.0] * n, [False] * n
+    elapsed = cur.taken_at - prev.taken_at
+    if elapsed <= 0:
+        return [0.0] * n, [False] * n
+    scale = 100.0 / (CLK_TCK * elapsed)
+
+    if _numpy_available:
+        c_pid = np.frombuffer(cur.pid, dtype=np.int32)
+        p_pid = np.frombuffer(prev.pid, dtype=np.int32)
+        _, ci, pi = np.intersect1d(c_pid, p_pid, assume_unique=True, return_indices=True)
+        c_start = np.frombuffer(cur.starttime, dtype=np.int64)[ci]
+        p_start = np.frombuffer(prev.starttime, dtype=np.int64)[pi]
+        same = c_start == p_start
+        ci, pi = ci[same], pi[same]
+        c_ticks = np.frombuffer(cur.utime, dtype=np.int64)[ci] + np.frombuffer(cur.stime, dtype=np.int64)[ci]
+        p_ticks = np.frombuffer(prev.utime, dtype=np.int64)[pi] + np.frombuffer(prev.stime, dtype=np.int64)[pi]
+        pct = np.zeros(n, dtype=np.float64)
+        pct[ci] = np.maximum(c_ticks - p_ticks, 0) * scale
+        known = np.zeros(n, dtype=bool)
+        known[ci] = True
+        return np.round(pct, 1).tolist(), known.tolist()
+
+    prev_idx = prev.index()
+    pct_l = [0.0] * n
+    known_l = [False] * n
+    for i, pid in enumerate(cur.pid):
+        j = prev_idx.get(pid)
+        if j is None or prev.starttime[j] != cur.starttime[i]:
+            continue
+        ticks = (cur.utime[i] + cur.stime[i]) - (prev.utime[j] + prev.stime[j])
+        pct_l[i] = round(max(ticks, 0) * scale, 1)
+        known_l[i] = True
+    return pct_l, known_l
@@ -0,0 +1,264 @@
+"""
+Inventário de runtimes com várias versões (.NET, Node via NVM, PHP).
+
+Substitui 'dotnet --list-runtimes', 'nvm list' (shell interativo lento) e
+'php --version' por leituras do sistema de arquivos:
+
+- .NET: <raiz>/shared/Microsoft.NETCore.App/<versão> e <raiz>/sdk/<versão>
+  (o 'dotnet --version' reporta o SDK mais novo);
+- Node: $NVM_DIR/versions/node/v<versão> e o alias $NVM_DIR/alias/default;
+- PHP: /usr/bin/php<X.Y>, pacotes php<X.Y>* do dpkg e o link
+  /etc/alternatives/php.
+
+Cada runtime é guardado com o mtime dos diretórios/links que consulta e só é
+recalculado quando algum deles muda. Os runtimes são sondados em paralelo e o
+CLI só é chamado quando o sistema de arquivos não responde (ex.: dotnet fora
+das raízes conhecidas, alias do NVM não resolvível, php sem alternatives).
+"""
+import os
+import re
+import shutil
+import subprocess
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.core.dpkg import dpkg_status
+
+DOTNET_ROOTS = ("/usr/share/dotnet", "/usr/lib/dotnet", "/opt/dotnet")
+PHP_BIN_DIR = "/usr/bin"
+ALTERNATIVES_DIR = "/etc/alternatives"
+CLI_TIMEOUT = 10
+# Saltos máximos ao resolver aliases do NVM (default -> lts/* -> lts/jod -> v22...)
+NVM_ALIAS_HOPS = 5
+
+_PHP_BIN = re.compile(r"^php(\d+\.\d+)$")
+
+
+def _mtime(path: str) -> int:
+    try:
+        return os.lstat(path).st_mtime_ns
+    except OSError:
+        return 0
+
+
+def _listdir(path: str) -> List[str]:
+    try:
+        return os.listdir(path)
+    except OSError:
+        return []
+
+
+def _short(version: str, parts: int) -> Optional[str]:
+    """'8.0.11' -> '8.0' (parts=2) / '20.19.4' -> '20' (parts=1)."""
+    match = re.match(r"^v?(\d+(?:\.\d+){%d})" % (parts - 1), version)
+    return match.group(1) if match else None
+
+
+def _unique_sorted(versions) -> List[str]:
+    return sorted({v for v in versions if v})
+
+
+def _run(command: str) -> Optional[str]:
+    try:
+        result = subprocess.run(command, shell=True, capture_output=True, text=True, timeout=CLI_TIMEOUT)
+    except (OSError, subprocess.TimeoutExpired):
+        return None
+    return result.stdout if result.returncode == 0 else None
+
+
+# ---- .NET -------------------------------------------------------------------
+
+def dotnet_root() -> Optional[str]:
+    """Raiz da instalação: DOTNET_ROOT, destino do 'dotnet' no PATH ou raízes conhecidas."""
+    candidates = [os.getenv("DOTNET_ROOT")]
+    binary = shutil.which("dotnet")
+    if binary:
+        candidates.append(os.path.dirname(os.path.realpath(binary)))
+    candidates.extend(DOTNET_ROOTS)
+    for root in candidates:
+        if root and os.path.isdir(os.path.join(root, "shared", "Microsoft.NETCore.App")):
+            return root
+    return None
+
+
+def _dotnet_stamp() -> Tuple[Any, ...]:
+    root = dotnet_root()
+    if root is None:
+        return (None, bool(shutil.which("dotnet")))
+    return (root, _mtime(os.path.join(root, "shared", "Microsoft.NETCore.App")), _mtime(os.path.join(root, "sdk")))
+
+
+def probe_dotnet() -> Dict[str, Any]:
+    root = dotnet_root()
+    if root is not None:
+        runtimes = _listdir(os.path.join(root, "shared", "Microsoft.NETCore.App"))
+        sdks = sorted(
+            (d for d in _listdir(os.path.join(root, "sdk")) if re.match(r"^\d+\.\d+\.\d+", d)),
+            key=lambda v: [int(p) if p.isdigit() else 0 for p in re.split(r"[.-]", v)],
+        )
+        return {
+            "installed": _unique_sorted(_short(v, 2) for v in runtimes),
+            "default": _short(sdks[-1], 2) if sdks else None,
+            "source": "filesystem",
+        }
+    if not shutil.which("dotnet"):
+        return {"installed": [], "default": None, "source": "filesystem"}
+    # Instalação fora das raízes conhecidas: perguntar ao CLI
+    runtimes = _run("dotnet --list-runtimes") or ""
+    version = _run("dotnet --version")
+    return {
+        "installed": _unique_sorted(
+            _short(line.split()[1], 2) for line in runtimes.splitlines()
+            if line.startswith("Microsoft.NETCore.App ") and len(line.split()) > 1
+        ),
+        "default": _short(version.strip(), 2) if version else None,
+        "source": "cli",
+    }
+
+
+# ---- Node (NVM) -------------------------------------------------------------
+
+def nvm_dir() -> str:
+    return os.getenv("NVM_DIR") or os.path.expanduser("~/.nvm")
+
+
+def _nvm_stamp() -> Tuple[Any, ...]:
+    base = nvm_dir()
+    return (
+        base,
+        _mtime(os.path.join(base, "versions", "node")),
+        _mtime(os.path.join(base, "alias")),
+        _mtime(os.path.join(base, "alias", "default")),
+        _mtime(os.path.join(base, "alias", "lts")),
+    )
+
+
+def _nvm_resolve(base: str, installed: List[str]) -> Optional[str]:
+    """Versão instalada apontada pelo alias 'default' (None se não resolvível)."""
+    alias = "default"
+    for _ in range(NVM_ALIAS_HOPS):
+        try:
+            with open(os.path.join(base, "alias", alias), "r") as f:
+                target = f.read().strip()
+        except OSError:
+            return None
+        if target in ("node", "stable"):
+            return installed[-1] if installed else None
+        if re.match(r"^v?\d", target):
+            prefix = target.lstrip("v")
+            matches = [v for v in installed if v == prefix or v.startswith(prefix + ".")]
+            return matches[-1] if matches else None
+        # outro alias ("lts/*", "lts/jod", alias do usuário): segue o arquivo
+        alias = target
+    return None
+
+
+def probe_nodejs() -> Dict[str, Any]:
+    base = nvm_dir()
+    if not os.path.isfile(os.path.join(base, "nvm.sh")):
+        return {"installed": [], "default": None, "source": "filesystem"}
+    installed = sorted(
+        (d[1:] for d in _listdir(os.path.join(base, "versions", "node")) if re.match(r"^v\d+\.\d+\.\d+$", d)),
+        key=lambda v: [int(p) for p in v.split(".")],
+    )
+    majors = sorted({_short(v, 1) for v in installed}, key=int)
+    current = _nvm_resolve(base, installed)
+    if current is not None or not installed:
+        return {"installed": majors, "default": _short(current, 1) if current else None, "source": "filesystem"}
+    # Alias em formato desconhecido: perguntar ao NVM
+    out = _run(f"bash -c 'source {base}/nvm.sh && nvm current'")
+    default = None
+    if out:
+        version = out.strip()
+        default = _short(version, 1) or version
+    return {"installed": majors, "default": default, "source": "cli"}
+
+
+# ---- PHP ----------------------------------------------------------------------
+
+def _php_stamp() -> Tuple[Any, ...]:
+    dpkg_status.stats()  # revalida o índice do dpkg
+    return (_mtime(PHP_BIN_DIR), _mtime(ALTERNATIVES_DIR), _mtime(os.path.join(ALTERNATIVES_DIR, "php")),
+            dpkg_status.generation)
+
+
+def probe_php() -> Dict[str, Any]:
+    versions = {m.group(1) for m in map(_PHP_BIN.match, _listdir(PHP_BIN_DIR)) if m}
+    # Pacotes "php8.1", "php8.1-cli", ... também contam (ex.: só php8.1-fpm instalado)
+    for name in dpkg_status.names("php"):
+        match = re.match(r"php(\d+\.\d+)", name)
+        if match:
+            versions.add(match.group(1))
+    installed = sorted(versions, key=lambda v: [int(p) for p in v.split(".")])
+
+    default = None
+    source = "filesystem"
+    target = None
+    try:
+        target = os.readlink(os.path.join(ALTERNATIVES_DIR, "php"))
+    except OSError:
+        pass
+    if target:
+        match = _PHP_BIN.match(os.path.basename(target))
+        default = match.group(1) if match else None
+    if default is None and shutil.which("php"):
+        # php fora do alternatives (compilado, /usr/local/bin etc.)
+        out = _run("php --version")
+        match = re.search(r"PHP (\d+\.\d+)", out or "")
+        default = match.group(1) if match else None
+        source = "cli"
+    return {"installed": installed, "default": default, "source": source}
+
+
+PROBES = {
+    "dotnet": (_dotnet_stamp, probe_dotnet),
+    "nodejs": (_nvm_stamp, probe_nodejs),
+    "php": (_php_stamp, probe_php),
+}
+
+
+class RuntimeInventory:
+    """Cache dos probes por runtime, invalidado pelo mtime dos caminhos consultados."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._cache: Dict[str, Tuple[Tuple[Any, ...], Dict[str, Any]]] = {}
+
+    def get(self, runtime: str) -> Dict[str, Any]:
+        """{installed: [...], default, source} de um runtime ('dotnet', 'nodejs', 'php')."""
+        if runtime not in PROBES:
+            return {"installed": [], "default": None, "source": None}
+        stamp_fn, probe = PROBES[runtime]
+        stamp = stamp_fn()
+        cached = self._cache.get(runtime)
+        if cached is not None and cached[0] == stamp:
+            return cached[1]
+        try:
+            result = probe()
+        except Exception as e:
+            print(f"Erro ao obter versões de {runtime}: {e}")
+            return {"installed": [], "default": None, "source": None}
+        with self._lock:
+            self._cache[runtime] = (stamp, result)
+        return result
+
+    def all(self) -> Dict[str, Dict[str, Any]]:
+        """Todos os runtimes, sondados em paralelo."""
+        with ThreadPoolExecutor(max_workers=len(PROBES), thread_name_prefix="runtime-probe") as pool:
+            futures = {name: pool.submit(self.get, name) for name in PROBES}
+            return {name: f.result() for name, f in futures.items()}
+
+    def warm(self):
+        """Preenche o cache em background (chamado no startup)."""
+        threading.Thread(target=self.all, name="runtime-inventory", daemon=True).start()
+
+    def invalidate(self, runtime: Optional[str] = None):
+        with self._lock:
+            if runtime is None:
+                self._cache.clear()
+            else:
+                self._cache.pop(runtime, None)
+
+
+runtime_inventory = RuntimeInventory()
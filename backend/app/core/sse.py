@@ -0,0 +1,139 @@
+"""
+Utilitários para respostas Server-Sent Events (SSE).
+"""
+import asyncio
+import json
+import time
+from typing import Any, AsyncIterator, Callable, Dict, Iterable, Optional
+
+from fastapi.responses import StreamingResponse
+
+# Comentário SSE enviado periodicamente para manter a conexão aberta em proxies
+KEEPALIVE = ": keepalive\n\n"
+
+
+def sse_event(data: Any, event: Optional[str] = None, event_id: Optional[str] = None) -> str:
+    """Formata um evento SSE; 'data' que não for str é serializado como JSON."""
+    payload = data if isinstance(data, str) else json.dumps(data, separators=(",", ":"), default=str)
+    lines = []
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    if event:
+        lines.append(f"event: {event}")
+    for chunk in payload.split("\n"):
+        lines.append(f"data: {chunk}")
+    return "\n".join(lines) + "\n\n"
+
+
+def sse_response(events: AsyncIterator[str]) -> StreamingResponse:
+    """StreamingResponse text/event-stream sem cache nem buffering no nginx."""
+    return StreamingResponse(
+        events,
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+async def sse_stream(
+    items: AsyncIterator[Any],
+    event: Optional[str] = None,
+    keepalive: float = 15.0,
+    queue_size: int = 256,
+) -> AsyncIterator[str]:
+    """Converte um iterador assíncrono em eventos SSE, com keepalive quando ocioso.
+
+    A leitura da fonte roda em uma task separada ligada a uma fila limitada:
+    se o cliente lê devagar, a fonte é pausada (memória constante) e o timeout
+    do keepalive não cancela a fonte no meio de uma leitura.
+    """
+    queue: "asyncio.Queue[Any]" = asyncio.Queue(maxsize=queue_size)
+    done = object()
+
+    async def _pump():
+        try:
+            async for item in items:
+                await queue.put(item)
+        except Exception as e:
+            await queue.put({"error": str(e)})
+        await queue.put(done)
+
+    task = asyncio.create_task(_pump())
+    try:
+        while True:
+            try:
+                item = await asyncio.wait_for(queue.get(), timeout=keepalive)
+            except asyncio.TimeoutError:
+                yield KEEPALIVE
+                continue
+            if item is done:
+                break
+            yield sse_event(item, event=event)
+        yield sse_event({"reason": "eof"}, event="close")
+    finally:
+        task.cancel()
+        try:
+            await task
+        except (asyncio.CancelledError, Exception):
+            pass
+        aclose = getattr(items, "aclose", None)
+        if aclose is not None:
+            await aclose()
+
+
+async def job_stream(
+    get_job: Callable[[], Optional[Dict[str, Any]]],
+    channel: Any,
+    fps: float = 4.0,
+    finished: Iterable[str] = ("completed", "canceled", "error"),
+    keepalive: float = 15.0,
+) -> AsyncIterator[str]:
+    """Eventos SSE de um job que publica em um JobChannel.
+
+    'state' (job completo, ao conectar), 'progress' (no máximo 'fps' por
+    segundo; atualizações intermediárias são agrupadas e as linhas de log
+    novas acumuladas) e 'result' (job final, encerra o stream).
+    """
+    finished = tuple(finished)
+    interval = 1.0 / fps
+    seq = max((e[0] for e in channel.since(0)), default=0)
+    last_emit = time.monotonic()
+    # get_job() copia o job: só no estado inicial e no resultado final; as
+    # transições de status/fase chegam como eventos do canal
+    state = get_job() or {}
+    yield sse_event(state, event="state")
+    if state.get("status") in finished:
+        yield sse_event(state, event="result")
+        return
+    status, phase = state.get("status"), state.get("phase")
+    while True:
+        events = channel.since(seq)
+        if events:
+            seq = events[-1][0]
+            if any(kind == "done" for _, kind, _ in events):
+                final = get_job()
+                if final is None:
+                    yield sse_event({"reason": "evicted"}, event="close")
+                else:
+                    yield sse_event(final, event="result")
+                return
+            for _, kind, data in events:
+                if kind == "status":
+                    status = data.get("status", status)
+                    phase = data.get("phase", phase)
+                elif kind == "progress" and isinstance(data, dict):
+                    phase = data.get("phase", phase)
+            frame: Dict[str, Any] = {"seq": seq, "status": status}
+            if phase is not None:
+                frame["phase"] = phase
+            progress = [data for _, kind, data in events if kind == "progress"]
+            if progress:
+                frame.update(progress[-1])
+            logs = [data for _, kind, data in events if kind == "log"]
+            if logs:
+                frame["logs"] = logs
+            yield sse_event(frame, event="progress")
+            last_emit = time.monotonic()
+        elif time.monotonic() - last_emit >= keepalive:
+            yield KEEPALIVE
+            last_emit = time.monotonic()
+        await asyncio.sleep(interval)
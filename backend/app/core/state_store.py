@@ -0,0 +1,115 @@
+"""
+Estado JSON em memória com gravação atrasada e atômica.
+
+- Carrega o arquivo uma vez; leituras vêm da memória sob um lock.
+- Escritas marcam o estado como sujo e agendam um flush após 'debounce'
+  segundos: várias alterações seguidas viram uma única gravação.
+- O flush grava em um arquivo temporário no mesmo diretório, faz fsync e
+  os.replace, então leitores (inclusive outros processos) nunca veem JSON
+  pela metade.
+- Se o arquivo mudar por fora (mtime/tamanho diferentes do último
+  carregado/gravado) e não houver alterações pendentes, é recarregado.
+"""
+import copy
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional, Tuple
+
+
+class JsonStateStore:
+    def __init__(self, path: Path, defaults: Optional[Callable[[], Dict[str, Any]]] = None,
+                 debounce: float = 0.5):
+        self.path = Path(path)
+        self.defaults = defaults or dict
+        self.debounce = debounce
+        self._lock = threading.RLock()
+        self._data: Optional[Dict[str, Any]] = None
+        self._stamp: Optional[Tuple[int, int]] = None
+        self._dirty = False
+        self._timer: Optional[threading.Timer] = None
+
+    def _file_stamp(self) -> Optional[Tuple[int, int]]:
+        try:
+            st = os.stat(self.path)
+        except OSError:
+            return None
+        return st.st_mtime_ns, st.st_size
+
+    def _load(self):
+        """Carrega/recarrega do disco se o arquivo mudou (chamar com o lock)."""
+        stamp = self._file_stamp()
+        if self._data is not None and (self._dirty or stamp == self._stamp):
+            return
+        data = None
+        if stamp is not None:
+            try:
+                with open(self.path, "r") as f:
+                    data = json.load(f)
+            except (OSError, ValueError) as e:
+                print(f"Erro ao carregar estado de {self.path}: {e}")
+                if self._data is not None:
+                    # mantém o que já está em memória em vez de voltar ao padrão
+                    self._stamp = stamp
+                    return
+        self._data = data if isinstance(data, dict) else self.defaults()
+        self._stamp = stamp
+
+    # ---- leitura -------------------------------------------------------------
+
+    def get(self, key: str, default: Any = None) -> Any:
+        with self._lock:
+            self._load()
+            value = self._data.get(key, default)
+            return copy.deepcopy(value)
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            self._load()
+            return copy.deepcopy(self._data)
+
+    # ---- escrita -------------------------------------------------------------
+
+    def set(self, key: str, value: Any):
+        with self._lock:
+            self._load()
+            self._data[key] = copy.deepcopy(value)
+            self._mark_dirty()
+
+    def replace(self, state: Dict[str, Any]):
+        with self._lock:
+            self._data = copy.deepcopy(state)
+            self._mark_dirty()
+
+    def _mark_dirty(self):
+        self._dirty = True
+        if self._timer is None:
+            self._timer = threading.Timer(self.debounce, self.flush)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def flush(self):
+        """Grava as alterações pendentes (no-op se não houver)."""
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            if not self._dirty:
+                return
+            payload = json.dumps(self._data)
+            tmp = self.path.with_name(f".{self.path.name}.{os.getpid()}.tmp")
+            try:
+                with open(tmp, "w") as f:
+                    f.write(payload)
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.replace(tmp, self.path)
+                self._stamp = self._file_stamp()
+                self._dirty = False
+            except OSError as e:
+                print(f"Erro ao salvar estado em {self.path}: {e}")
+                try:
+                    os.unlink(tmp)
+                except OSError:
+                    pass
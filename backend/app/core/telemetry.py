@@ -0,0 +1,136 @@
+"""
+Amostrador de telemetria em background.
+
+Coleta periodicamente CPU (total e por núcleo), memória, load average e
+contadores de I/O de disco e rede, mantendo apenas o snapshot mais recente em
+memória. As rotas leem esse snapshot sem bloquear o event loop (antes cada
+requisição chamava psutil.cpu_percent(interval=1)).
+"""
+import asyncio
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+import psutil
+
+from app.core.config import settings
+
+
+class TelemetrySampler:
+    """Mantém o último snapshot de métricas do sistema, atualizado a cada 'interval' segundos."""
+
+    def __init__(self, interval: float = 1.0):
+        self.interval = max(0.1, float(interval))
+        self._snapshot: Optional[Dict[str, Any]] = None
+        self._task: Optional[asyncio.Task] = None
+        self._prev_disk: Optional[Any] = None
+        self._prev_net: Optional[Any] = None
+        self._prev_ts: Optional[float] = None
+        self._listeners: List[Callable[[Dict[str, Any]], None]] = []
+        # Primeira chamada de cpu_percent(interval=None) apenas inicializa o contador interno
+        psutil.cpu_percent(interval=None, percpu=True)
+
+    def _rates(self, cur: Any, prev: Any, fields: tuple, elapsed: float) -> Optional[Dict[str, float]]:
+        if cur is None or prev is None or elapsed <= 0:
+            return None
+        return {f"{f}_per_sec": round(max(0, getattr(cur, f) - getattr(prev, f)) / elapsed, 2) for f in fields}
+
+    def add_listener(self, callback: Callable[[Dict[str, Any]], None]):
+        """Registra uma função chamada com cada snapshot coletado pelo loop do sampler."""
+        if callback not in self._listeners:
+            self._listeners.append(callback)
+
+    def collect(self) -> Dict[str, Any]:
+        """Coleta um snapshot sem dormir (cpu_percent usa o delta desde a última coleta)."""
+        now = time.time()
+        per_core = psutil.cpu_percent(interval=None, percpu=True)
+        cpu_total = sum(per_core) / len(per_core) if per_core else 0.0
+        memory = psutil.virtual_memory()
+        try:
+            load_avg = list(psutil.getloadavg())
+        except Exception:
+            load_avg = [0.0, 0.0, 0.0]
+        try:
+            disk_io = psutil.disk_io_counters()
+        except Exception:
+            disk_io = None
+        try:
+            net_io = psutil.net_io_counters()
+        except Exception:
+            net_io = None
+
+        elapsed = now - self._prev_ts if self._prev_ts else 0.0
+        disk_rates = self._rates(disk_io, self._prev_disk, ("read_bytes", "write_bytes"), elapsed)
+        net_rates = self._rates(net_io, self._prev_net, ("bytes_sent", "bytes_recv"), elapsed)
+        self._prev_disk, self._prev_net, self._prev_ts = disk_io, net_io, now
+
+        snapshot = {
+            "sampled_at": datetime.fromtimestamp(now).isoformat(),
+            "sampled_at_ts": now,
+            "interval": self.interval,
+            "cpu": {
+                "percent_total": round(cpu_total, 1),
+                "percent_per_core": per_core,
+            },
+            "memory": {
+                "total": memory.total,
+                "available": memory.available,
+                "used": memory.used,
+                "free": memory.free,
+                "percent": memory.percent,
+            },
+            "load_avg": load_avg,
+            "disk_io": {
+                "read_bytes": disk_io.read_bytes,
+                "write_bytes": disk_io.write_bytes,
+                "read_count": disk_io.read_count,
+                "write_count": disk_io.write_count,
+                **(disk_rates or {}),
+            } if disk_io else None,
+            "net_io": {
+                "bytes_sent": net_io.bytes_sent,
+                "bytes_recv": net_io.bytes_recv,
+                "packets_sent": net_io.packets_sent,
+                "packets_recv": net_io.packets_recv,
+                **(net_rates or {}),
+            } if net_io else None,
+        }
+        self._snapshot = snapshot
+        return snapshot
+
+    def latest(self) -> Dict[str, Any]:
+        """Retorna o último snapshot; se o sampler ainda não rodou, coleta um na hora."""
+        snap = self._snapshot
+        if snap is None:
+            snap = self.collect()
+        return snap
+
+    async def _run(self):
+        while True:
+            try:
+                # psutil faz syscalls/leituras de /proc; executar fora do event loop
+                snap = await asyncio.to_thread(self.collect)
+                for callback in self._listeners:
+                    try:
+                        callback(snap)
+                    except Exception as e:
+                        print(f"Erro em listener de telemetria: {e}")
+            except Exception as e:
+                print(f"Erro no sampler de telemetria: {e}")
+            await asyncio.sleep(self.interval)
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+sampler = TelemetrySampler(interval=settings.telemetry_interval)
@@ -0,0 +1,91 @@
+"""
+Micro-benchmark: app.core.procfs.scan vs psutil.process_iter.
+
+Cria uma árvore sintética no formato de /proc (stat, statm, status, comm) com
+N processos em um diretório temporário e mede as duas abordagens sobre ela.
+
+Uso:
+    python bench_procfs.py [N_PROCESSOS] [REPETICOES] [--real]
+
+--real mede também contra o /proc verdadeiro do host.
+"""
+import os
+import sys
+import tempfile
+import time
+
+# Adicionar o diretório pai ao path para importar os módulos
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app.core import procfs
+
+
+def build_fixture(root: str, count: int):
+    """Gera 'count' diretórios /proc/<pid> com conteúdo realista."""
+    with open(os.path.join(root, "stat"), "w") as f:
+        f.write("cpu  1000 0 1000 100000 0 0 0 0 0 0\nbtime 1700000000\n")
+    for pid in range(1, count + 1):
+        d = os.path.join(root, str(pid))
+        os.mkdir(d)
+        comm = f"worker-{pid % 97}"
+        utime, stime = pid * 3, pid
+        with open(os.path.join(d, "stat"), "w") as f:
+            f.write(
+                f"{pid} ({comm}) S {max(0, pid - 1)} {pid} {pid} 0 -1 4194560 100 0 0 0 "
+                f"{utime} {stime} 0 0 20 0 1 0 {1000 + pid} 123456789 {pid % 500 + 10} "
+                "18446744073709551615 1 1 0 0 0 0 0 0 0 0 0 0 17 0 0 0 0 0 0\n"
+            )
+        with open(os.path.join(d, "statm"), "w") as f:
+            f.write(f"30000 {pid % 500 + 10} 800 100 0 2000 0\n")
+        with open(os.path.join(d, "status"), "w") as f:
+            f.write(
+                f"Name:\t{comm}\nUmask:\t0022\nState:\tS (sleeping)\nTgid:\t{pid}\nNgid:\t0\n"
+                f"Pid:\t{pid}\nPPid:\t{max(0, pid - 1)}\nTracerPid:\t0\n"
+                f"Uid:\t{pid % 3}\t{pid % 3}\t{pid % 3}\t{pid % 3}\n"
+                f"Gid:\t0\t0\t0\t0\nVmRSS:\t{(pid % 500 + 10) * 4} kB\nThreads:\t1\n"
+            )
+        with open(os.path.join(d, "comm"), "w") as f:
+            f.write(comm + "\n")
+
+
+def timeit(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def bench(root: str, repeat: int):
+    procfs_s = timeit(lambda: procfs.scan(root), repeat)
+    print(f"  procfs.scan          : {procfs_s * 1000:8.2f} ms")
+    try:
+        import psutil
+    except ImportError:
+        print("  psutil               : não instalado")
+        return
+    old_root = psutil.PROCFS_PATH
+    psutil.PROCFS_PATH = root
+    try:
+        attrs = ["pid", "ppid", "name", "status", "cpu_times", "memory_info", "uids"]
+        psutil_s = timeit(lambda: list(psutil.process_iter(attrs)), repeat)
+        print(f"  psutil.process_iter  : {psutil_s * 1000:8.2f} ms ({psutil_s / procfs_s:.1f}x)")
+    except Exception as e:
+        print(f"  psutil.process_iter  : falhou ({e})")
+    finally:
+        psutil.PROCFS_PATH = old_root
+
+
+if __name__ == "__main__":
+    args = [a for a in sys.argv[1:] if not a.startswith("--")]
+    count = int(args[0]) if args else 5000
+    repeat = int(args[1]) if len(args) > 1 else 5
+    with tempfile.TemporaryDirectory() as tmp:
+        print(f"Criando /proc sintético com {count} processos...")
+        build_fixture(tmp, count)
+        print(f"Melhor de {repeat} execuções:")
+        bench(tmp, repeat)
+    if "--real" in sys.argv and procfs.available():
+        print("/proc real:")
+        bench(procfs.PROC_ROOT, repeat)
@@ -2,19 +2,45 @@ from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 from contextlib import asynccontextmanager
+import asyncio
 import uvicorn
 import os
 
 from app.api.routes import system, users, services, network, packages, packages_essentials, auth, database, webserver, security
 from app.core.config import settings
+from app.core.telemetry import sampler
+from app.core.metrics_history import history
+from app.core.hardware import inventory
+from app.core.nvidia import gpu_collector
+from app.core.metrics_stream import broadcaster
+from app.core.bench_scheduler import bench_scheduler
+from app.core.apt_updates import apt_updates
+from app.core.apt_search import package_search
+from app.core.apt_jobs import apt_jobs
+from app.core.runtimes import runtime_inventory
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Startup
     print("🚀 Ubuntu Server Admin API starting...")
+    # Fatos estáticos de hardware: coletados uma única vez fora do event loop
+    await asyncio.to_thread(inventory.refresh)
+    sampler.add_listener(history.record)
+    sampler.add_listener(broadcaster.publish)
+    sampler.start()
+    gpu_collector.start()
+    apt_updates.start()
+    package_search.warm()
+    runtime_inventory.warm()
     yield
     # Shutdown
+    await apt_updates.stop()
+    await apt_jobs.stop()
+    await gpu_collector.stop()
+    await sampler.stop()
+    bench_scheduler.shutdown()
+    packages_essentials.packages_state.flush()
     print("👋 Ubuntu Server Admin API shutting down...")
 
 
@@ -64,6 +64,12 @@ export interface BenchmarkJobStatus {
   started_at?: string;
 }
 
+// Eventos do stream SSE /system/benchmark/stream/{id}
+export interface BenchmarkStreamEvent {
+  event: 'state' | 'progress' | 'result' | 'close';
+  data: any;
+}
+
 export interface VersionInfo {
   repo?: string;
   current_commit?: string;
@@ -139,6 +145,19 @@ export class SystemService {
   getBenchmarkStatus(jobId: string): Observable<BenchmarkJobStatus> {
     return this.http.get<BenchmarkJobStatus>(`${this.base}/system/benchmark/status/${jobId}`);
   }
+  streamBenchmark(jobId: string): Observable<BenchmarkStreamEvent> {
+    return new Observable<BenchmarkStreamEvent>(observer => {
+      const token = localStorage.getItem('auth_token') || '';
+      const es = new EventSource(`${this.base}/system/benchmark/stream/${jobId}?token=${encodeURIComponent(token)}`);
+      const forward = (event: BenchmarkStreamEvent['event']) => (msg: MessageEvent) => {
+        observer.next({ event, data: JSON.parse(msg.data) });
+        if (event === 'result' || event === 'close') { es.close(); observer.complete(); }
+      };
+      (['state', 'progress', 'result', 'close'] as const).forEach(ev => es.addEventListener(ev, forward(ev) as EventListener));
+      es.onerror = () => { es.close(); observer.error(new Error('Stream do benchmark interrompido')); };
+      return () => es.close();
+    });
+  }
   cancelBenchmark(jobId: string): Observable<void> {
     return this.http.post<void>(`${this.base}/system/benchmark/cancel/${jobId}`, {});
   }
@@ -172,15 +172,18 @@ export class SystemComponent implements OnInit, OnDestroy {
     this.systemService.startBenchmarkJob(req).subscribe({
       next: ({ job_id }: { job_id: string }) => {
         this.benchPollSub?.unsubscribe();
-        this.benchPollSub = interval(1000).pipe(
-          switchMap(() => this.systemService.getBenchmarkStatus(job_id))
-        ).subscribe({
-          next: (st: BenchmarkJobStatus) => {
-            this.benchProgress = Math.max(0, Math.min(100, Math.round((st.progress ?? 0))));
-            if (st.status === 'completed' || st.status === 'canceled' || st.status === 'error' || st.status === 'failed') {
+        // Progresso via SSE (frames agrupados pelo backend); o evento 'result' traz o job final
+        this.benchPollSub = this.systemService.streamBenchmark(job_id).subscribe({
+          next: ({ event, data }) => {
+            if (event === 'result') {
+              const st = data as BenchmarkJobStatus;
               this.benchRunning = false;
+              this.benchProgress = st.status === 'completed' ? 100 : this.benchProgress;
               this.benchResult = st.result ?? { status: st.status, error: st.error };
-              this.benchPollSub?.unsubscribe();
+            } else if (event === 'close') {
+              this.benchRunning = false;
+            } else if (data.progress !== undefined) {
+              this.benchProgress = Math.max(0, Math.min(100, Math.round((data.progress ?? 0))));
             }
           },
           error: () => {
@@ -31,6 +31,19 @@ export interface PackageActionResponse {
   success: boolean;
   message: string;
   logs?: string[];
+  jobId?: string;
+}
+
+export interface BulkInstallResult {
+  packageId: string;
+  package: string | null;
+  status: 'installed' | 'already_installed' | 'pending' | 'unavailable' | 'failed' | 'invalid';
+  version?: string;
+  message?: string;
+}
+
+export interface BulkInstallResponse extends PackageActionResponse {
+  results: BulkInstallResult[];
 }
 
 export interface PackageVersionInfo {
@@ -84,6 +97,13 @@ export class PackageService {
     return this.http.post<PackageActionResponse>(`${this.apiUrl}/install`, request);
   }
 
+  /**
+   * Instalar vários pacotes em uma única transação do apt
+   */
+  installPackages(packageIds: string[]): Observable<BulkInstallResponse> {
+    return this.http.post<BulkInstallResponse>(`${this.apiUrl}/install-bulk`, { packageIds });
+  }
+
   /**
    * Remover um pacote
    */